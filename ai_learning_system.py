@@ -1,12 +1,21 @@
 import json
 import os
+import sys
 from datetime import datetime
-from typing import Dict, List, Set, Any
+from typing import Dict, List, Set, Any, Tuple
 from collections import defaultdict, Counter
 import pickle
 from dataclasses import dataclass, asdict
 import re
 
+_TOKEN_PATTERN = re.compile(r"[\w'-]+")
+
+def normalize_command(command: str) -> Tuple[str, Tuple[str, ...]]:
+    """Lowercase, collapse whitespace and tokenize a command once, interning the results"""
+    normalized = sys.intern(" ".join(command.lower().split()))
+    tokens = tuple(sys.intern(token) for token in _TOKEN_PATTERN.findall(normalized))
+    return normalized, tokens
+
 @dataclass
 class PlayerAction:
     """Data structure untuk menyimpan aksi pemain"""
@@ -29,6 +38,95 @@ class GamePattern:
     suggested_features: List[str]
     last_used: str
 
+class EntityIndex:
+    """Token -> entity lookup over the item and NPC names a session can refer to.
+
+    Built once from a loaded state, then kept current by the state's change
+    listener and by adding each location the player enters.
+    """
+    
+    def __init__(self):
+        # first token -> [(name tokens, entity name)]
+        self.items: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        self.npcs: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        self._sources: Dict[Tuple[str, str], Set[str]] = {}  # (table, name) -> "world" and/or "inventory"
+        self._inventory_names: Dict[str, str] = {}  # folded item name -> indexed name
+    
+    @classmethod
+    def from_game_state(cls, game_state) -> "EntityIndex":
+        """Index the inventory, quest rewards and the locations the session has decoded"""
+        index = cls()
+        for location in game_state.locations.materialized().values():
+            index.add_location(location)
+        for quest in game_state.quests:
+            for reward in quest.rewards:
+                index.add_item(reward.name)
+        for item in game_state.inventory:
+            index.update_inventory_item(item.name.casefold(), item)
+        return index
+    
+    def add_location(self, location):
+        for item in location.items:
+            self.add_item(item.name)
+        for npc in location.npcs:
+            self.add_npc(npc)
+    
+    def update_inventory_item(self, item_key: str, item=None):
+        """Track the inventory's item under a folded name (None once it is gone)"""
+        name = self._inventory_names.pop(item_key, None)
+        if name is not None:
+            self._remove("items", name, "inventory")
+        if item is not None:
+            self._inventory_names[item_key] = item.name
+            self._add("items", item.name, "inventory")
+    
+    def add_item(self, name: str):
+        self._add("items", name, "world")
+    
+    def add_npc(self, name: str):
+        self._add("npcs", name, "world")
+    
+    def _add(self, table_name: str, name: str, source: str):
+        sources = self._sources.get((table_name, name))
+        if sources is None:
+            sources = self._sources[(table_name, name)] = set()
+            _, tokens = normalize_command(name)
+            if tokens:
+                getattr(self, table_name).setdefault(tokens[0], []).append((tokens, name))
+        sources.add(source)
+    
+    def _remove(self, table_name: str, name: str, source: str):
+        sources = self._sources.get((table_name, name))
+        if sources is None:
+            return
+        sources.discard(source)
+        if sources:
+            return
+        del self._sources[(table_name, name)]
+        _, tokens = normalize_command(name)
+        if tokens:
+            table = getattr(self, table_name)
+            entries = table[tokens[0]]
+            entries.remove((tokens, name))
+            if not entries:
+                del table[tokens[0]]
+    
+    def match_items(self, tokens: Tuple[str, ...]) -> List[str]:
+        """Return item names mentioned in the token sequence"""
+        return self._match(self.items, tokens)
+    
+    def match_npcs(self, tokens: Tuple[str, ...]) -> List[str]:
+        """Return NPC names mentioned in the token sequence"""
+        return self._match(self.npcs, tokens)
+    
+    def _match(self, table: Dict[str, List[Tuple[Tuple[str, ...], str]]], tokens: Tuple[str, ...]) -> List[str]:
+        matches = []
+        for i, token in enumerate(tokens):
+            for name_tokens, name in table.get(token, ()):
+                if tokens[i:i + len(name_tokens)] == name_tokens and name not in matches:
+                    matches.append(name)
+        return matches
+
 class AILearningSystem:
     def __init__(self, data_file="game_learning_data.json", patterns_file="learned_patterns.pkl"):
         self.data_file = data_file
@@ -40,6 +138,13 @@ class AILearningSystem:
         self.item_usage = Counter()
         self.npc_interactions = Counter()
         
+        # Entity index of one state, rebuilt only when it loads a save
+        self._entity_index = None
+        self._entity_index_state = None
+        self._entity_index_world = None
+        self._entity_index_inventory = None
+        self._entity_index_location = None
+        
         # Load existing data
         self.load_data()
     
@@ -105,13 +210,16 @@ class AILearningSystem:
         
         self.actions.append(action)
         
+        # Normalize once; every later stage works on the interned tokens
+        normalized, tokens = normalize_command(command)
+        
         # Update counters
-        self.command_frequency[command.lower()] += 1
+        self.command_frequency[normalized] += 1
         self.location_popularity[game_state.current_location] += 1
         
         # Extract items and NPCs from command
-        self._extract_items_from_command(command, game_state)
-        self._extract_npcs_from_command(command, game_state)
+        self._extract_items_from_command(tokens, game_state)
+        self._extract_npcs_from_command(tokens, game_state)
         
         # Analyze patterns
         self._analyze_patterns()
@@ -120,31 +228,68 @@ class AILearningSystem:
         if len(self.actions) % 10 == 0:  # Save every 10 actions
             self.save_data()
     
-    def _extract_items_from_command(self, command: str, game_state):
-        """Extract item usage from command"""
-        command_lower = command.lower()
-        
-        # Check for item usage patterns
-        if 'gunakan' in command_lower or 'use' in command_lower:
-            for item in game_state.inventory:
-                if item.name.lower() in command_lower:
-                    self.item_usage[item.name] += 1
-        
-        if 'ambil' in command_lower or 'take' in command_lower:
-            current_loc = game_state.get_current_location_info()
-            for item in current_loc.items:
-                if item.name.lower() in command_lower:
-                    self.item_usage[item.name] += 1
+    def _get_entity_index(self, game_state) -> EntityIndex:
+        """Get the entity index for game_state, rebuilding it for a new state or a load"""
+        if (self._entity_index is None or self._entity_index_state is not game_state
+                or self._entity_index_world is not game_state.locations
+                or self._entity_index_inventory is not game_state.inventory):
+            if self._entity_index_state is not None:
+                self._entity_index_state.remove_change_listener(self._on_state_change)
+            self._entity_index = EntityIndex.from_game_state(game_state)
+            self._entity_index_state = game_state
+            self._entity_index_world = game_state.locations
+            self._entity_index_inventory = game_state.inventory
+            self._entity_index_location = None
+            game_state.add_change_listener(self._on_state_change)
+        if self._entity_index_location != game_state.current_location:
+            # Only the location entered is read, never the rest of the world
+            self._index_location(game_state, game_state.current_location)
+            self._entity_index_location = game_state.current_location
+        return self._entity_index
+    
+    def _index_location(self, game_state, name: str):
+        if name in game_state.locations:
+            self._entity_index.add_location(game_state.locations.peek(name))
+    
+    def _on_state_change(self, section: str, key: str):
+        """Keep the entity index current as items are gained, lost or dropped"""
+        game_state = self._entity_index_state
+        if section == "inventory":
+            # A replaced inventory is reindexed from scratch on the next command
+            if game_state.inventory is self._entity_index_inventory:
+                self._entity_index.update_inventory_item(key, game_state.inventory.get(key))
+        elif key == game_state.current_location and game_state.locations is self._entity_index_world:
+            self._index_location(game_state, key)
     
-    def _extract_npcs_from_command(self, command: str, game_state):
-        """Extract NPC interactions from command"""
-        command_lower = command.lower()
-        
-        if 'bicara' in command_lower or 'talk' in command_lower:
-            current_loc = game_state.get_current_location_info()
-            for npc in current_loc.npcs:
-                if npc.lower() in command_lower:
-                    self.npc_interactions[npc] += 1
+    def _extract_items_from_command(self, tokens: Tuple[str, ...], game_state):
+        """Extract item usage from command tokens"""
+        token_set = set(tokens)
+        using = 'gunakan' in token_set or 'use' in token_set
+        taking = 'ambil' in token_set or 'take' in token_set
+        if not (using or taking):
+            return
+        
+        mentioned = self._get_entity_index(game_state).match_items(tokens)
+        if not mentioned:
+            return
+        
+        current_loc = game_state.get_current_location_info()
+        for item_name in mentioned:
+            # Check for item usage patterns
+            if using and game_state.get_inventory_item(item_name):
+                self.item_usage[item_name] += 1
+            if taking and item_name in current_loc.items:
+                self.item_usage[item_name] += 1
+    
+    def _extract_npcs_from_command(self, tokens: Tuple[str, ...], game_state):
+        """Extract NPC interactions from command tokens"""
+        if 'bicara' not in tokens and 'talk' not in tokens:
+            return
+        
+        current_loc = game_state.get_current_location_info()
+        for npc in self._get_entity_index(game_state).match_npcs(tokens):
+            if npc in current_loc.npcs:
+                self.npc_interactions[npc] += 1
     
     def _analyze_patterns(self):
         """Analyze patterns from recorded actions"""
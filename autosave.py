@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from save_load_system import SaveLoadSystem
+
+AUTOSAVE_NAME = "autosave"
+SESSION_SLOT_PREFIX = AUTOSAVE_NAME + "_"
+DEFAULT_AUTOSAVE_COMMANDS = 10
+DEFAULT_AUTOSAVE_SECONDS = 120.0
+
+def session_slot_name(session_id) -> str:
+    """Save slot of one session (session ids come from the client)"""
+    return SESSION_SLOT_PREFIX + "".join(c for c in str(session_id) if c.isalnum() or c in "-_.")
+
+class AutosaveService:
+    """Background autosave for one or more game states.
+
+    note_turn() is called after each command. Every `every_commands` turns,
+    or once `every_seconds` have passed, it copies the state into plain data
+    on the caller's thread; a worker thread then encodes, compresses, masks
+    and writes it (temp file, fsync, rename). A snapshot for a slot that is
+    still waiting replaces the older one, so a slow disk means fewer writes,
+    never a blocked turn.
+
+    With `max_slots` set, each write also deletes the least recently written
+    session slots (see session_slot_name) beyond that many, so slots of
+    sessions that stopped playing do not pile up.
+    """
+
+    def __init__(self, save_system: SaveLoadSystem, every_commands: int = DEFAULT_AUTOSAVE_COMMANDS,
+                 every_seconds: float = DEFAULT_AUTOSAVE_SECONDS, max_slots: Optional[int] = None):
+        self.save_system = save_system
+        self.every_commands = every_commands
+        self.every_seconds = every_seconds
+        self.max_slots = max_slots
+        self.saves_written = 0
+        self.snapshots_coalesced = 0
+        self.last_results: Dict[str, Dict] = {}
+        self._turns: Dict[str, int] = {}
+        self._last_snapshot: Dict[str, float] = {}
+        self._pending: Dict[str, Dict] = {}
+        self._writing = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def note_turn(self, state, save_name: str = AUTOSAVE_NAME) -> bool:
+        """Count a played turn; returns True if it triggered an autosave"""
+        turns = self._turns.get(save_name, 0) + 1
+        last = self._last_snapshot.setdefault(save_name, time.monotonic())
+        if turns < self.every_commands and time.monotonic() - last < self.every_seconds:
+            self._turns[save_name] = turns
+            return False
+        self.request(state, save_name)
+        return True
+
+    def request(self, state, save_name: str = AUTOSAVE_NAME):
+        """Snapshot state now and queue it for writing"""
+        snapshot = self.save_system.snapshot_game(state, save_name)
+        self._turns[save_name] = 0
+        self._last_snapshot[save_name] = time.monotonic()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Autosave service is closed")
+            if save_name in self._pending:
+                self.snapshots_coalesced += 1
+            self._pending[save_name] = snapshot
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                save_name = next(iter(self._pending))
+                snapshot = self._pending.pop(save_name)
+                self._writing = True
+            try:
+                result = self.save_system.write_snapshot(snapshot)
+            except Exception as e:
+                result = {"success": False, "error": f"Gagal menyimpan otomatis: {str(e)}"}
+            if result["success"] and self.max_slots is not None:
+                # Still counts as writing, so flush() also waits for the pruning
+                self.prune_slots(self.max_slots, keep=save_name)
+            with self._condition:
+                self._writing = False
+                self.last_results[save_name] = result
+                if result["success"]:
+                    self.saves_written += 1
+                self._condition.notify_all()
+
+    def prune_slots(self, max_slots: int, keep: Optional[str] = None) -> List[str]:
+        """Delete the oldest session slots beyond max_slots; returns their names"""
+        slots = [f["save_name"] for f in self.save_system.get_save_files()
+                 if f["save_name"].startswith(SESSION_SLOT_PREFIX)]
+        removed = []
+        # Newest first; a slot with a snapshot waiting is about to be written again
+        for save_name in slots[max_slots:]:
+            with self._condition:
+                if save_name == keep or save_name in self._pending:
+                    continue
+                self._turns.pop(save_name, None)
+                self._last_snapshot.pop(save_name, None)
+                self.last_results.pop(save_name, None)
+            if self.save_system.delete_save(save_name)["success"]:
+                removed.append(save_name)
+        return removed
+
+    def discard(self, save_name: str = AUTOSAVE_NAME) -> bool:
+        """Drop a slot's queued snapshot and delete its save, e.g. when a session ends"""
+        with self._condition:
+            self._pending.pop(save_name, None)
+            self._turns.pop(save_name, None)
+            self._last_snapshot.pop(save_name, None)
+            self.last_results.pop(save_name, None)
+            # A write already in progress must finish before the file can go
+            self._condition.wait_for(lambda: not self._writing)
+        return self.save_system.delete_save(save_name)["success"]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued snapshot is written; False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Write what is queued and stop the worker"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
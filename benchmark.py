@@ -0,0 +1,284 @@
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from game_state import GameState, Item, Location, Quest, CombatStats, LOCATION_CODEC, get_world_template, _location_from_record
+from ring_buffer import RingBuffer
+from combat_system import CombatSystem, Monster, get_monster_definitions
+from save_load_system import SaveLoadSystem
+
+def _traced_bytes_per(count: int, build) -> float:
+    """Average traced allocation of the objects build(i) returns (kept alive while measuring)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(i) for i in range(count)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+def _explored_session(i: int) -> GameState:
+    """A session after a few typical turns"""
+    state = GameState()
+    state.add_action("lihat")
+    state.take_item_from_location("ranting")
+    state.travel_to("kastil")
+    state.take_item_from_location("gold_coin")
+    state.start_quest("quest_1")
+    return state
+
+def _instance_bytes(obj) -> int:
+    """Shallow size of an instance including its __dict__, if it has one"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+def _encounter(i: int) -> CombatSystem:
+    """A session's combat system in a fight"""
+    combat = CombatSystem()
+    combat.start_combat(CombatStats(100, 100, 10, 5, 8), "goblin")
+    return combat
+
+def run_memory_benchmark(sessions: int = 2000, locations: int = 5000) -> dict:
+    """Bytes per hosted session and per world location"""
+    # Warm the shared template, registry and caches so they are not counted per session
+    get_world_template()
+    _explored_session(0)
+    _encounter(0)
+
+    record = {
+        "name": "Ruang Uji",
+        "description": "Ruangan untuk benchmark.",
+        "connections": ["hutan", "gua"],
+        "items": ["ranting", "batu"]
+    }
+    return {
+        "new_session": _traced_bytes_per(sessions, lambda i: GameState()),
+        "explored_session": _traced_bytes_per(sessions, _explored_session),
+        "template_location": _traced_bytes_per(locations, lambda i: _location_from_record(f"room_{i}", record)),
+        "combat_encounter": _traced_bytes_per(sessions, _encounter),
+        "monster_instance": _instance_bytes(Monster(get_monster_definitions()["goblin"])),
+        "location_instance": _instance_bytes(Location("x", "y")),
+        "quest_instance": _instance_bytes(Quest("x", "y")),
+        "combat_stats_instance": _instance_bytes(CombatStats(100, 100, 10, 5, 8)),
+        "game_state_instance": _instance_bytes(GameState())
+    }
+
+def _slice_trim(appends: int, limit: int):
+    """The old pattern: append, then copy the last `limit` entries into a new list"""
+    history = []
+    for i in range(appends):
+        history.append(i)
+        if len(history) > limit:
+            history = history[-limit:]
+
+def _ring_append(appends: int, limit: int):
+    history = RingBuffer(maxlen=limit)
+    for i in range(appends):
+        history.append(i)
+
+def _traced_peak_and_time(run, appends: int, limit: int) -> tuple:
+    tracemalloc.start()
+    run(appends, limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Steady-state cost of one append, measured untraced
+    start = time.perf_counter()
+    run(appends, limit)
+    return peak, (time.perf_counter() - start) / appends
+
+def run_history_benchmark(appends: int = 200000, limit: int = 100) -> dict:
+    """Append cost of a warm bounded history: list slicing vs RingBuffer"""
+    slice_peak, slice_time = _traced_peak_and_time(_slice_trim, appends, limit)
+    ring_peak, ring_time = _traced_peak_and_time(_ring_append, appends, limit)
+    return {
+        "slice_bytes_copied_per_append": sys.getsizeof(list(range(limit))),
+        "slice_peak_bytes": slice_peak,
+        "slice_ns_per_append": slice_time * 1e9,
+        "ring_bytes_copied_per_append": 0,
+        "ring_peak_bytes": ring_peak,
+        "ring_ns_per_append": ring_time * 1e9
+    }
+
+def _xor_bytewise(data: bytes, key_bytes: bytes) -> bytes:
+    """The previous per-byte XOR loop, kept as the baseline"""
+    encrypted = bytearray()
+    for i, byte in enumerate(data):
+        encrypted.append(byte ^ key_bytes[i % len(key_bytes)])
+    return bytes(encrypted)
+
+def run_cipher_benchmark(sizes=(10_000, 100_000, 1_000_000, 10_000_000), directory: str = None) -> list:
+    """Save XOR throughput (MB/s) per payload size: per-byte loop vs bulk"""
+    system = SaveLoadSystem(directory or tempfile.mkdtemp())
+    key_bytes = system.encryption_key.encode("utf-8")
+    results = []
+    for size in sizes:
+        data = os.urandom(size)
+        start = time.perf_counter()
+        expected = _xor_bytewise(data, key_bytes)
+        loop_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        bulk = system._xor_with_key(data)
+        bulk_seconds = time.perf_counter() - start
+        if bulk != expected:
+            raise AssertionError(f"Bulk XOR differs from the per-byte loop at {size} bytes")
+        results.append({
+            "size": size,
+            "loop_mb_per_s": size / loop_seconds / 1e6,
+            "bulk_mb_per_s": size / bulk_seconds / 1e6
+        })
+    return results
+
+def _item_fields(item) -> dict:
+    """An item written in full, as saves of schema 2 did"""
+    return {
+        "name": item.name, "description": item.description, "weight": item.weight, "value": item.value,
+        "usable": item.usable, "consumable": item.consumable, "item_type": item.item_type,
+        "stats": dict(item.stats), "durability": item.durability, "max_durability": item.max_durability,
+        "rarity": item.rarity, "special_effects": list(item.special_effects), "quantity": item.quantity
+    }
+
+def _schema2_save(state: GameState) -> dict:
+    """The previous hand-written save serializer, kept as the baseline"""
+    data = state._player_section()
+    data["inventory"] = [_item_fields(item) for item in state.inventory]
+    data.update(state._crafting_section())
+    data["combat_stats"] = state._combat_stats_section()
+    data["quests"] = [
+        {"title": quest.title, "description": quest.description, "requirements": dict(quest.requirements),
+         "rewards": [_item_fields(reward) for reward in quest.rewards], "completed": quest.completed,
+         "started": quest.started, "quest_id": quest.quest_id}
+        for quest in state.quests
+    ]
+    data["completed_quests"] = list(state.completed_quests)
+    data["conversation_history"] = list(state.conversation_history)
+    data["player_actions"] = list(state.player_actions)
+    data["locations"] = {
+        name: dict(LOCATION_CODEC.encode_full(location), items=[_item_fields(item) for item in location.items])
+        for name, location in state.locations.materialized().items()
+    }
+    return data
+
+def _played_session() -> GameState:
+    """A session that has visited and emptied every location"""
+    state = GameState()
+    for name in list(state.locations):
+        state.travel_to(name)
+        state.locations[name].visited = True
+        while state.locations[name].items:
+            state.take_item_from_location(state.locations[name].items[0].name)
+        state.add_action(f"pergi ke {name}")
+    state.start_quest("quest_1")
+    return state
+
+def _best_us(run, number: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+def run_serialization_benchmark(number: int = 300) -> dict:
+    """Encode/decode time (us) and JSON size of a played session: schema 2 baseline vs the codecs"""
+    state = _played_session()
+    target = GameState()
+    full = state.save_game_state()
+    compact = state.save_game_state(compact=True)
+    return {
+        "schema2_encode_us": _best_us(lambda: _schema2_save(state), number),
+        "full_encode_us": _best_us(state.save_game_state, number),
+        "full_decode_us": _best_us(lambda: target.load_game_state(full), number),
+        "compact_encode_us": _best_us(lambda: state.save_game_state(compact=True), number),
+        "compact_decode_us": _best_us(lambda: target.load_game_state(compact, compact=True), number),
+        "schema2_bytes": len(json.dumps(_schema2_save(state), ensure_ascii=False, separators=(",", ":"))),
+        "full_bytes": len(json.dumps(full, ensure_ascii=False, separators=(",", ":"))),
+        "compact_bytes": len(json.dumps(compact, ensure_ascii=False, separators=(",", ":")))
+    }
+
+def _large_world(locations: int) -> GameState:
+    """A world far past the built-in locations, each with its own items"""
+    state = GameState()
+    for i in range(locations):
+        state.locations[f"ruang_{i}"] = Location(
+            f"Ruang {i}", f"Ruangan ke-{i} di dunia yang luas. " * 8, connections=("hutan",),
+            items=[Item(f"Benda {i}-{j}", f"Benda nomor {j} dari ruang {i}", 1.0, j) for j in range(8)]
+        )
+    return state
+
+def run_load_memory_benchmark(locations: int = 3000, directory: str = None) -> dict:
+    """Traced peak and retained bytes of loading a large world's save, plus its file size"""
+    system = SaveLoadSystem(directory or tempfile.mkdtemp())
+    result = system.save_game(_large_world(locations), "dunia_besar")
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    
+    def load():
+        state = system.load_game("dunia_besar")["game_state"]
+        for name in list(state.locations):
+            state.locations[name]
+        return state
+    
+    # Once first, so registered item definitions are not counted
+    load()
+    start = time.perf_counter()
+    load()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    _ = load()  # kept alive so the retained bytes include the loaded state
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "file_bytes": os.path.getsize(result["file_path"]),
+        "peak_bytes": peak - before,
+        "retained_bytes": retained - before,
+        "load_ms": seconds * 1000
+    }
+
+if __name__ == "__main__":
+    results = run_memory_benchmark()
+    print("📊 Memory benchmark (bytes)")
+    print(f"- Session baru:            {results['new_session']:.0f} per sesi")
+    print(f"- Sesi setelah beberapa turn: {results['explored_session']:.0f} per sesi")
+    print(f"- Lokasi template:         {results['template_location']:.0f} per lokasi")
+    print(f"- Pertarungan (CombatSystem + monster): {results['combat_encounter']:.0f} per sesi")
+    print(f"- Location instance:       {results['location_instance']}")
+    print(f"- Quest instance:          {results['quest_instance']}")
+    print(f"- CombatStats instance:    {results['combat_stats_instance']}")
+    print(f"- Monster instance:        {results['monster_instance']}")
+    print(f"- GameState instance:      {results['game_state_instance']}")
+    
+    history = run_history_benchmark()
+    print("\n📜 History append (warm, limit 100)")
+    print(f"- list + slice: {history['slice_ns_per_append']:.0f} ns/append, "
+          f"{history['slice_bytes_copied_per_append']} bytes baru per append, peak {history['slice_peak_bytes']} bytes")
+    print(f"- RingBuffer:   {history['ring_ns_per_append']:.0f} ns/append, "
+          f"{history['ring_bytes_copied_per_append']} bytes baru per append, peak {history['ring_peak_bytes']} bytes")
+    
+    print("\n🔐 Save XOR (MB/s)")
+    for row in run_cipher_benchmark():
+        print(f"- {row['size'] / 1000:>8.0f} KB: loop {row['loop_mb_per_s']:.1f}, bulk {row['bulk_mb_per_s']:.1f} "
+              f"({row['bulk_mb_per_s'] / row['loop_mb_per_s']:.0f}x)")
+    
+    codecs = run_serialization_benchmark()
+    print("\n💾 Serialisasi state (sesi yang sudah menjelajah)")
+    print(f"- Skema 2 (tulis tangan): tulis {codecs['schema2_encode_us']:.0f} us, {codecs['schema2_bytes']} bytes")
+    print(f"- Codec, bentuk penuh:    tulis {codecs['full_encode_us']:.0f} us, baca {codecs['full_decode_us']:.0f} us, "
+          f"{codecs['full_bytes']} bytes")
+    print(f"- Codec, bentuk ringkas:  tulis {codecs['compact_encode_us']:.0f} us, baca {codecs['compact_decode_us']:.0f} us, "
+          f"{codecs['compact_bytes']} bytes")
+    
+    loading = run_load_memory_benchmark()
+    print("\n🗺️  Memuat dunia besar (3000 lokasi, semua dikunjungi)")
+    print(f"- File save: {loading['file_bytes'] / 1e6:.1f} MB, waktu {loading['load_ms']:.0f} ms")
+    print(f"- Memori puncak: {loading['peak_bytes'] / 1e6:.1f} MB, state akhir: {loading['retained_bytes'] / 1e6:.1f} MB")
@@ -1,7 +1,9 @@
 import random
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from types import MappingProxyType
+from typing import List, Dict, Optional, Mapping, Tuple
 from enum import Enum
+from content_pack import get_default_pack
 
 class CombatState(Enum):
     IDLE = "idle"
@@ -10,8 +12,9 @@ class CombatState(Enum):
     DEFEAT = "defeat"
     ESCAPED = "escaped"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CombatStats:
+    """A monster's base stats; an encounter tracks the health it has left"""
     health: int
     max_health: int
     attack: int
@@ -20,148 +23,138 @@ class CombatStats:
     critical_chance: float = 0.1
     dodge_chance: float = 0.05
 
-@dataclass
-class Monster:
+@dataclass(frozen=True, eq=False, slots=True)
+class MonsterDefinition:
+    """Shared, immutable description of a monster type"""
+    monster_id: str
     name: str
     description: str
     stats: CombatStats
     level: int
     experience_reward: int
     gold_reward: int
-    item_drops: List[str]
-    special_abilities: List[str]
+    item_drops: Tuple[str, ...]
+    special_abilities: Tuple[str, ...]
     weakness: Optional[str] = None
     resistance: Optional[str] = None
 
-@dataclass
+def _shared(attribute: str) -> property:
+    """Read-only attribute delegated to the monster's definition"""
+    return property(lambda self: getattr(self.definition, attribute))
+
+class Monster:
+    """A monster in one encounter: shared definition plus the health it has left"""
+    __slots__ = ("definition", "health")
+    
+    monster_id = _shared("monster_id")
+    name = _shared("name")
+    description = _shared("description")
+    stats = _shared("stats")
+    level = _shared("level")
+    experience_reward = _shared("experience_reward")
+    gold_reward = _shared("gold_reward")
+    item_drops = _shared("item_drops")
+    special_abilities = _shared("special_abilities")
+    weakness = _shared("weakness")
+    resistance = _shared("resistance")
+    
+    def __init__(self, definition: MonsterDefinition):
+        self.definition = definition
+        self.health = definition.stats.health
+    
+    def __repr__(self) -> str:
+        return f"Monster({self.monster_id!r}, health={self.health})"
+
+@dataclass(frozen=True, slots=True)
 class CombatAction:
+    """Shared action definition; cooldowns are tracked per encounter"""
     name: str
     description: str
     damage: int
     accuracy: float
     cooldown: int = 0
-    current_cooldown: int = 0
     special_effect: Optional[str] = None
 
+_monster_definitions: Optional[Mapping[str, MonsterDefinition]] = None
+
+def get_monster_definitions() -> Mapping[str, MonsterDefinition]:
+    """Monster definitions from the content pack, loaded once per process and shared by every encounter"""
+    global _monster_definitions
+    if _monster_definitions is None:
+        monsters = {}
+        for monster_id, record in get_default_pack().section("monsters").records():
+            stats = CombatStats(**record.pop("stats"))
+            monsters[monster_id] = MonsterDefinition(
+                monster_id=monster_id,
+                stats=stats,
+                item_drops=tuple(record.pop("item_drops")),
+                special_abilities=tuple(record.pop("special_abilities")),
+                **record
+            )
+        _monster_definitions = MappingProxyType(monsters)
+    return _monster_definitions
+
+COMBAT_ACTIONS: Mapping[str, CombatAction] = MappingProxyType({
+    "attack": CombatAction(
+        name="Attack",
+        description="Serangan dasar dengan senjata",
+        damage=10,
+        accuracy=0.85
+    ),
+    "strong_attack": CombatAction(
+        name="Strong Attack",
+        description="Serangan kuat dengan akurasi rendah",
+        damage=20,
+        accuracy=0.65,
+        cooldown=2
+    ),
+    "defend": CombatAction(
+        name="Defend",
+        description="Bertahan untuk mengurangi kerusakan",
+        damage=0,
+        accuracy=1.0,
+        special_effect="defense_boost"
+    ),
+    "fireball": CombatAction(
+        name="Fireball",
+        description="Melempar bola api",
+        damage=25,
+        accuracy=0.75,
+        cooldown=3
+    ),
+    "heal": CombatAction(
+        name="Heal",
+        description="Menyembuhkan diri sendiri",
+        damage=-20,
+        accuracy=1.0,
+        cooldown=4
+    ),
+    "critical_strike": CombatAction(
+        name="Critical Strike",
+        description="Serangan dengan peluang critical tinggi",
+        damage=15,
+        accuracy=0.70,
+        cooldown=3,
+        special_effect="high_critical"
+    )
+})
+
 class CombatSystem:
+    """One player's fights. Monster and action definitions are shared by
+    every CombatSystem; an encounter only allocates its Monster instance
+    and the cooldowns of the actions used in it.
+    """
+    
     def __init__(self):
         self.combat_state = CombatState.IDLE
         self.player_stats = None
-        self.enemy = None
+        self.enemy: Optional[Monster] = None
+        self.cooldowns: Dict[str, int] = {}  # action -> turns left, only actions cooling down
         self.turn_count = 0
         self.combat_log = []
         
-        # Initialize monsters
-        self.monsters = self._initialize_monsters()
-        self.combat_actions = self._initialize_combat_actions()
-    
-    def _initialize_monsters(self) -> Dict[str, Monster]:
-        """Initialize all monsters in the game"""
-        return {
-            "goblin": Monster(
-                name="Goblin",
-                description="Goblin kecil yang licik dengan senjata tajam",
-                stats=CombatStats(health=30, max_health=30, attack=8, defense=3, speed=12),
-                level=1,
-                experience_reward=15,
-                gold_reward=10,
-                item_drops=["dagger", "leather_armor"],
-                special_abilities=["stealth_attack"],
-                weakness="fire"
-            ),
-            "orc": Monster(
-                name="Orc",
-                description="Orc besar dan kuat dengan kapak perang",
-                stats=CombatStats(health=60, max_health=60, attack=15, defense=8, speed=6),
-                level=3,
-                experience_reward=35,
-                gold_reward=25,
-                item_drops=["battle_axe", "chain_mail"],
-                special_abilities=["berserker_rage"],
-                weakness="lightning"
-            ),
-            "dragon": Monster(
-                name="Dragon",
-                description="Naga merah yang mengerikan dengan nafas api",
-                stats=CombatStats(health=200, max_health=200, attack=25, defense=15, speed=10, critical_chance=0.2),
-                level=10,
-                experience_reward=200,
-                gold_reward=150,
-                item_drops=["dragon_scale", "fire_sword"],
-                special_abilities=["fire_breath", "wing_buffet"],
-                weakness="ice",
-                resistance="fire"
-            ),
-            "skeleton": Monster(
-                name="Skeleton Warrior",
-                description="Tentara tulang yang bangkit dari kubur",
-                stats=CombatStats(health=40, max_health=40, attack=12, defense=5, speed=8),
-                level=2,
-                experience_reward=25,
-                gold_reward=15,
-                item_drops=["bone_sword", "skeleton_key"],
-                special_abilities=["bone_shield"],
-                weakness="holy"
-            ),
-            "troll": Monster(
-                name="Troll",
-                description="Troll besar dengan regenerasi yang cepat",
-                stats=CombatStats(health=80, max_health=80, attack=18, defense=12, speed=4),
-                level=5,
-                experience_reward=50,
-                gold_reward=40,
-                item_drops=["troll_club", "regeneration_potion"],
-                special_abilities=["regeneration"],
-                weakness="fire"
-            )
-        }
-    
-    def _initialize_combat_actions(self) -> Dict[str, CombatAction]:
-        """Initialize all combat actions"""
-        return {
-            "attack": CombatAction(
-                name="Attack",
-                description="Serangan dasar dengan senjata",
-                damage=10,
-                accuracy=0.85
-            ),
-            "strong_attack": CombatAction(
-                name="Strong Attack",
-                description="Serangan kuat dengan akurasi rendah",
-                damage=20,
-                accuracy=0.65,
-                cooldown=2
-            ),
-            "defend": CombatAction(
-                name="Defend",
-                description="Bertahan untuk mengurangi kerusakan",
-                damage=0,
-                accuracy=1.0,
-                special_effect="defense_boost"
-            ),
-            "fireball": CombatAction(
-                name="Fireball",
-                description="Melempar bola api",
-                damage=25,
-                accuracy=0.75,
-                cooldown=3
-            ),
-            "heal": CombatAction(
-                name="Heal",
-                description="Menyembuhkan diri sendiri",
-                damage=-20,
-                accuracy=1.0,
-                cooldown=4
-            ),
-            "critical_strike": CombatAction(
-                name="Critical Strike",
-                description="Serangan dengan peluang critical tinggi",
-                damage=15,
-                accuracy=0.70,
-                cooldown=3,
-                special_effect="high_critical"
-            )
-        }
+        self.monsters = get_monster_definitions()
+        self.combat_actions = COMBAT_ACTIONS
     
     def start_combat(self, player_stats: CombatStats, enemy_name: str) -> Dict:
         """Start a combat encounter"""
@@ -169,14 +162,12 @@ class CombatSystem:
             return {"success": False, "error": f"Monster '{enemy_name}' tidak ditemukan"}
         
         self.player_stats = player_stats
-        self.enemy = self.monsters[enemy_name]
+        # A fresh instance, so the shared definition never takes damage
+        self.enemy = Monster(self.monsters[enemy_name])
         self.combat_state = CombatState.IN_COMBAT
         self.turn_count = 0
         self.combat_log = []
-        
-        # Reset cooldowns
-        for action in self.combat_actions.values():
-            action.current_cooldown = 0
+        self.cooldowns = {}
         
         self.combat_log.append(f"🎯 Pertarungan dimulai! Anda melawan {self.enemy.name}!")
         
@@ -191,7 +182,7 @@ class CombatSystem:
         """Get list of available combat actions"""
         available = []
         for action_name, action in self.combat_actions.items():
-            if action.current_cooldown <= 0:
+            if action_name not in self.cooldowns:
                 available.append({
                     "name": action_name,
                     "display_name": action.name,
@@ -211,14 +202,14 @@ class CombatSystem:
         
         action = self.combat_actions[action_name]
         
-        if action.current_cooldown > 0:
-            return {"success": False, "error": f"{action.name} masih dalam cooldown ({action.current_cooldown} turn)"}
+        if action_name in self.cooldowns:
+            return {"success": False, "error": f"{action.name} masih dalam cooldown ({self.cooldowns[action_name]} turn)"}
         
         # Execute player action
-        result = self._execute_player_action(action)
+        result = self._execute_player_action(action_name, action)
         
         # Check if combat is over
-        if self.enemy.stats.health <= 0:
+        if self.enemy.health <= 0:
             return self._end_combat_victory()
         
         # Enemy turn
@@ -238,10 +229,10 @@ class CombatSystem:
             "combat_log": self.combat_log,
             "available_actions": self._get_available_actions(),
             "player_health": self.player_stats.health,
-            "enemy_health": self.enemy.stats.health
+            "enemy_health": self.enemy.health
         }
     
-    def _execute_player_action(self, action: CombatAction) -> Dict:
+    def _execute_player_action(self, action_name: str, action: CombatAction) -> Dict:
         """Execute player's combat action"""
         # Check accuracy
         if random.random() > action.accuracy:
@@ -266,11 +257,12 @@ class CombatSystem:
             self.player_stats.health = min(self.player_stats.max_health, self.player_stats.health + heal_amount)
             self.combat_log.append(f"💚 Anda menyembuhkan {heal_amount} HP!")
         else:
-            self.enemy.stats.health -= final_damage
+            self.enemy.health -= final_damage
             self.combat_log.append(f"⚔️ {action.name} menyerang {self.enemy.name} untuk {final_damage} kerusakan!")
         
         # Set cooldown
-        action.current_cooldown = action.cooldown
+        if action.cooldown > 0:
+            self.cooldowns[action_name] = action.cooldown
         
         return {
             "type": "attack" if action.damage >= 0 else "heal",
@@ -282,7 +274,7 @@ class CombatSystem:
         """Execute enemy's turn"""
         # Simple AI: choose random action
         actions = ["attack", "strong_attack"]
-        if self.enemy.stats.health < self.enemy.stats.max_health * 0.3:  # Low health
+        if self.enemy.health < self.enemy.stats.max_health * 0.3:  # Low health
             actions.append("defend")
         
         enemy_action = random.choice(actions)
@@ -311,10 +303,12 @@ class CombatSystem:
         }
     
     def _update_cooldowns(self):
-        """Update cooldowns for all actions"""
-        for action in self.combat_actions.values():
-            if action.current_cooldown > 0:
-                action.current_cooldown -= 1
+        """Count down the cooldowns of this encounter's actions"""
+        for action_name, turns in list(self.cooldowns.items()):
+            if turns > 1:
+                self.cooldowns[action_name] = turns - 1
+            else:
+                del self.cooldowns[action_name]
     
     def _end_combat_victory(self) -> Dict:
         """End combat with victory"""
@@ -334,7 +328,7 @@ class CombatSystem:
             "rewards": {
                 "gold": self.enemy.gold_reward,
                 "experience": self.enemy.experience_reward,
-                "items": self.enemy.item_drops if random.random() < 0.7 else []
+                "items": list(self.enemy.item_drops) if random.random() < 0.7 else []
             }
         }
     
@@ -395,7 +389,7 @@ class CombatSystem:
             "state": self.combat_state.value,
             "enemy": self.enemy,
             "player_health": self.player_stats.health,
-            "enemy_health": self.enemy.stats.health,
+            "enemy_health": self.enemy.health,
             "turn_count": self.turn_count,
             "available_actions": self._get_available_actions(),
             "combat_log": self.combat_log[-5:]  # Last 5 entries
@@ -0,0 +1,181 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from collections.abc import Mapping
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+PACK_MAGIC = b"GCPK"
+PACK_VERSION = 1
+# magic, version, section table offset, section table length
+_HEADER = struct.Struct("<4sHII")
+
+DEFAULT_CONTENT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "world.json")
+
+class PackSection(Mapping):
+    """Lazily decoded section of a content pack.
+
+    Only the key index is read when the section is opened; each record is
+    decoded (and passed through the factory, if any) the first time it is
+    requested and then cached.
+    """
+
+    def __init__(self, pack: "ContentPack", name: str, index: Dict[str, List[int]],
+                 factory: Optional[Callable[[str, Dict], Any]] = None):
+        self._pack = pack
+        self.name = name
+        self._index = index
+        self._factory = factory
+        self._cache: Dict[str, Any] = {}
+
+    def record(self, key: str) -> Dict:
+        """Decode the raw record for a key (not cached, safe to mutate)"""
+        offset, length = self._index[key]
+        return self._pack._decode(offset, length)
+
+    def records(self) -> Iterator[Tuple[str, Dict]]:
+        """Decode every raw record in index order"""
+        for key in self._index:
+            yield key, self.record(key)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._cache.get(key)
+        if value is None:
+            record = self.record(key)
+            value = self._factory(key, record) if self._factory else record
+            self._cache[key] = value
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def decoded_count(self) -> int:
+        """Number of records decoded so far"""
+        return len(self._cache)
+
+class ContentPack:
+    """Read-only view over a compiled content pack.
+
+    Layout: fixed header, records (compact JSON), one key index per section,
+    then a small section table. Opening a pack reads only the header and
+    section table; section indexes and records are decoded on demand.
+    """
+
+    def __init__(self, data, source: str = "<memory>"):
+        self._data = data
+        self.source = source
+        magic, version, table_offset, table_length = _HEADER.unpack_from(data, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{source} is not a content pack")
+        if version != PACK_VERSION:
+            raise ValueError(f"Content pack version {version} tidak didukung")
+        self._sections: Dict[str, List[int]] = self._decode(table_offset, table_length)
+        self._opened: Dict[str, PackSection] = {}
+
+    @classmethod
+    def open(cls, path: str) -> "ContentPack":
+        """Memory-map a compiled pack file"""
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data, path)
+
+    def _decode(self, offset: int, length: int) -> Any:
+        return json.loads(bytes(self._data[offset:offset + length]))
+
+    def section_names(self) -> List[str]:
+        return list(self._sections)
+
+    def has_section(self, name: str) -> bool:
+        return name in self._sections
+
+    def section(self, name: str, factory: Optional[Callable[[str, Dict], Any]] = None) -> PackSection:
+        """Open a section; the first call fixes its factory"""
+        section = self._opened.get(name)
+        if section is None:
+            if name in self._sections:
+                index = self._decode(*self._sections[name])
+            else:
+                index = {}
+            section = self._opened[name] = PackSection(self, name, index, factory)
+        return section
+
+def read_content_source(source_path: str) -> Dict[str, Dict[str, Dict]]:
+    """Read a JSON or TOML content source: {section: {key: record}}"""
+    if source_path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML content needs Python 3.11+ (tomllib)")
+        with open(source_path, "rb") as f:
+            return tomllib.load(f)
+    with open(source_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def build_content_pack(content: Dict[str, Dict[str, Dict]]) -> bytes:
+    """Compile content into pack bytes"""
+    chunks: List[bytes] = []
+    position = _HEADER.size
+
+    def write(value) -> List[int]:
+        nonlocal position
+        encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        chunks.append(encoded)
+        entry = [position, len(encoded)]
+        position += len(encoded)
+        return entry
+
+    section_table = {}
+    for section_name, records in content.items():
+        index = {key: write(record) for key, record in records.items()}
+        section_table[section_name] = write(index)
+    table_offset, table_length = write(section_table)
+
+    header = _HEADER.pack(PACK_MAGIC, PACK_VERSION, table_offset, table_length)
+    return header + b"".join(chunks)
+
+def compile_content_pack(source_path: str, pack_path: Optional[str] = None) -> str:
+    """Compile a content source file to a pack file next to it"""
+    pack_path = pack_path or os.path.splitext(source_path)[0] + ".pack"
+    data = build_content_pack(read_content_source(source_path))
+    temp_path = f"{pack_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, pack_path)
+    return pack_path
+
+def load_content_pack(source_path: str = DEFAULT_CONTENT_SOURCE) -> ContentPack:
+    """Open the compiled pack for a source, recompiling it when stale"""
+    pack_path = os.path.splitext(source_path)[0] + ".pack"
+    stale = (not os.path.exists(pack_path)
+             or os.path.getmtime(pack_path) < os.path.getmtime(source_path))
+    if stale:
+        try:
+            compile_content_pack(source_path, pack_path)
+        except OSError:
+            # Read-only install: compile in memory instead
+            return ContentPack(build_content_pack(read_content_source(source_path)), source_path)
+    return ContentPack.open(pack_path)
+
+_default_pack: Optional[ContentPack] = None
+
+def get_default_pack() -> ContentPack:
+    """The game's built-in content pack, opened once per process"""
+    global _default_pack
+    if _default_pack is None:
+        _default_pack = load_content_pack(DEFAULT_CONTENT_SOURCE)
+    return _default_pack
+
+if __name__ == "__main__":
+    import sys
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CONTENT_SOURCE
+    output = compile_content_pack(source, sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"✅ Content pack compiled: {output} ({os.path.getsize(output)} bytes)")
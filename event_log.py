@@ -0,0 +1,167 @@
+import json
+import os
+import time
+from typing import Dict, Set, Tuple
+from game_state import GameState, Item, ItemTable
+
+# Version 2: the state in the compact form, so locations still deferred from
+# a loaded save are written from their saved data without being decoded
+SNAPSHOT_FORMAT_VERSION = 2
+DEFAULT_SNAPSHOT_INTERVAL = 500
+# Events that replace the whole state are stored as a snapshot instead
+_SNAPSHOT_EVENTS = {"load", "delta"}
+
+class EventLog:
+    """Append-only event log with periodic snapshots for a GameState.
+
+    The log is JSON lines next to a snapshot file (`<path>.snapshot`):
+
+        [seq, code, args]            one mutation (kwargs appended if any)
+        ["def", item_id, definition] item definition, written before first use
+
+    A state is rebuilt by loading the snapshot and replaying the events
+    after its sequence number. Writing a snapshot truncates the log.
+    """
+
+    def __init__(self, path: str, state: GameState, seq: int = 0,
+                 snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL, sync: bool = False):
+        self.path = path
+        self.snapshot_path = f"{path}.snapshot"
+        self.state = state
+        self.seq = seq
+        self.snapshot_interval = snapshot_interval
+        self.sync = sync
+        self._events_since_snapshot = 0
+        self._defined_items: Set[str] = set()
+        self._file = open(path, "a", encoding="utf-8")
+        state.set_event_sink(self._record)
+
+    @classmethod
+    def open(cls, path: str, snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL, sync: bool = False) -> "EventLog":
+        """Recover the state recorded at path (or start a new one) and keep logging to it"""
+        state, seq = restore_state(path)
+        log = cls(path, state, seq, snapshot_interval, sync)
+        # Replayed events may reference definitions written before the restart
+        log.snapshot()
+        return log
+
+    def _record(self, code: str, args: tuple, kwargs: Dict):
+        if code in _SNAPSHOT_EVENTS:
+            self.snapshot()
+            return
+        self.seq += 1
+        record = [self.seq, code, [self._encode(arg) for arg in args]]
+        if kwargs:
+            record.append({name: self._encode(value) for name, value in kwargs.items()})
+        self._write(record)
+        self._events_since_snapshot += 1
+        if self._events_since_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def _encode(self, value):
+        if isinstance(value, Item):
+            if value.item_id not in self._defined_items:
+                self._write(["def", value.item_id, value.definition.to_dict()])
+                self._defined_items.add(value.item_id)
+            # The definition was written above as a "def" record
+            return {"$item": ItemTable().reference(value)}
+        return value
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def snapshot(self):
+        """Write the current state as a snapshot and start a fresh log"""
+        snapshot = {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "seq": self.seq,
+            "state": self.state.save_game_state(compact=True)
+        }
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # Events up to seq are in the snapshot; replay skips them if truncation is lost
+        self._file.close()
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._events_since_snapshot = 0
+        self._defined_items = set()
+
+    def attach(self, state: GameState):
+        """Log a different GameState from now on (e.g. after loading a save)"""
+        self.state.set_event_sink(None)
+        self.state = state
+        state.set_event_sink(self._record)
+        self.snapshot()
+
+    def close(self):
+        self.state.set_event_sink(None)
+        self._file.close()
+
+def restore_state(path: str) -> Tuple[GameState, int]:
+    """Rebuild the state recorded at path: snapshot plus replay. Returns (state, last seq)"""
+    state = GameState()
+    seq = 0
+    snapshot_path = f"{path}.snapshot"
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        state.load_game_state(snapshot["state"], compact=snapshot["format"] >= 2)
+        seq = snapshot["seq"]
+
+    if os.path.exists(path):
+        item_definitions: Dict[str, Dict] = {}
+        items = ItemTable(item_definitions)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final write from a crash: everything before it is intact
+                    break
+                if record[0] == "def":
+                    item_definitions[record[1]] = record[2]
+                    continue
+                if record[0] <= seq:
+                    continue
+                args = [_decode(arg, items) for arg in record[2]]
+                kwargs = {name: _decode(value, items)
+                          for name, value in (record[3] if len(record) > 3 else {}).items()}
+                state.replay_event(record[1], args, kwargs)
+                seq = record[0]
+    return state, seq
+
+def _decode(value, items: ItemTable):
+    if isinstance(value, dict) and "$item" in value:
+        return items.item(value["$item"])
+    return value
+
+def benchmark_replay(path: str, repeat: int = 3) -> Dict:
+    """Time deterministic replays of a recorded log"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        state, seq = restore_state(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    events = sum(1 for line in open(path, encoding="utf-8") if not line.startswith('["def"'))
+    return {
+        "events": events,
+        "seconds": best,
+        "events_per_second": events / best if best else 0.0,
+        "final_seq": seq
+    }
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python event_log.py <log_path>")
+        sys.exit(1)
+    result = benchmark_replay(sys.argv[1])
+    print(f"🔁 Replayed {result['events']} events in {result['seconds'] * 1000:.1f} ms "
+          f"({result['events_per_second']:.0f} events/s), seq {result['final_seq']}")
@@ -6,18 +6,32 @@ from rich.text import Text
 from rich import box
 import time
 import readline
-from game_state import GameState
+from game_state import GameState, StateTimeline
 from ai_integration import generate_description, generate_puzzle, generate_npc_dialogue, generate_contextual_response, generate_quest_description, generate_location_description
 from ai_learning_system import AILearningSystem
 from combat_system import CombatSystem
 from crafting_system import CraftingSystem
 from trading_system import TradingSystem
 from save_load_system import SaveLoadSystem
+from event_log import EventLog
+from autosave import AutosaveService
 
 class Game:
-    def __init__(self):
+    def __init__(self, event_log_path=None):
         self.console = Console()
         self.state = GameState()
+        
+        # Optional event log: every state change is appended, and the game resumes from it
+        self.event_log = None
+        if event_log_path:
+            self.event_log = EventLog.open(event_log_path)
+            if self.event_log.state.game_over:
+                self.event_log.attach(self.state)
+            self.state = self.event_log.state
+        
+        # Per-turn snapshots for undo/mundur
+        self.timeline = StateTimeline(self.state)
+        self.timeline.record()
         self.ai_learning = AILearningSystem()
         
         # Initialize new systems
@@ -25,6 +39,8 @@ class Game:
         self.crafting_system = CraftingSystem()
         self.trading_system = TradingSystem()
         self.save_load_system = SaveLoadSystem()
+        # Written in the background every few turns, loadable with `muat autosave`
+        self.autosave = AutosaveService(self.save_load_system)
         
         # Combat state
         self.in_combat = False
@@ -50,7 +66,7 @@ class Game:
         """Setup command autocomplete functionality"""
         # List of all available commands for autocomplete
         commands = [
-            "lihat", "status", "inventaris", "pergi ke", "ambil", "gunakan",
+            "lihat", "status", "inventaris", "pergi ke", "rute", "ambil", "gunakan", "undo", "mundur",
             "serang", "lari", "serangan", "status pertarungan",
             "crafting", "buat", "materials", "tools", "skills",
             "merchant", "beli", "jual", "tawar", "reputation",
@@ -230,9 +246,12 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
 - `lihat` - Melihat lokasi saat ini
 - `status` - Status pemain lengkap
 - `inventaris` - Inventaris dan crafting materials
-- `pergi ke [lokasi]` - Pindah ke lokasi lain
+- `pergi ke [lokasi]` - Pindah ke lokasi lain (lokasi jauh ditempuh lewat rute terpendek)
+- `rute [lokasi]` - Lihat rute ke lokasi, atau lokasi terdekat jika tanpa nama
 - `ambil [item]` - Ambil item dari lokasi
 - `gunakan [item]` - Gunakan item dari inventaris
+- `undo` - Batalkan turn terakhir
+- `mundur [n]` - Kembali ke n turn sebelumnya
 
 **⚔️ COMBAT SYSTEM:**
 - `serang [monster]` - Mulai pertarungan dengan monster
@@ -256,7 +275,7 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
 
 **💾 SAVE/LOAD SYSTEM:**
 - `simpan [nama]` - Simpan game
-- `muat [nama]` - Muat game
+- `muat [nama]` - Muat game (`muat autosave` untuk simpanan otomatis)
 - `daftar save` - Lihat daftar save files
 - `hapus save [nama]` - Hapus save file
 
@@ -324,6 +343,9 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
             
             # Basic commands
             elif cmd == "keluar":
+                # Close the log first so the next start resumes this adventure
+                if self.event_log:
+                    self.event_log.close()
                 self.state.game_over = True
                 response_text = "Anda meninggalkan petualangan. Sampai jumpa!"
                 self.console.print(Panel.fit(response_text, style="bold red", title="[bold yellow]Keluar[/bold yellow]"))
@@ -350,6 +372,12 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
             elif cmd.startswith("pergi ke"):
                 response_text = self.handle_movement(command)
             
+            elif cmd.startswith("rute"):
+                response_text = self.show_route(command)
+            
+            elif cmd == "undo" or cmd.startswith("mundur"):
+                response_text = self.handle_rewind(command)
+            
             elif cmd.startswith("ambil"):
                 response_text = self.handle_take_item(command)
             
@@ -464,6 +492,8 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
             
             # Record action for AI learning
             self.record_action_for_learning(command, success, response_type, response_text)
+            self.timeline.record()
+            self.autosave.note_turn(self.state)
             
             # Display response
             if response_text:
@@ -553,32 +583,36 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
     
     def show_status(self):
         """Show comprehensive player status"""
-        current_loc = self.state.get_current_location_info()
+        # Play time changes every second, so it is appended outside the cached view
+        status = self.state.cached_view("cli_status", Game._build_status_text)
+        return status + f"\n**Play Time:** {self.state.get_play_time() // 60} menit {self.state.get_play_time() % 60} detik"
+    
+    @staticmethod
+    def _build_status_text(state):
+        current_loc = state.get_current_location_info()
         
         status = f"""
 **Status Pemain:**
-- Nama: {self.state.player_name}
-- Health: {self.state.health}/{self.state.max_health}
-- Level: {self.state.level}
-- Experience: {self.state.experience}
-- Gold: {self.state.gold}
+- Nama: {state.player_name}
+- Health: {state.health}/{state.max_health}
+- Level: {state.level}
+- Experience: {state.experience}
+- Gold: {state.gold}
 - Lokasi: {current_loc.name}
 
 **Combat Stats:**
-- Attack: {self.state.combat_stats.attack}
-- Defense: {self.state.combat_stats.defense}
-- Speed: {self.state.combat_stats.speed}
-- Critical Chance: {self.state.combat_stats.critical_chance:.1%}
-- Dodge Chance: {self.state.combat_stats.dodge_chance:.1%}
+- Attack: {state.combat_stats.attack}
+- Defense: {state.combat_stats.defense}
+- Speed: {state.combat_stats.speed}
+- Critical Chance: {state.combat_stats.critical_chance:.1%}
+- Dodge Chance: {state.combat_stats.dodge_chance:.1%}
 
 **Crafting Skills:**
 """
         
-        for skill, level in self.state.crafting_skills.items():
+        for skill, level in state.crafting_skills.items():
             status += f"- {skill.capitalize()}: Level {level}\n"
         
-        status += f"\n**Play Time:** {self.state.get_play_time() // 60} menit {self.state.get_play_time() % 60} detik"
-        
         return status
     
     def show_inventory(self):
@@ -602,7 +636,8 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
                 stats_text = ""
                 if item.stats:
                     stats_text = f" ({', '.join([f'{k}: {v}' for k, v in item.stats.items()])})"
-                inventory_text += f"- {item.name}: {item.description}{stats_text} (Berat: {item.weight}, Nilai: {item.value})\n"
+                quantity_text = f" x{item.quantity}" if item.quantity > 1 else ""
+                inventory_text += f"- {item.name}{quantity_text}: {item.description}{stats_text} (Berat: {item.weight}, Nilai: {item.value})\n"
         
         # Show crafting materials
         if self.state.crafting_materials:
@@ -622,29 +657,65 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
                 # Auto-show location description
                 response += f"\n\n{self.describe_current_location()}"
                 return response
+            # Not adjacent: walk the shortest route there
+            route = self.state.travel_to(location)
+            if route:
+                response = f"Anda menempuh rute: {' → '.join(route)}"
+                response += f"\nAnda tiba di **{self.state.get_current_location_info().name}**"
+                response += f"\n\n{self.describe_current_location()}"
+                return response
             else:
                 available = ", ".join(self.state.get_available_locations())
                 return f"Tidak bisa pergi ke '{location}'. Lokasi yang tersedia: {available}"
         else:
             return "Format: pergi ke [nama_lokasi]"
     
+    def show_route(self, command):
+        """Show the route to a location, or what is reachable nearby"""
+        parts = command.split(" ", 1)
+        if len(parts) >= 2:
+            location = parts[1].strip()
+            route = self.state.find_route(location)
+            if route is None:
+                return f"Tidak ada rute ke '{location}'."
+            return f"Rute ke **{location}** ({len(route) - 1} langkah): {' → '.join(route)}"
+        
+        nearby = self.state.locations_within(3)
+        if not nearby:
+            return "Tidak ada lokasi yang bisa dicapai dari sini."
+        route_text = "**Lokasi dalam 3 langkah:**\n"
+        for name, moves in sorted(nearby.items(), key=lambda entry: entry[1]):
+            route_text += f"- {name}: {moves} langkah\n"
+        return route_text
+    
+    def handle_rewind(self, command):
+        """Undo the last turn, or go back several turns with 'mundur [n]'"""
+        if self.in_combat:
+            return "Tidak bisa mundur saat sedang bertarung!"
+        
+        parts = command.split()
+        turns = 1
+        if len(parts) > 1:
+            if not parts[1].isdigit():
+                return "Format: mundur [jumlah_turn]"
+            turns = int(parts[1])
+        
+        if not self.timeline:
+            return "Belum ada turn yang bisa dibatalkan."
+        if not self.timeline.rewind(turns):
+            return f"Hanya bisa mundur paling banyak {len(self.timeline)} turn."
+        return f"⏪ Kembali {turns} turn. Anda berada di {self.state.current_location}."
+    
     def handle_take_item(self, command):
         """Handle take item command"""
         parts = command.split(" ", 1)
         if len(parts) >= 2:
             item_name = parts[1].strip()
-            current_loc = self.state.get_current_location_info()
             
-            for item in current_loc.items:
-                if item.name.lower() == item_name.lower():
-                    self.state.add_item_to_inventory(item)
-                    current_loc.items.remove(item)
-                    
-                    # If it's a material, add to crafting materials
-                    if item.item_type == "material":
-                        self.state.add_crafting_material(item.name, 1)
-                    
-                    return f"Anda mengambil **{item.name}**: {item.description}"
+            # Materials are counted as crafting materials by the state
+            item = self.state.take_item_from_location(item_name)
+            if item:
+                return f"Anda mengambil **{item.name}**: {item.description}"
             
             return f"Item '{item_name}' tidak ditemukan di lokasi ini."
         else:
@@ -670,8 +741,9 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
                             return f"**Menggunakan {item.name}:**\nAnda sembuh {heal_amount} HP!"
                         elif "mana_restore" in item.stats:
                             mana_amount = item.stats["mana_restore"]
-                            self.state.combat_stats.mana = min(self.state.combat_stats.max_mana, 
-                                                             self.state.combat_stats.mana + mana_amount)
+                            self.state.update_combat_stats({
+                                "mana": min(self.state.combat_stats.max_mana, self.state.combat_stats.mana + mana_amount)
+                            })
                             return f"**Menggunakan {item.name}:**\nMana Anda pulih {mana_amount}!"
                     
                     # Generate AI response for other items
@@ -737,7 +809,7 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
             if result["success"]:
                 # Update player stats
                 if "player_health" in result:
-                    self.state.combat_stats.health = result["player_health"]
+                    self.state.update_combat_stats({"health": result["player_health"]})
                     self.state.health = result["player_health"]
                 
                 # Check if combat ended
@@ -823,12 +895,19 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
         if len(parts) >= 2:
             recipe_name = parts[1].strip()
             
+            materials = dict(self.state.crafting_materials)
             result = self.crafting_system.craft_item(
                 recipe_name, 
-                self.state.crafting_materials, 
+                materials, 
                 self.state.crafting_tools
             )
             
+            # Apply consumed materials through the state so inventory items follow
+            for material, quantity in list(self.state.crafting_materials.items()):
+                consumed = quantity - materials.get(material, 0)
+                if consumed > 0:
+                    self.state.remove_crafting_material(material, consumed)
+            
             if result["success"]:
                 # Add crafted item to inventory
                 crafted_item = result["crafted_item"]
@@ -1011,10 +1090,7 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
         parts = command.split(" ", 1)
         save_name = parts[1].strip() if len(parts) > 1 else f"save_{int(time.time())}"
         
-        # Get current game state
-        game_state_data = self.state.save_game_state()
-        
-        result = self.save_load_system.save_game(game_state_data, save_name)
+        result = self.save_load_system.save_game(self.state, save_name)
         
         if result["success"]:
             return f"💾 Game berhasil disimpan sebagai '{save_name}'"
@@ -1029,11 +1105,15 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
         
         save_name = parts[1].strip()
         
-        result = self.save_load_system.load_game(save_name)
+        # Loaded into the current state so the event log and undo timeline stay attached
+        result = self.save_load_system.load_game(save_name, self.state)
         
         if result["success"]:
-            # Load game state
-            self.state.load_game_state(result["game_state"])
+            if self.event_log:
+                self.event_log.snapshot()
+            # Turns before the load can't be undone
+            self.timeline = StateTimeline(self.state)
+            self.timeline.record()
             return f"📂 Game berhasil dimuat dari '{save_name}'"
         else:
             return result["error"]
@@ -1172,6 +1252,9 @@ Ketik 'tutorial' untuk memulai tutorial interaktif!
         
         self.console.print("\n[bold red]Game berakhir. Terima kasih telah bermain![/bold red]")
         
+        # Finish the autosave still being written
+        self.autosave.close()
+        
         # Save AI learning data
         try:
             self.ai_learning.save_data()
@@ -1,10 +1,23 @@
-from dataclasses import dataclass, field
-from typing import List, Dict, Set, Optional
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Set, Optional, Tuple, Mapping, Iterable, Callable
+from collections.abc import MutableMapping
+from collections import deque
 from datetime import datetime
+from types import MappingProxyType
+import copy
+import functools
 import json
+import sys
+from content_pack import get_default_pack
+from world_graph import WorldGraph
+from persistent import PersistentMap
+from ring_buffer import RingBuffer
+from serialization import Codec, Field
 
-@dataclass
-class Item:
+@dataclass(frozen=True, eq=False, slots=True)
+class ItemDefinition:
+    """Shared, immutable description of an item type"""
+    item_id: str
     name: str
     description: str
     weight: float = 1.0
@@ -12,35 +25,302 @@ class Item:
     usable: bool = False
     consumable: bool = False
     item_type: str = "misc"  # weapon, armor, potion, tool, material, etc.
-    stats: Dict[str, int] = field(default_factory=dict)
-    durability: int = 100
+    stats: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
     max_durability: int = 100
     rarity: str = "common"
-    special_effects: List[str] = field(default_factory=list)
+    special_effects: Tuple[str, ...] = ()
+    
+    def to_dict(self) -> Dict:
+        """Convert definition to dictionary"""
+        return ITEM_DEFINITION_CODEC.encode_full(self)
+
+class ItemRegistry:
+    """Interned ItemDefinitions; identical definitions are stored once per process"""
+    
+    def __init__(self):
+        self._by_id: Dict[str, ItemDefinition] = {}
+        self._by_key: Dict[tuple, ItemDefinition] = {}
+        self._source: Mapping[str, Dict] = {}
+    
+    @staticmethod
+    def _key(name: str, description: str = "", weight: float = 1.0, value: int = 0,
+             usable: bool = False, consumable: bool = False, item_type: str = "misc",
+             stats: Optional[Mapping[str, int]] = None, max_durability: int = 100,
+             rarity: str = "common", special_effects=()) -> tuple:
+        return (name, description, weight, value, usable, consumable, item_type,
+                tuple(sorted((stats or {}).items())), max_durability, rarity, tuple(special_effects or ()))
+    
+    def intern(self, name: str, description: str = "", weight: float = 1.0, value: int = 0,
+               usable: bool = False, consumable: bool = False, item_type: str = "misc",
+               stats: Optional[Mapping[str, int]] = None, max_durability: int = 100,
+               rarity: str = "common", special_effects=(), item_id: Optional[str] = None) -> ItemDefinition:
+        """Return the shared definition with these fields, registering it if new"""
+        stats = stats or {}
+        special_effects = tuple(special_effects or ())
+        key = self._key(name, description, weight, value, usable, consumable, item_type,
+                        stats, max_durability, rarity, special_effects)
+        definition = self._by_key.get(key)
+        if definition is None:
+            item_id = sys.intern(self._unique_id(item_id or name, key))
+            definition = ItemDefinition(
+                item_id=item_id,
+                name=sys.intern(name),
+                description=description,
+                weight=weight,
+                value=value,
+                usable=usable,
+                consumable=consumable,
+                item_type=sys.intern(item_type),
+                stats=MappingProxyType(dict(stats)),
+                max_durability=max_durability,
+                rarity=sys.intern(rarity),
+                special_effects=special_effects
+            )
+            self._by_key[key] = definition
+            self._by_id[item_id] = definition
+        return definition
+    
+    def _unique_id(self, item_id: str, key: tuple) -> str:
+        """Pick a free id, suffixing it when another definition already uses it.
+
+        Ids defined by the content source are reserved for that definition.
+        """
+        if item_id not in self._by_id and (item_id not in self._source
+                                           or self._key(**self._source[item_id]) == key):
+            return item_id
+        suffix = 2
+        while f"{item_id}#{suffix}" in self._by_id:
+            suffix += 1
+        return f"{item_id}#{suffix}"
+    
+    def attach_source(self, records: Mapping[str, Dict]):
+        """Resolve unknown ids from content records, e.g. a content pack section"""
+        self._source = records
+    
+    def get(self, item_id: str) -> Optional[ItemDefinition]:
+        """Get definition by item id, defining it from the content source if needed"""
+        definition = self._by_id.get(item_id)
+        if definition is None and item_id in self._source:
+            definition = self.intern(item_id=item_id, **self._source[item_id])
+        return definition
+    
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+item_registry = ItemRegistry()
+item_registry.attach_source(get_default_pack().section("items"))
+
+def _shared(attribute: str) -> property:
+    """Read-only attribute delegated to the item's definition"""
+    return property(lambda self: getattr(self.definition, attribute))
 
-@dataclass
+class Item:
+    """A single item (or stack) in the world: shared definition plus per-copy state"""
+    __slots__ = ("definition", "durability", "quantity")
+    
+    item_id = _shared("item_id")
+    name = _shared("name")
+    description = _shared("description")
+    weight = _shared("weight")
+    value = _shared("value")
+    usable = _shared("usable")
+    consumable = _shared("consumable")
+    item_type = _shared("item_type")
+    stats = _shared("stats")
+    max_durability = _shared("max_durability")
+    rarity = _shared("rarity")
+    special_effects = _shared("special_effects")
+    
+    def __init__(self, name: str, description: str = "", weight: float = 1.0, value: int = 0,
+                 usable: bool = False, consumable: bool = False, item_type: str = "misc",
+                 stats: Optional[Dict[str, int]] = None, durability: int = 100,
+                 max_durability: int = 100, rarity: str = "common",
+                 special_effects: Optional[List[str]] = None, quantity: int = 1):
+        self.definition = item_registry.intern(
+            name, description, weight, value, usable, consumable, item_type,
+            stats, max_durability, rarity, special_effects
+        )
+        self.durability = durability
+        self.quantity = quantity
+    
+    @classmethod
+    def from_definition(cls, definition: ItemDefinition, durability: Optional[int] = None, quantity: int = 1) -> "Item":
+        """Create an instance of an existing definition"""
+        item = cls.__new__(cls)
+        item.definition = definition
+        item.durability = definition.max_durability if durability is None else durability
+        item.quantity = quantity
+        return item
+    
+    def copy(self) -> "Item":
+        """Copy the per-instance state; the definition stays shared"""
+        return Item.from_definition(self.definition, self.durability, self.quantity)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Item):
+            return NotImplemented
+        return (self.definition is other.definition
+                and self.durability == other.durability
+                and self.quantity == other.quantity)
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return f"Item({self.item_id!r}, durability={self.durability}, quantity={self.quantity})"
+
+class Inventory:
+    """Item container indexed by case-folded name, stacking identical items.
+
+    Iterating yields stacks (an Item whose quantity may be above one);
+    count() answers "how many of X" without scanning. A stack whose quantity
+    changes is replaced rather than modified, so an Item handed out by get()
+    or iteration keeps the quantity it had.
+    """
+    
+    __slots__ = ("_stacks", "_counts", "_size", "on_change")
+    
+    def __init__(self, items: Iterable[Item] = ()):
+        self._stacks: Dict[str, List[Item]] = {}  # folded name -> stacks of that name
+        self._counts: Dict[str, int] = {}  # folded name -> total quantity
+        self._size = 0
+        self.on_change: Optional[Callable[[str], None]] = None  # called with the folded name
+        for item in items:
+            self.add(item)
+    
+    def add(self, item: Item):
+        """Add an item, merging it into a matching stack when there is one"""
+        definition = item.definition
+        key = definition.name.casefold()
+        stacks = self._stacks.get(key)
+        if stacks is None:
+            # Loading a save adds mostly new names
+            self._stacks[key] = [item]
+            self._size += 1
+        else:
+            for i, stack in enumerate(stacks):
+                if stack.definition is definition and stack.durability == item.durability:
+                    stacks[i] = Item.from_definition(definition, stack.durability, stack.quantity + item.quantity)
+                    break
+            else:
+                stacks.append(item)
+                self._size += 1
+        self._counts[key] = self._counts.get(key, 0) + item.quantity
+        if self.on_change:
+            self.on_change(key)
+    
+    # List compatibility for code that builds inventories by appending
+    append = add
+    
+    def take(self, item_name: str, quantity: int = 1) -> Optional[Item]:
+        """Remove quantity units of an item from one stack and return them, or None if no stack has enough"""
+        key = item_name.casefold()
+        if quantity <= 0:
+            return None
+        for i in range(len(self._stacks.get(key, ())) - 1, -1, -1):
+            if self._stacks[key][i].quantity >= quantity:
+                return self._take_from(key, [(i, quantity)])[0]
+        return None
+    
+    def take_stacks(self, item_name: str, quantity: int = 1) -> Optional[List[Item]]:
+        """Remove quantity units of an item, newest stacks first; returns one Item per stack drawn from"""
+        key = item_name.casefold()
+        if self._counts.get(key, 0) < quantity or quantity <= 0:
+            return None
+        drawn = []
+        remaining = quantity
+        for i in range(len(self._stacks[key]) - 1, -1, -1):
+            used = min(remaining, self._stacks[key][i].quantity)
+            drawn.append((i, used))
+            remaining -= used
+            if not remaining:
+                break
+        return self._take_from(key, drawn)
+    
+    def _take_from(self, key: str, drawn: List[Tuple[int, int]]) -> List[Item]:
+        """Take (stack index, quantity) pairs, in descending index order"""
+        stacks = self._stacks[key]
+        taken = []
+        for i, used in drawn:
+            stack = stacks[i]
+            # Taken units keep the durability of the stack they came from
+            taken.append(Item.from_definition(stack.definition, stack.durability, used))
+            if used == stack.quantity:
+                del stacks[i]
+                self._size -= 1
+            else:
+                stacks[i] = Item.from_definition(stack.definition, stack.durability, stack.quantity - used)
+            self._counts[key] -= used
+        if not stacks:
+            del self._stacks[key]
+            del self._counts[key]
+        if self.on_change:
+            self.on_change(key)
+        return taken
+    
+    def remove(self, item_name: str, quantity: int = 1) -> bool:
+        """Remove quantity units of an item by name"""
+        return self.take_stacks(item_name, quantity) is not None
+    
+    def get(self, item_name: str) -> Optional[Item]:
+        """Get the first stack of an item by name"""
+        stacks = self._stacks.get(item_name.casefold())
+        return stacks[0] if stacks else None
+    
+    def count(self, item_name: str) -> int:
+        """Total quantity of an item by name"""
+        return self._counts.get(item_name.casefold(), 0)
+    
+    def copy(self) -> "Inventory":
+        """Copy with independent item instances"""
+        return Inventory(item.copy() for item in self)
+    
+    def __contains__(self, item_name) -> bool:
+        return isinstance(item_name, str) and item_name.casefold() in self._counts
+    
+    def __iter__(self):
+        for stacks in self._stacks.values():
+            yield from stacks
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __getitem__(self, index: int) -> Item:
+        return list(self)[index]
+    
+    def __repr__(self) -> str:
+        return f"Inventory({list(self)!r})"
+
+# Shared read-only default for empty mappings
+_EMPTY_MAPPING: Mapping = MappingProxyType({})
+
+@dataclass(slots=True)
 class Location:
     name: str
     description: str
-    connections: List[str] = field(default_factory=list)
-    items: List[Item] = field(default_factory=list)
-    npcs: List[str] = field(default_factory=list)
+    # Name collections are tuples; empty ones all share the () singleton
+    connections: Tuple[str, ...] = ()
+    items: Inventory = ()
+    npcs: Tuple[str, ...] = ()
     visited: bool = False
-    monsters: List[str] = field(default_factory=list)  # Monster names that can spawn here
-    crafting_stations: List[str] = field(default_factory=list)  # Available crafting stations
-    merchants: List[str] = field(default_factory=list)  # Available merchants
+    monsters: Tuple[str, ...] = ()  # Monster names that can spawn here
+    crafting_stations: Tuple[str, ...] = ()  # Available crafting stations
+    merchants: Tuple[str, ...] = ()  # Available merchants
+    
+    def __post_init__(self):
+        if not isinstance(self.items, Inventory):
+            self.items = Inventory(self.items)
 
-@dataclass
+@dataclass(slots=True)
 class Quest:
     title: str
     description: str
-    requirements: Dict[str, int] = field(default_factory=dict)  # item_name: count
-    rewards: List[Item] = field(default_factory=list)
+    requirements: Mapping[str, int] = field(default_factory=lambda: _EMPTY_MAPPING)  # item_name: count
+    rewards: Tuple[Item, ...] = ()
     completed: bool = False
     started: bool = False
     quest_id: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class CombatStats:
     health: int
     max_health: int
@@ -51,12 +331,442 @@ class CombatStats:
     dodge_chance: float = 0.05
     mana: int = 0
     max_mana: int = 0
+    on_change: Optional[Callable[[], None]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value):
+        object.__setattr__(self, name, value)
+        on_change = getattr(self, "on_change", None)
+        if on_change is not None and name != "on_change":
+            on_change()
+
+_NOTHING_REMOVED: frozenset = frozenset()
+
+class LocationTable(MutableMapping):
+    """Per-session view of the shared world template.
 
-@dataclass
+    Template locations are never mutated; a session gets its own copy of a
+    location the first time it is accessed, so untouched locations cost nothing.
+    """
+    
+    __slots__ = ("_template", "_overlay", "_removed", "_deferred", "on_change")
+    
+    def __init__(self, template: Mapping[str, Location]):
+        self._template = template
+        self._overlay: Dict[str, Location] = {}
+        self._removed: Set[str] = _NOTHING_REMOVED  # replaced by a real set on first delete
+        self._deferred: Dict[str, "SavedLocation"] = _EMPTY_MAPPING  # replaced on first defer
+        self.on_change: Optional[Callable[[str], None]] = None  # called with the location name
+    
+    def __getitem__(self, name: str) -> Location:
+        location = self._overlay.get(name)
+        if location is None:
+            if name in self._removed or name not in self._template:
+                raise KeyError(name)
+            location = self._overlay[name] = _copy_location(self._template[name])
+            if name in self._deferred:
+                self._deferred.pop(name)(location)
+            self._watch(name, location)
+        return location
+    
+    def __setitem__(self, name: str, location: Location):
+        self._overlay[name] = location
+        if name in self._removed:
+            self._removed.discard(name)
+        if name in self._deferred:
+            del self._deferred[name]
+        self._watch(name, location)
+        self._changed(name)
+    
+    def __delitem__(self, name: str):
+        if name not in self:
+            raise KeyError(name)
+        self._overlay.pop(name, None)
+        if name in self._deferred:
+            del self._deferred[name]
+        if self._removed is _NOTHING_REMOVED:
+            self._removed = set()
+        self._removed.add(name)
+        self._changed(name)
+    
+    def _watch(self, name: str, location: Location):
+        """Report item changes in a session-owned location"""
+        location.items.on_change = lambda item_key: self._changed(name)
+    
+    def _changed(self, name: str):
+        if self.on_change:
+            self.on_change(name)
+    
+    def __contains__(self, name) -> bool:
+        return name not in self._removed and (name in self._overlay or name in self._template)
+    
+    def __iter__(self):
+        for name in self._template:
+            if name not in self._removed:
+                yield name
+        for name in self._overlay:
+            if name not in self._template:
+                yield name
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def peek(self, name: str) -> Location:
+        """Get a location for reading without copying it into the session"""
+        location = self._overlay.get(name)
+        if location is None:
+            if name in self._deferred:
+                return self[name]
+            if name in self._removed:
+                raise KeyError(name)
+            location = self._template[name]
+        return location
+    
+    def materialized(self) -> Dict[str, Location]:
+        """Locations this session has its own copy of; deferred ones are left undecoded"""
+        return self._overlay
+    
+    def deferred(self) -> Mapping[str, "SavedLocation"]:
+        """Locations whose saved state has not been applied yet"""
+        return self._deferred
+    
+    def defer(self, name: str, saved: "SavedLocation", changed: bool = False):
+        """Apply saved state to a template location only when it is first accessed"""
+        if self._deferred is _EMPTY_MAPPING:
+            self._deferred = {}
+        self._overlay.pop(name, None)
+        self._deferred[name] = saved
+        if changed:
+            self._changed(name)
+    
+    def reset(self, name: str):
+        """Drop the session's copy so the location reads from the template again"""
+        changed = name in self._deferred or name in self._removed
+        if name in self._deferred:
+            del self._deferred[name]
+        if name in self._removed:
+            self._removed.discard(name)
+        if self._overlay.pop(name, None) is not None or changed:
+            self._changed(name)
+
+class SavedLocation:
+    """A location's state in a loaded save, applied when the location is first accessed.
+
+    load() returns the saved compact data, decoded anew on every call. Until
+    the location is accessed, saving carries that data forward and the undo
+    timeline keeps this object, so neither builds the location.
+    """
+    __slots__ = ("_load", "_items")
+    
+    def __init__(self, load: Callable[[], Mapping], items: "ItemTable"):
+        self._load = load
+        self._items = items
+    
+    def __call__(self, location: Location):
+        LOCATION_CODEC.apply_compact(location, self._load(), self._items)
+    
+    def compact(self) -> Mapping:
+        """The saved data, with any item references made inline"""
+        data = self._load()
+        if any("i" in item_data for item_data in data.get("i", ())):
+            data = dict(data, i=[self._items.inlined(item_data) for item_data in data["i"]])
+        return data
+    
+    def full(self, items: "ItemTable") -> Dict:
+        """The full form, through a location that is not kept"""
+        return LOCATION_CODEC.encode_full(LOCATION_CODEC.new_compact(self._load(), self._items), items)
+
+def _copy_location(location: Location) -> Location:
+    """Copy a template location; only the items are per-session"""
+    return replace(location, items=location.items.copy())
+
+@dataclass(frozen=True)
+class WorldTemplate:
+    """Static world content shared by every GameState in the process"""
+    locations: Mapping[str, Location]
+    quests: Tuple[Quest, ...]
+
+_world_template: Optional[WorldTemplate] = None
+
+def _new_combat_stats() -> CombatStats:
+    """A new player's combat stats"""
+    return CombatStats(100, 100, 10, 5, 8)
+
+def get_world_template() -> WorldTemplate:
+    """Open the world template on first use and return the shared instance.
+
+    Locations are decoded from the content pack the first time they are
+    looked up, so opening the template does not depend on the world size.
+    """
+    global _world_template
+    if _world_template is None:
+        pack = get_default_pack()
+        _world_template = WorldTemplate(
+            locations=pack.section("locations", _location_from_record),
+            quests=tuple(_quest_from_record(quest_id, record)
+                         for quest_id, record in pack.section("quests").records())
+        )
+    return _world_template
+
+_world_graph: Optional[WorldGraph] = None
+
+def get_world_graph() -> WorldGraph:
+    """Adjacency index over the world template's connections, built once per process"""
+    global _world_graph
+    if _world_graph is None:
+        # Read connections straight from the pack records; no Location objects needed
+        _world_graph = WorldGraph.from_adjacency(
+            (name, record.get("connections", ()))
+            for name, record in get_default_pack().section("locations").records()
+        )
+    return _world_graph
+
+def _content_item(item_id: str) -> Item:
+    """Create an item instance from a content item id"""
+    definition = item_registry.get(item_id)
+    if definition is None:
+        raise KeyError(f"Unknown item id in content pack: {item_id}")
+    return Item.from_definition(definition)
+
+def _location_from_record(location_id: str, record: Dict) -> Location:
+    """Build a template location from its content pack record"""
+    return Location(
+        name=record["name"],
+        description=record["description"],
+        connections=_interned(record.get("connections")),
+        items=[_content_item(item_id) for item_id in record.get("items", ())],
+        npcs=_interned(record.get("npcs")),
+        monsters=_interned(record.get("monsters")),
+        crafting_stations=_interned(record.get("crafting_stations")),
+        merchants=_interned(record.get("merchants"))
+    )
+
+def _quest_from_record(quest_id: str, record: Dict) -> Quest:
+    """Build a template quest from its content pack record"""
+    return Quest(
+        title=record["title"],
+        description=record["description"],
+        requirements=MappingProxyType(record.get("requirements", {})),
+        rewards=tuple(_content_item(item_id) for item_id in record.get("rewards", ())),
+        quest_id=sys.intern(quest_id)
+    )
+
+def _interned(names: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Tuple of interned names; empty collections share the () singleton"""
+    return tuple(map(sys.intern, names)) if names else ()
+
+class ItemTable:
+    """Item definitions referenced by one serialized document, by item id.
+
+    An item is written as a reference to its definition plus the per-copy
+    state that differs from it, and each definition once, into the table.
+    With inline=True references embed their definition instead, for data
+    that has no table of its own (e.g. a migrated save location).
+    """
+    __slots__ = ("definitions", "inline", "_resolved")
+    
+    # (id, inline definition, durability, quantity) keys of a reference, by form
+    _KEYS = {False: ("id", "definition", "durability", "quantity"), True: ("i", "f", "d", "q")}
+    # Per form: item id -> (encoded data, registry definition) of definitions
+    # already resolved, so data seen before is recognised without decoding
+    _known: Tuple[Dict[str, Tuple[Dict, ItemDefinition]], ...] = ({}, {})
+    
+    def __init__(self, definitions: Optional[Dict[str, Dict]] = None, inline: bool = False):
+        self.definitions = {} if definitions is None else definitions
+        self.inline = inline
+        self._resolved: Dict[str, ItemDefinition] = {}
+    
+    def reference(self, item: Item, compact: bool = False) -> Dict:
+        id_key, definition_key, durability_key, quantity_key = self._KEYS[compact]
+        definition = item.definition
+        if self.inline:
+            reference = {definition_key: ITEM_DEFINITION_CODEC.encode(definition, self, compact)}
+        else:
+            if definition.item_id not in self.definitions:
+                self.definitions[definition.item_id] = ITEM_DEFINITION_CODEC.encode(definition, self, compact)
+            reference = {id_key: definition.item_id}
+        if item.durability != definition.max_durability:
+            reference[durability_key] = item.durability
+        if item.quantity != 1:
+            reference[quantity_key] = item.quantity
+        return reference
+    
+    def item(self, data: Mapping, compact: bool = False) -> Item:
+        id_key, definition_key, durability_key, quantity_key = self._KEYS[compact]
+        definition = None
+        if id_key in data:
+            definition = self._resolved.get(data[id_key]) or self._definition(data[id_key], compact)
+        elif definition_key in data:
+            definition = item_registry.intern(**ITEM_DEFINITION_CODEC.decode(data[definition_key], self, compact))
+        if definition is None:
+            if compact:
+                raise KeyError(f"Unknown item {data.get(id_key)!r}")
+            return self._legacy_item(data)
+        return Item.from_definition(definition, data.get(durability_key), data.get(quantity_key, 1))
+    
+    def inlined(self, data: Mapping) -> Mapping:
+        """A compact reference with its definition embedded, when this table has it"""
+        definition_data = self.definitions.get(data.get("i"))
+        if definition_data is None:
+            return data
+        inlined = {key: value for key, value in data.items() if key != "i"}
+        inlined["f"] = definition_data
+        return inlined
+    
+    def _definition(self, item_id: str, compact: bool) -> Optional[ItemDefinition]:
+        definition_data = self.definitions.get(item_id)
+        if definition_data is None:
+            definition = item_registry.get(item_id)
+        else:
+            known = self._known[compact].get(item_id)
+            if known is not None and known[0] == definition_data:
+                definition = known[1]
+            else:
+                definition = item_registry.intern(item_id=item_id,
+                                                  **ITEM_DEFINITION_CODEC.decode(definition_data, self, compact))
+                if definition.item_id == item_id:
+                    self._known[compact][item_id] = (ITEM_DEFINITION_CODEC.encode(definition, self, compact), definition)
+        if definition is not None:
+            self._resolved[item_id] = definition
+        return definition
+    
+    @staticmethod
+    def _legacy_item(item_data: Mapping) -> Item:
+        """Item written in full, before items referenced their definition"""
+        return Item(
+            name=item_data.get("name", ""),
+            description=item_data.get("description", ""),
+            weight=item_data.get("weight", 1.0),
+            value=item_data.get("value", 0),
+            usable=item_data.get("usable", False),
+            consumable=item_data.get("consumable", False),
+            item_type=item_data.get("item_type", "misc"),
+            stats=item_data.get("stats", {}),
+            durability=item_data.get("durability", 100),
+            max_durability=item_data.get("max_durability", 100),
+            rarity=item_data.get("rarity", "common"),
+            special_effects=item_data.get("special_effects", []),
+            quantity=item_data.get("quantity", 1)
+        )
+
+class _ItemCodec:
+    """Codec interface for Item fields: items go through the document's ItemTable (the ctx)"""
+    
+    @staticmethod
+    def encode_full(item: Item, items: ItemTable) -> Dict:
+        return items.reference(item, False)
+    
+    @staticmethod
+    def encode_compact(item: Item, items: ItemTable) -> Dict:
+        return items.reference(item, True)
+    
+    @staticmethod
+    def new_full(data: Mapping, items: ItemTable) -> Item:
+        return items.item(data, False)
+    
+    @staticmethod
+    def new_compact(data: Mapping, items: ItemTable) -> Item:
+        return items.item(data, True)
+
+ITEM_CODEC = _ItemCodec()
+
+# Field tables: full name, compact tag, conversion. Defaults come from the
+# dataclasses; a tag must never be reused for a different field.
+ITEM_DEFINITION_CODEC = Codec(ItemDefinition, [
+    Field("name", "n"),
+    Field("description", "d", ""),
+    Field("weight", "w"),
+    Field("value", "v"),
+    Field("usable", "u"),
+    Field("consumable", "c"),
+    Field("item_type", "t"),
+    Field("stats", "s", encode=dict),
+    Field("max_durability", "md"),
+    Field("rarity", "r"),
+    Field("special_effects", "e", encode=list)
+])
+LOCATION_CODEC = Codec(Location, [
+    Field("name", "n"),
+    Field("description", "d"),
+    Field("connections", "c", encode=list, decode=_interned),
+    Field("visited", "v"),
+    Field("items", "i", factory=Inventory, codec=ITEM_CODEC, many=True, decode=Inventory),
+    Field("npcs", "p", encode=list, decode=_interned),
+    Field("monsters", "m", encode=list, decode=_interned),
+    Field("crafting_stations", "s", encode=list, decode=_interned),
+    Field("merchants", "r", encode=list, decode=_interned)
+])
+QUEST_CODEC = Codec(Quest, [
+    Field("title", "t"),
+    Field("description", "d"),
+    Field("requirements", "q", encode=dict, decode=dict),
+    Field("rewards", "w", codec=ITEM_CODEC, many=True, decode=tuple),
+    Field("completed", "c"),
+    Field("started", "s"),
+    Field("quest_id", "i", decode=sys.intern)
+])
+COMBAT_STATS_CODEC = Codec(CombatStats, [
+    Field("health", "h"),
+    Field("max_health", "mh"),
+    Field("attack", "a"),
+    Field("defense", "d"),
+    Field("speed", "s"),
+    Field("critical_chance", "cc"),
+    Field("dodge_chance", "dc"),
+    Field("mana", "m"),
+    Field("max_mana", "mm")
+])
+
+# Fields grouped into the sections that state deltas are made of
+_PLAYER_FIELDS = ("player_name", "current_location", "health", "max_health", "level",
+                  "experience", "gold", "game_over", "play_time")
+_CRAFTING_FIELDS = ("crafting_materials", "crafting_tools", "crafting_skills", "merchant_reputation")
+HISTORY_LIMITS = {"conversation_history": 50, "player_actions": 100}
+_FIELD_SECTIONS = {
+    **{name: "player" for name in _PLAYER_FIELDS},
+    **{name: "crafting" for name in _CRAFTING_FIELDS},
+    **{name: name for name in HISTORY_LIMITS},
+    "combat_stats": "combat_stats",
+    "inventory": "inventory",
+    "quests": "quests",
+    "completed_quests": "quests",
+    "locations": "locations"
+}
+DELTA_CHECKPOINT_INTERVAL = 20
+
+# Event code -> GameState method that replays it
+EVENT_METHODS: Dict[str, str] = {"set": "_replay_set"}
+
+def _event(code: str, reports_success: bool = False):
+    """Record calls to a GameState mutator as a compact event.
+
+    Only the outermost call is recorded; mutators it calls internally are
+    replayed as part of it. With reports_success, a False/None result means
+    nothing changed and no event is written.
+    """
+    def decorate(method):
+        EVENT_METHODS[code] = method.__name__
+        
+        @functools.wraps(method)
+        def recorded(self, *args, **kwargs):
+            sink = self._event_sink
+            if sink is None or self._event_depth:
+                return method(self, *args, **kwargs)
+            self._event_depth += 1
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                self._event_depth -= 1
+            if not reports_success or (result is not None and result is not False):
+                sink(code, args, kwargs)
+            return result
+        return recorded
+    return decorate
+
+@dataclass(slots=True)
 class GameState:
     player_name: str = "Pahlawan"
     current_location: str = "hutan"
-    inventory: List[Item] = field(default_factory=list)
+    inventory: Inventory = field(default_factory=Inventory)
     health: int = 100
     max_health: int = 100
     level: int = 1
@@ -68,14 +778,14 @@ class GameState:
     game_over: bool = False
     
     # AI Memory
-    conversation_history: List[str] = field(default_factory=list)
-    player_actions: List[str] = field(default_factory=list)
+    conversation_history: RingBuffer = field(default_factory=lambda: RingBuffer(maxlen=HISTORY_LIMITS["conversation_history"]))
+    player_actions: RingBuffer = field(default_factory=lambda: RingBuffer(maxlen=HISTORY_LIMITS["player_actions"]))
     
     # World state
     locations: Dict[str, Location] = field(default_factory=dict)
     
     # New systems
-    combat_stats: CombatStats = field(default_factory=lambda: CombatStats(100, 100, 10, 5, 8))
+    combat_stats: CombatStats = field(default_factory=_new_combat_stats)
     crafting_materials: Dict[str, int] = field(default_factory=dict)  # material_name: quantity
     crafting_tools: List[str] = field(default_factory=list)
     crafting_skills: Dict[str, int] = field(default_factory=lambda: {
@@ -89,183 +799,141 @@ class GameState:
     play_time: int = 0  # in seconds
     save_slots: Dict[str, str] = field(default_factory=dict)  # slot_name: save_name
     
+    # Quest requirement index: folded item name -> active quests needing it
+    _quest_index: Dict[str, List[Quest]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _quest_requirements_met: Dict[str, Set[str]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _quests_ready: Dict[str, Quest] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _indexed_inventory: Optional[Inventory] = field(default=None, init=False, repr=False, compare=False)
+    _indexed_quests: Optional[List[Quest]] = field(default=None, init=False, repr=False, compare=False)
+    
+    # Dirty tracking: every change bumps _state_version and stamps its section with it
+    _state_version: int = field(default=0, init=False, repr=False, compare=False)
+    _section_versions: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _location_versions: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _history_totals: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)  # entries ever appended
+    _history_resets: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _full_version: int = field(default=0, init=False, repr=False, compare=False)  # older bases need a full checkpoint
+    _tracking: bool = field(default=False, init=False, repr=False, compare=False)
+    _view_cache: Dict[str, Tuple[int, object]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # listener(section, key) after an item change: ("inventory", folded item name) or ("locations", location name)
+    _change_listeners: List[Callable[[str, str], None]] = field(default_factory=list, init=False, repr=False, compare=False)
+    
+    # Event sourcing: sink(code, args, kwargs) receives each top-level mutation
+    _event_sink: Optional[Callable[[str, tuple, dict], None]] = field(default=None, init=False, repr=False, compare=False)
+    _event_depth: int = field(default=0, init=False, repr=False, compare=False)
+    
     def __post_init__(self):
+        self._history_totals = {name: len(getattr(self, name)) for name in HISTORY_LIMITS}
+        self._tracking = True
+        self.combat_stats.on_change = self._on_combat_stats_change
         self._initialize_world()
         self._initialize_quests()
+        self._rebuild_quest_index()
+    
+    def __setattr__(self, name: str, value):
+        section = _FIELD_SECTIONS.get(name)
+        if section in HISTORY_LIMITS and not isinstance(value, RingBuffer):
+            # Histories stay bounded whatever is assigned (e.g. lists from a save)
+            value = RingBuffer(value, maxlen=HISTORY_LIMITS[name])
+        object.__setattr__(self, name, value)
+        if section is not None and getattr(self, "_tracking", False):
+            self._touch(section)
+            self._watch_field(name, value)
+            # Direct writes outside a recorded mutator still need to replay
+            if name in _PLAYER_FIELDS and self._event_sink and not self._event_depth:
+                self._event_sink("set", (name, value), {})
+    
+    def _watch_field(self, name: str, value):
+        """Hook change notifications into a newly assigned field"""
+        if name == "inventory":
+            value.on_change = self._on_inventory_change
+        elif name == "combat_stats":
+            value.on_change = self._on_combat_stats_change
+        elif name == "locations":
+            if isinstance(value, LocationTable):
+                value.on_change = self._on_location_change
+            # A replaced world can't be expressed as per-location changes
+            self._full_version = self._state_version
+        elif name in HISTORY_LIMITS:
+            self._history_resets[name] = self._state_version
+    
+    def _touch(self, section: str, location: Optional[str] = None):
+        """Record that a section (and optionally one location) changed"""
+        self._state_version += 1
+        self._section_versions[section] = self._state_version
+        if location is not None:
+            self._location_versions[location] = self._state_version
+    
+    def _on_combat_stats_change(self):
+        self._touch("combat_stats")
+        # e.g. CombatSystem changing the player's stats in place
+        if self._event_sink and not self._event_depth:
+            self._event_sink("cs", (self._combat_stats_section(),), {})
+    
+    def _on_location_change(self, name: str):
+        self._touch("locations", name)
+        for listener in self._change_listeners:
+            listener("locations", name)
+    
+    def add_change_listener(self, listener: Callable[[str, str], None]):
+        """Call listener(section, key) whenever the inventory or a location's items change"""
+        self._change_listeners.append(listener)
+    
+    def remove_change_listener(self, listener: Callable[[str, str], None]):
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def set_event_sink(self, sink: Optional[Callable[[str, tuple, dict], None]]):
+        """Send every top-level mutation to sink(code, args, kwargs); None stops recording"""
+        self._event_sink = sink
+    
+    def replay_event(self, code: str, args: Iterable = (), kwargs: Optional[Dict] = None):
+        """Re-apply a recorded event"""
+        getattr(self, EVENT_METHODS[code])(*args, **(kwargs or {}))
+    
+    def _replay_set(self, name: str, value):
+        setattr(self, name, value)
+    
+    @property
+    def state_version(self) -> int:
+        """Counter that changes whenever any tracked state changes"""
+        return self._state_version
+    
+    def cached_view(self, name: str, builder: Callable[["GameState"], object]):
+        """builder(self), memoised until the state version changes (treat the result as read-only)"""
+        cached = self._view_cache.get(name)
+        if cached is not None and cached[0] == self._state_version:
+            return cached[1]
+        view = builder(self)
+        self._view_cache[name] = (self._state_version, view)
+        return view
     
     def _initialize_world(self):
-        """Initialize the game world with locations, items, and NPCs"""
-        # Initialize locations with enhanced features
-        self.locations = {
-            "hutan": Location(
-                name="Hutan Misterius",
-                description="Hutan yang penuh dengan misteri dan petualangan. Pepohonan tinggi menjulang dan suara burung terdengar dari kejauhan.",
-                connections=["gua", "kota"],
-                items=[
-                    Item("ranting", "Ranting kayu yang bisa digunakan untuk berbagai keperluan", 0.5, 2, True, False, "material"),
-                    Item("batu", "Batu biasa yang bisa digunakan untuk crafting", 1.0, 1, False, False, "material"),
-                    Item("herbs", "Tanaman obat yang berguna untuk alchemy", 0.2, 4, False, False, "material")
-                ],
-                npcs=["penjaga_hutan"],
-                monsters=["goblin", "wolf"],
-                crafting_stations=["campfire"],
-                merchants=[]
-            ),
-            "gua": Location(
-                name="Gua Gelap",
-                description="Gua yang gelap dan misterius. Suara air menetes terdengar dari dalam.",
-                connections=["hutan", "kedalaman_gua"],
-                items=[
-                    Item("iron_ore", "Bijih besi untuk crafting", 2.0, 5, False, False, "material"),
-                    Item("torch", "Obor untuk penerangan", 1.0, 8, True, False, "tool"),
-                    Item("crystal", "Kristal yang berkilau", 0.5, 15, False, False, "material")
-                ],
-                npcs=["penambang"],
-                monsters=["skeleton", "troll"],
-                crafting_stations=["anvil"],
-                merchants=["pedagang_gelap"]
-            ),
-            "kota": Location(
-                name="Kota Ramai",
-                description="Kota yang ramai dengan penduduk dan aktivitas perdagangan.",
-                connections=["hutan", "kastil", "pelabuhan"],
-                items=[
-                    Item("bread", "Roti segar", 0.3, 5, True, True, "consumable"),
-                    Item("water", "Air bersih", 0.5, 2, True, True, "consumable"),
-                    Item("cloth", "Kain untuk crafting", 0.8, 3, False, False, "material")
-                ],
-                npcs=["pedagang", "penjaga_kota"],
-                monsters=[],
-                crafting_stations=["workbench", "cauldron"],
-                merchants=["pedagang_umum", "tukang_senjata", "tukang_armor", "alkemis"]
-            ),
-            "kastil": Location(
-                name="Kastil Megah",
-                description="Kastil yang megah dengan arsitektur yang indah.",
-                connections=["kota"],
-                items=[
-                    Item("gold_coin", "Koin emas", 0.1, 10, False, False, "currency"),
-                    Item("magic_scroll", "Gulungan sihir", 0.5, 100, True, False, "magic"),
-                    Item("noble_clothing", "Pakaian bangsawan", 1.0, 50, False, False, "armor")
-                ],
-                npcs=["raja", "penasihat"],
-                monsters=[],
-                crafting_stations=["enchanting_table"],
-                merchants=["toko_sihir"]
-            ),
-            "sungai": Location(
-                name="Sungai Jernih",
-                description="Sungai yang airnya jernih dan mengalir dengan tenang.",
-                connections=["hutan", "pelabuhan"],
-                items=[
-                    Item("fish", "Ikan segar", 0.5, 8, True, True, "consumable"),
-                    Item("water", "Air bersih", 0.5, 2, True, True, "consumable"),
-                    Item("pearl", "Mutiara yang indah", 0.3, 25, False, False, "material")
-                ],
-                npcs=["nelayan"],
-                monsters=["river_monster"],
-                crafting_stations=[],
-                merchants=[]
-            ),
-            "pelabuhan": Location(
-                name="Pelabuhan Sibuk",
-                description="Pelabuhan yang sibuk dengan kapal-kapal yang berlabuh.",
-                connections=["kota", "sungai"],
-                items=[
-                    Item("rope", "Tali yang kuat", 1.0, 12, False, False, "tool"),
-                    Item("sail_cloth", "Kain layar", 2.0, 20, False, False, "material"),
-                    Item("compass", "Kompas untuk navigasi", 0.5, 30, True, False, "tool")
-                ],
-                npcs=["pelaut", "kapten"],
-                monsters=[],
-                crafting_stations=["shipyard"],
-                merchants=["pedagang_laut"]
-            ),
-            "kedalaman_gua": Location(
-                name="Kedalaman Gua",
-                description="Bagian terdalam dari gua yang gelap dan berbahaya.",
-                connections=["gua"],
-                items=[
-                    Item("dragon_scale", "Sisik naga yang sangat kuat", 3.0, 200, False, False, "material"),
-                    Item("magic_crystal", "Kristal ajaib", 1.0, 50, False, False, "material"),
-                    Item("ancient_relic", "Relik kuno", 5.0, 500, False, False, "treasure")
-                ],
-                npcs=[],
-                monsters=["dragon", "ancient_guardian"],
-                crafting_stations=[],
-                merchants=[]
-            )
-        }
+        """Attach a copy-on-write view of the shared world template"""
+        self.locations = LocationTable(get_world_template().locations)
     
     def _initialize_quests(self):
-        """Initialize quests with enhanced rewards"""
-        self.quests = [
-            Quest(
-                title="Mengumpulkan Kayu",
-                description="Kumpulkan 3 ranting untuk membuat api unggun",
-                requirements={"ranting": 3},
-                rewards=[
-                    Item("campfire", "Api unggun untuk memasak", 5.0, 20, True, False, "tool"),
-                    Item("cooked_meat", "Daging yang sudah dimasak", 0.5, 15, True, True, "consumable")
-                ],
-                quest_id="quest_1"
-            ),
-            Quest(
-                title="Mencari Batu Api",
-                description="Temukan 1 batu api untuk membuat api",
-                requirements={"flint": 1},
-                rewards=[
-                    Item("flint_and_steel", "Batu api dan baja", 1.0, 25, True, False, "tool"),
-                    Item("torch", "Obor untuk penerangan", 1.0, 8, True, False, "tool")
-                ],
-                quest_id="quest_2"
-            ),
-            Quest(
-                title="Mengumpulkan Harta",
-                description="Kumpulkan 100 koin emas untuk membeli senjata",
-                requirements={"gold_coin": 100},
-                rewards=[
-                    Item("iron_sword", "Pedang besi yang tajam", 3.0, 80, True, False, "weapon", {"attack": 15}),
-                    Item("leather_armor", "Armor kulit ringan", 2.0, 45, True, False, "armor", {"defense": 5})
-                ],
-                quest_id="quest_3"
-            ),
-            Quest(
-                title="Membuat Ramuan",
-                description="Buat 5 health potion menggunakan alchemy",
-                requirements={"health_potion": 5},
-                rewards=[
-                    Item("alchemy_kit", "Kit alchemy lengkap", 2.0, 100, False, False, "tool"),
-                    Item("mana_potion", "Ramuan pemulih mana", 0.5, 25, True, True, "consumable")
-                ],
-                quest_id="quest_4"
-            ),
-            Quest(
-                title="Mengalahkan Dragon",
-                description="Kalahkan dragon di kedalaman gua",
-                requirements={"dragon_defeated": 1},
-                rewards=[
-                    Item("dragon_sword", "Pedang legendaris dengan kekuatan naga", 5.0, 500, True, False, "weapon", {"attack": 50, "fire_damage": 10}),
-                    Item("dragon_armor", "Armor dari sisik naga", 8.0, 300, True, False, "armor", {"defense": 25, "fire_resistance": 50})
-                ],
-                quest_id="quest_5"
-            )
-        ]
+        """Copy quest progress flags from the shared quest templates"""
+        # Shallow copies: requirements and rewards stay shared with the template
+        self.quests = [copy.copy(quest) for quest in get_world_template().quests]
     
+    @_event("ac")
     def add_action(self, action: str):
         """Add player action to history"""
-        self.player_actions.append(action)
-        # Keep only last 100 actions
-        if len(self.player_actions) > 100:
-            self.player_actions = self.player_actions[-100:]
+        self._append_history("player_actions", action)
     
+    @_event("cv")
     def add_conversation(self, conversation: str):
         """Add conversation to history"""
-        self.conversation_history.append(conversation)
-        # Keep only last 50 conversations
-        if len(self.conversation_history) > 50:
-            self.conversation_history = self.conversation_history[-50:]
+        self._append_history("conversation_history", conversation)
+    
+    def _append_history(self, name: str, entry: str):
+        """Append to a bounded history; the ring buffer drops the oldest entry"""
+        getattr(self, name).append(entry)
+        self._history_totals[name] += 1
+        self._touch(name)
     
+    @_event("mv", reports_success=True)
     def move_to(self, location: str) -> bool:
         """Move to a new location"""
         if location in self.locations:
@@ -274,82 +942,189 @@ class GameState:
                 self.current_location = location
                 # Mark location as visited
                 self.locations[location].visited = True
+                self._touch("locations", location)
                 return True
         return False
     
+    def find_route(self, location: str) -> Optional[List[str]]:
+        """Shortest route from the current location, including both ends"""
+        return get_world_graph().shortest_path(self.current_location, location)
+    
+    def locations_within(self, moves: int) -> Dict[str, int]:
+        """Locations reachable from here in at most `moves` moves"""
+        return get_world_graph().within(self.current_location, moves)
+    
+    @_event("tv", reports_success=True)
+    def travel_to(self, location: str) -> Optional[List[str]]:
+        """Walk the shortest route to a location, returning the route taken"""
+        route = self.find_route(location)
+        if route is None or len(route) < 2:
+            return None
+        # Check the whole route first so a failed step can't strand the player halfway
+        for here, step in zip(route, route[1:]):
+            if here not in self.locations or step not in self.locations:
+                return None
+            if step not in self.locations.peek(here).connections:
+                return None
+        for step in route[1:]:
+            self.move_to(step)
+        return route
+    
     def get_current_location_info(self) -> Location:
         """Get current location information"""
-        return self.locations.get(self.current_location, self.locations["hutan"])
+        if self.current_location in self.locations:
+            return self.locations[self.current_location]
+        return self.locations["hutan"]
     
     def get_available_locations(self) -> List[str]:
         """Get list of available locations from current location"""
         current_loc = self.get_current_location_info()
         return current_loc.connections
     
+    @_event("ai")
     def add_item_to_inventory(self, item: Item):
         """Add item to inventory"""
-        self.inventory.append(item)
+        self.inventory.add(item)
+        # Material items are also counted as crafting materials
+        if item.item_type == "material":
+            self._adjust_crafting_material(item.name, item.quantity)
     
-    def remove_item_from_inventory(self, item_name: str) -> bool:
+    @_event("ri", reports_success=True)
+    def remove_item_from_inventory(self, item_name: str, quantity: int = 1) -> bool:
         """Remove item from inventory by name"""
-        for i, item in enumerate(self.inventory):
-            if item.name.lower() == item_name.lower():
-                del self.inventory[i]
-                return True
-        return False
+        removed = self.inventory.take_stacks(item_name, quantity)
+        if removed is None:
+            return False
+        if removed[0].item_type == "material":
+            self._adjust_crafting_material(removed[0].name, -quantity)
+        return True
     
     def get_inventory_item(self, item_name: str) -> Optional[Item]:
         """Get item from inventory by name"""
-        for item in self.inventory:
-            if item.name.lower() == item_name.lower():
-                return item
-        return None
+        return self.inventory.get(item_name)
+    
+    def count_inventory_item(self, item_name: str) -> int:
+        """Get how many of an item are in the inventory"""
+        return self.inventory.count(item_name)
     
+    @_event("al")
     def add_item_to_location(self, item: Item):
         """Add item to current location"""
         current_loc = self.get_current_location_info()
-        current_loc.items.append(item)
+        current_loc.items.add(item)
     
+    @_event("rl", reports_success=True)
     def remove_item_from_location(self, item_name: str) -> bool:
         """Remove item from current location by name"""
         current_loc = self.get_current_location_info()
-        for i, item in enumerate(current_loc.items):
-            if item.name.lower() == item_name.lower():
-                del current_loc.items[i]
-                return True
-        return False
+        return current_loc.items.remove(item_name)
     
+    @_event("tk", reports_success=True)
+    def take_item_from_location(self, item_name: str) -> Optional[Item]:
+        """Move one item from the current location into the inventory"""
+        item = self.get_current_location_info().items.take(item_name)
+        if item is not None:
+            self.add_item_to_inventory(item)
+        return item
+    
+    @_event("sq", reports_success=True)
     def start_quest(self, quest_id: str) -> bool:
         """Start a quest"""
+        self._ensure_quest_index()
         for quest in self.quests:
             if quest.quest_id == quest_id and not quest.started and not quest.completed:
                 quest.started = True
+                self._touch("quests")
+                self._index_quest(quest)
                 return True
         return False
     
+    @_event("cq", reports_success=True)
     def check_quest_completion(self) -> Optional[Quest]:
-        """Check if any quest is completed"""
+        """Complete the next quest whose requirements are all met"""
+        self._ensure_quest_index()
+        while self._quests_ready:
+            quest_id = next(iter(self._quests_ready))
+            quest = self._quests_ready.pop(quest_id)
+            if not quest.started or quest.completed:
+                continue
+            
+            quest.completed = True
+            self.completed_quests.add(quest.quest_id)
+            self._touch("quests")
+            self._unindex_quest(quest)
+            # Add rewards to inventory
+            for reward in quest.rewards:
+                self.add_item_to_inventory(reward.copy())
+            return quest
+        return None
+    
+    def _ensure_quest_index(self):
+        """Rebuild the quest index if the inventory or quest list was replaced"""
+        if self._indexed_inventory is not self.inventory or self._indexed_quests is not self.quests:
+            self._rebuild_quest_index()
+    
+    def _rebuild_quest_index(self):
+        """Index every active quest by the items it requires"""
+        self._quest_index = {}
+        self._quest_requirements_met = {}
+        self._quests_ready = {}
+        self.inventory.on_change = self._on_inventory_change
+        self._indexed_inventory = self.inventory
+        self._indexed_quests = self.quests
         for quest in self.quests:
             if quest.started and not quest.completed:
-                completed = True
-                for item_name, required_count in quest.requirements.items():
-                    # Check inventory
-                    inventory_count = sum(1 for item in self.inventory if item.name.lower() == item_name.lower())
-                    if inventory_count < required_count:
-                        completed = False
-                        break
-                
-                if completed:
-                    quest.completed = True
-                    self.completed_quests.add(quest.quest_id)
-                    # Add rewards to inventory
-                    for reward in quest.rewards:
-                        self.add_item_to_inventory(reward)
-                    return quest
-        return None
+                self._index_quest(quest)
+    
+    def _index_quest(self, quest: Quest):
+        """Register an active quest and record the requirements already met"""
+        met = set()
+        for item_name, required_count in quest.requirements.items():
+            item_key = item_name.casefold()
+            self._quest_index.setdefault(item_key, []).append(quest)
+            if self.inventory.count(item_key) >= required_count:
+                met.add(item_key)
+        self._quest_requirements_met[quest.quest_id] = met
+        if len(met) == len(quest.requirements):
+            self._quests_ready[quest.quest_id] = quest
+    
+    def _unindex_quest(self, quest: Quest):
+        """Remove a quest from the requirement index"""
+        for item_name in quest.requirements:
+            dependents = self._quest_index.get(item_name.casefold())
+            if dependents and quest in dependents:
+                dependents.remove(quest)
+        self._quest_requirements_met.pop(quest.quest_id, None)
+    
+    def _on_inventory_change(self, item_key: str):
+        """Mark the inventory dirty and update quests that depend on this item"""
+        self._touch("inventory")
+        for listener in self._change_listeners:
+            listener("inventory", item_key)
+        dependents = self._quest_index.get(item_key)
+        if not dependents:
+            return
+        count = self.inventory.count(item_key)
+        for quest in dependents:
+            met = self._quest_requirements_met[quest.quest_id]
+            required_count = next(
+                required for item_name, required in quest.requirements.items()
+                if item_name.casefold() == item_key
+            )
+            if count >= required_count:
+                met.add(item_key)
+            else:
+                met.discard(item_key)
+            if len(met) == len(quest.requirements):
+                self._quests_ready[quest.quest_id] = quest
+            else:
+                self._quests_ready.pop(quest.quest_id, None)
     
     def get_context_for_ai(self) -> Dict:
         """Get context information for AI responses"""
+        return self.cached_view("ai_context", GameState._build_ai_context)
+    
+    def _build_ai_context(self) -> Dict:
         current_loc = self.get_current_location_info()
         return {
             "player_name": self.player_name,
@@ -365,68 +1140,90 @@ class GameState:
             "location_items": [item.name for item in current_loc.items],
             "location_npcs": current_loc.npcs,
             "available_locations": current_loc.connections,
-            "recent_actions": self.player_actions[-5:] if self.player_actions else [],
-            "recent_conversations": self.conversation_history[-3:] if self.conversation_history else []
+            "recent_actions": self.player_actions.tail(5),
+            "recent_conversations": self.conversation_history.tail(3)
         }
     
     # New methods for enhanced systems
     
+    @_event("cs")
     def update_combat_stats(self, new_stats: Dict[str, int]):
         """Update combat stats"""
         for stat, value in new_stats.items():
             if hasattr(self.combat_stats, stat):
                 setattr(self.combat_stats, stat, value)
     
+    @_event("am")
     def add_crafting_material(self, material_name: str, quantity: int = 1):
         """Add crafting material"""
-        if material_name not in self.crafting_materials:
-            self.crafting_materials[material_name] = 0
-        self.crafting_materials[material_name] += quantity
+        self._adjust_crafting_material(material_name, quantity)
     
+    @_event("rm", reports_success=True)
     def remove_crafting_material(self, material_name: str, quantity: int = 1) -> bool:
         """Remove crafting material"""
-        if material_name in self.crafting_materials and self.crafting_materials[material_name] >= quantity:
-            self.crafting_materials[material_name] -= quantity
-            if self.crafting_materials[material_name] <= 0:
-                del self.crafting_materials[material_name]
-            return True
-        return False
+        if self.crafting_materials.get(material_name, 0) < quantity:
+            return False
+        self._adjust_crafting_material(material_name, -quantity)
+        # Consume backing material items too so the inventory stays in step
+        held = self.inventory.count(material_name)
+        if held:
+            self.inventory.take_stacks(material_name, min(held, quantity))
+        return True
+    
+    def _adjust_crafting_material(self, material_name: str, change: int):
+        """Change a material count, dropping it once it reaches zero"""
+        quantity = self.crafting_materials.get(material_name, 0) + change
+        if quantity > 0:
+            self.crafting_materials[material_name] = quantity
+        else:
+            self.crafting_materials.pop(material_name, None)
+        self._touch("crafting")
     
+    @_event("at")
     def add_crafting_tool(self, tool_name: str):
         """Add crafting tool"""
         if tool_name not in self.crafting_tools:
             self.crafting_tools.append(tool_name)
+            self._touch("crafting")
     
+    @_event("rt", reports_success=True)
     def remove_crafting_tool(self, tool_name: str) -> bool:
         """Remove crafting tool"""
         if tool_name in self.crafting_tools:
             self.crafting_tools.remove(tool_name)
+            self._touch("crafting")
             return True
         return False
     
+    @_event("sk")
     def improve_crafting_skill(self, skill_name: str, experience: int):
         """Improve crafting skill"""
         if skill_name in self.crafting_skills:
             self.crafting_skills[skill_name] += experience
+            self._touch("crafting")
     
     def get_crafting_skill_level(self, skill_name: str) -> int:
         """Get crafting skill level"""
         return self.crafting_skills.get(skill_name, 0)
     
+    @_event("rp")
     def update_merchant_reputation(self, merchant_name: str, change: int):
         """Update reputation with merchant"""
         if merchant_name not in self.merchant_reputation:
             self.merchant_reputation[merchant_name] = 50
         self.merchant_reputation[merchant_name] = max(0, min(100, self.merchant_reputation[merchant_name] + change))
+        self._touch("crafting")
     
     def get_merchant_reputation(self, merchant_name: str) -> int:
         """Get reputation with merchant"""
         return self.merchant_reputation.get(merchant_name, 50)
     
+    @_event("g+")
     def add_gold(self, amount: int):
         """Add gold to player"""
         self.gold += amount
     
+    @_event("g-", reports_success=True)
     def remove_gold(self, amount: int) -> bool:
         """Remove gold from player"""
         if self.gold >= amount:
@@ -434,6 +1231,7 @@ class GameState:
             return True
         return False
     
+    @_event("xp")
     def add_experience(self, amount: int):
         """Add experience to player"""
         self.experience += amount
@@ -442,6 +1240,7 @@ class GameState:
         if self.experience >= required_exp:
             self.level_up()
     
+    @_event("lv")
     def level_up(self):
         """Level up player"""
         self.level += 1
@@ -452,11 +1251,13 @@ class GameState:
         self.combat_stats.attack += 2
         self.combat_stats.defense += 1
     
+    @_event("hl")
     def heal(self, amount: int):
         """Heal player"""
         self.health = min(self.max_health, self.health + amount)
         self.combat_stats.health = min(self.combat_stats.max_health, self.combat_stats.health + amount)
     
+    @_event("dm")
     def take_damage(self, amount: int):
         """Take damage"""
         self.health = max(0, self.health - amount)
@@ -471,156 +1272,396 @@ class GameState:
             return int(elapsed.total_seconds()) + self.play_time
         return self.play_time
     
-    def save_game_state(self) -> Dict:
-        """Get complete game state for saving"""
+    def save_game_state(self, compact: bool = False, include_deferred: bool = True) -> Dict:
+        """Get complete game state for saving.
+
+        The full form keys every field by name and is what deltas, the
+        timeline and the event log use. The compact form (see Codec) groups
+        the player and crafting fields into their own sections; save files
+        store it. Its locations carry their item definitions inline, so each
+        one decodes without the rest of the document.
+        
+        Locations still deferred from a loaded save are written from their
+        saved data and stay deferred; include_deferred=False leaves them out
+        for a caller that keeps locations.deferred() itself.
+        """
+        # Each referenced definition is written once; items only carry their id and state
+        items = ItemTable()
+        location_items = ItemTable(inline=True) if compact else items
+        if compact:
+            state_data = {"player": PLAYER_CODEC.encode_compact(self)}
+        else:
+            state_data = self._player_section()
+        state_data["inventory"] = [items.reference(item, compact) for item in self.inventory]
+        if compact:
+            state_data["crafting"] = CRAFTING_CODEC.encode_compact(self)
+        else:
+            state_data.update(self._crafting_section())
+        state_data["combat_stats"] = COMBAT_STATS_CODEC.encode(self.combat_stats, items, compact)
+        state_data["locations"] = {
+            name: LOCATION_CODEC.encode(loc, location_items, compact)
+            # Only locations this session has touched; the rest match the template
+            for name, loc in self.locations.materialized().items()
+        }
+        if include_deferred:
+            for name, saved in self.locations.deferred().items():
+                state_data["locations"][name] = saved.compact() if compact else saved.full(items)
+        state_data.update(self._quests_section(items, compact))
+        state_data["conversation_history"] = list(self.conversation_history)
+        state_data["player_actions"] = list(self.player_actions)
+        state_data["item_definitions"] = items.definitions
+        return state_data
+    
+    def _player_section(self) -> Dict:
+        return PLAYER_CODEC.encode_full(self)
+    
+    def _crafting_section(self) -> Dict:
+        return CRAFTING_CODEC.encode_full(self)
+    
+    def _combat_stats_section(self) -> Dict:
+        return COMBAT_STATS_CODEC.encode_full(self.combat_stats)
+    
+    def _quests_section(self, items: ItemTable, compact: bool = False) -> Dict:
         return {
-            "player_name": self.player_name,
-            "current_location": self.current_location,
-            "health": self.health,
-            "max_health": self.max_health,
-            "level": self.level,
-            "experience": self.experience,
-            "gold": self.gold,
-            "game_over": self.game_over,
-            "play_time": self.get_play_time(),
-            "inventory": [self._item_to_dict(item) for item in self.inventory],
-            "crafting_materials": self.crafting_materials,
-            "crafting_tools": self.crafting_tools,
-            "crafting_skills": self.crafting_skills,
-            "merchant_reputation": self.merchant_reputation,
-            "combat_stats": {
-                "health": self.combat_stats.health,
-                "max_health": self.combat_stats.max_health,
-                "attack": self.combat_stats.attack,
-                "defense": self.combat_stats.defense,
-                "speed": self.combat_stats.speed,
-                "critical_chance": self.combat_stats.critical_chance,
-                "dodge_chance": self.combat_stats.dodge_chance,
-                "mana": self.combat_stats.mana,
-                "max_mana": self.combat_stats.max_mana
-            },
-            "locations": {
-                name: {
-                    "name": loc.name,
-                    "description": loc.description,
-                    "connections": loc.connections,
-                    "visited": loc.visited,
-                    "items": [self._item_to_dict(item) for item in loc.items],
-                    "npcs": loc.npcs,
-                    "monsters": loc.monsters,
-                    "crafting_stations": loc.crafting_stations,
-                    "merchants": loc.merchants
-                }
-                for name, loc in self.locations.items()
-            },
-            "quests": [
-                {
-                    "title": quest.title,
-                    "description": quest.description,
-                    "requirements": quest.requirements,
-                    "rewards": [self._item_to_dict(reward) for reward in quest.rewards],
-                    "completed": quest.completed,
-                    "started": quest.started,
-                    "quest_id": quest.quest_id
-                }
-                for quest in self.quests
-            ],
-            "completed_quests": list(self.completed_quests),
-            "conversation_history": self.conversation_history,
-            "player_actions": self.player_actions
+            "quests": [QUEST_CODEC.encode(quest, items, compact) for quest in self.quests],
+            "completed_quests": list(self.completed_quests)
         }
     
-    def _item_to_dict(self, item: Item) -> Dict:
-        """Convert item to dictionary"""
+    def export_checkpoint(self) -> Dict:
+        """Full state wrapped as a delta-stream checkpoint"""
         return {
-            "name": item.name,
-            "description": item.description,
-            "weight": item.weight,
-            "value": item.value,
-            "usable": item.usable,
-            "consumable": item.consumable,
-            "item_type": item.item_type,
-            "stats": item.stats,
-            "durability": item.durability,
-            "max_durability": item.max_durability,
-            "rarity": item.rarity,
-            "special_effects": item.special_effects
+            "type": "full",
+            "version": self._state_version,
+            "history_totals": dict(self._history_totals),
+            "state": self.save_game_state()
         }
     
-    def load_game_state(self, state_data: Dict):
-        """Load game state from dictionary"""
-        self.player_name = state_data.get("player_name", "Pahlawan")
-        self.current_location = state_data.get("current_location", "hutan")
-        self.health = state_data.get("health", 100)
-        self.max_health = state_data.get("max_health", 100)
-        self.level = state_data.get("level", 1)
-        self.experience = state_data.get("experience", 0)
-        self.gold = state_data.get("gold", 50)
-        self.game_over = state_data.get("game_over", False)
-        self.play_time = state_data.get("play_time", 0)
-        
-        # Load inventory
-        self.inventory = []
-        for item_data in state_data.get("inventory", []):
-            self.inventory.append(self._dict_to_item(item_data))
-        
-        # Load crafting data
-        self.crafting_materials = state_data.get("crafting_materials", {})
-        self.crafting_tools = state_data.get("crafting_tools", [])
-        self.crafting_skills = state_data.get("crafting_skills", {})
-        self.merchant_reputation = state_data.get("merchant_reputation", {})
-        
-        # Load combat stats
-        combat_data = state_data.get("combat_stats", {})
-        self.combat_stats = CombatStats(
-            health=combat_data.get("health", 100),
-            max_health=combat_data.get("max_health", 100),
-            attack=combat_data.get("attack", 10),
-            defense=combat_data.get("defense", 5),
-            speed=combat_data.get("speed", 8),
-            critical_chance=combat_data.get("critical_chance", 0.1),
-            dodge_chance=combat_data.get("dodge_chance", 0.05),
-            mana=combat_data.get("mana", 0),
-            max_mana=combat_data.get("max_mana", 0)
-        )
+    def export_delta(self, since_version: int, history_totals: Mapping[str, int]) -> Optional[Dict]:
+        """Sections changed after since_version, or None if a full checkpoint is needed.
+
+        history_totals are the totals from the delta or checkpoint at since_version;
+        histories are sent as the entries appended since then.
+        """
+        if since_version < self._full_version:
+            return None
+        changed = {section for section, version in self._section_versions.items() if version > since_version}
+        items = ItemTable()
         
-        # Load locations
-        locations_data = state_data.get("locations", {})
-        for name, loc_data in locations_data.items():
-            if name in self.locations:
-                loc = self.locations[name]
-                loc.visited = loc_data.get("visited", False)
-                loc.items = [self._dict_to_item(item_data) for item_data in loc_data.get("items", [])]
-                loc.npcs = loc_data.get("npcs", [])
-                loc.monsters = loc_data.get("monsters", [])
-                loc.crafting_stations = loc_data.get("crafting_stations", [])
-                loc.merchants = loc_data.get("merchants", [])
+        sections: Dict[str, object] = {}
+        if "player" in changed:
+            sections["player"] = self._player_section()
+        if "combat_stats" in changed:
+            sections["combat_stats"] = self._combat_stats_section()
+        if "inventory" in changed:
+            sections["inventory"] = [items.reference(item) for item in self.inventory]
+        if "crafting" in changed:
+            sections["crafting"] = self._crafting_section()
+        if "quests" in changed:
+            sections["quests"] = self._quests_section(items)
+        if "locations" in changed:
+            sections["locations"] = {
+                name: LOCATION_CODEC.encode_full(self.locations.peek(name), items)
+                for name, version in self._location_versions.items()
+                if version > since_version and name in self.locations
+            }
+        for name in HISTORY_LIMITS:
+            if name not in changed:
+                continue
+            history = getattr(self, name)
+            appended = self._history_totals[name] - history_totals.get(name, 0)
+            if self._history_resets.get(name, 0) > since_version or not 0 <= appended <= len(history):
+                sections[name] = {"replace": list(history)}
+            else:
+                sections[name] = {"append": history.tail(appended)}
         
-        # Load quests
-        quests_data = state_data.get("quests", [])
-        for i, quest_data in enumerate(quests_data):
-            if i < len(self.quests):
-                quest = self.quests[i]
-                quest.completed = quest_data.get("completed", False)
-                quest.started = quest_data.get("started", False)
+        delta = {
+            "type": "delta",
+            "base": since_version,
+            "version": self._state_version,
+            "history_totals": dict(self._history_totals),
+            "sections": sections
+        }
+        if items.definitions:
+            delta["item_definitions"] = items.definitions
+        return delta
+    
+    @_event("delta")
+    def apply_delta(self, delta: Dict):
+        """Apply a checkpoint or delta produced by another GameState"""
+        if delta["type"] == "full":
+            self.load_game_state(delta["state"])
+            return
         
-        self.completed_quests = set(state_data.get("completed_quests", []))
-        self.conversation_history = state_data.get("conversation_history", [])
-        self.player_actions = state_data.get("player_actions", [])
+        items = ItemTable(delta.get("item_definitions", {}))
+        sections = delta["sections"]
+        # Player sections may leave fields out (the timeline keeps play time running)
+        for name, value in sections.get("player", {}).items():
+            setattr(self, name, value)
+        if "combat_stats" in sections:
+            self.combat_stats = COMBAT_STATS_CODEC.new_full(sections["combat_stats"])
+        if "inventory" in sections:
+            self.inventory = Inventory(items.item(item_data) for item_data in sections["inventory"])
+        if "crafting" in sections:
+            CRAFTING_CODEC.apply_full(self, sections["crafting"])
+        if "quests" in sections:
+            self._apply_quests(sections["quests"], items)
+        for name, loc_data in sections.get("locations", {}).items():
+            if loc_data is None:
+                # Back to the shared template
+                self.locations.reset(name)
+            elif isinstance(loc_data, SavedLocation):
+                # Rewound to a location as loaded (only the timeline keeps these)
+                self.locations.defer(name, loc_data, changed=True)
+            else:
+                self._apply_location(name, loc_data, items)
+        for name in HISTORY_LIMITS:
+            if name not in sections:
+                continue
+            change = sections[name]
+            if "replace" in change:
+                setattr(self, name, change["replace"])
+            else:
+                getattr(self, name).extend(change["append"])
+                self._touch(name)
+            self._history_totals[name] = delta["history_totals"][name]
+        self._rebuild_quest_index()
     
-    def _dict_to_item(self, item_data: Dict) -> Item:
-        """Convert dictionary to item"""
-        return Item(
-            name=item_data.get("name", ""),
-            description=item_data.get("description", ""),
-            weight=item_data.get("weight", 1.0),
-            value=item_data.get("value", 0),
-            usable=item_data.get("usable", False),
-            consumable=item_data.get("consumable", False),
-            item_type=item_data.get("item_type", "misc"),
-            stats=item_data.get("stats", {}),
-            durability=item_data.get("durability", 100),
-            max_durability=item_data.get("max_durability", 100),
-            rarity=item_data.get("rarity", "common"),
-            special_effects=item_data.get("special_effects", [])
-        ) 
\ No newline at end of file
+    @_event("load")
+    def load_game_state(self, state_data: Mapping, compact: bool = False):
+        """Load game state from dictionary (either form of save_game_state)"""
+        items = ItemTable(state_data.get("item_definitions", {}))
+        # Loaded state replaces everything and consumers resync from a
+        # checkpoint, so fields are not tracked one by one while loading
+        self._tracking = False
+        try:
+            # Missing fields get their defaults
+            PLAYER_CODEC.apply(self, state_data.get("player", {}) if compact else state_data, items, compact)
+            # play_time already holds the saved sessions; count this one from now
+            self.game_start_time = datetime.now()
+            CRAFTING_CODEC.apply(self, state_data.get("crafting", {}) if compact else state_data, items, compact)
+            
+            # Load inventory (materials are restored from crafting_materials above)
+            self.inventory = Inventory(items.item(item_data, compact) for item_data in state_data.get("inventory", ()))
+            # Older or partial saves without combat stats start from a new player's
+            combat_stats = state_data.get("combat_stats")
+            self.combat_stats = (COMBAT_STATS_CODEC.new(combat_stats, items, compact) if combat_stats is not None
+                                 else _new_combat_stats())
+            
+            # Saved locations on a fresh view of the world template
+            self._initialize_world()
+            for name, loc_data in state_data.get("locations", {}).items():
+                self._apply_location(name, loc_data, items, compact)
+            
+            if "quests" in state_data:
+                self._apply_quests(state_data, items, compact)
+            self.conversation_history = state_data.get("conversation_history", [])
+            self.player_actions = state_data.get("player_actions", [])
+        finally:
+            self._tracking = True
+        self._history_totals = {name: len(getattr(self, name)) for name in HISTORY_LIMITS}
+        self._rebuild_quest_index()
+        self._state_version += 1
+        for name, section in _FIELD_SECTIONS.items():
+            self._section_versions[section] = self._state_version
+            self._watch_field(name, getattr(self, name))
+        self._full_version = self._state_version
+    
+    def _apply_location(self, name: str, loc_data: Mapping, items: ItemTable, compact: bool = False):
+        """Restore a location's saved state; one the world template lacks is added"""
+        # Saved locations are complete, so there is no template copy to patch
+        self.locations[name] = LOCATION_CODEC.new(loc_data, items, compact)
+    
+    def _apply_quests(self, quests_data: Mapping, items: ItemTable, compact: bool = False):
+        """Restore the quests and the completed quest set"""
+        self.quests = [QUEST_CODEC.new(quest_data, items, compact) for quest_data in quests_data.get("quests", ())]
+        self.completed_quests = set(quests_data.get("completed_quests", ()))
+
+# GameState's own fields, as the player and crafting sections of saves and deltas
+PLAYER_CODEC = Codec(GameState, [
+    Field("player_name", "n"),
+    Field("current_location", "l"),
+    Field("health", "h"),
+    Field("max_health", "mh"),
+    Field("level", "lv"),
+    Field("experience", "xp"),
+    Field("gold", "g"),
+    Field("game_over", "o"),
+    Field("play_time", "t", get=GameState.get_play_time)
+])
+CRAFTING_CODEC = Codec(GameState, [
+    Field("crafting_materials", "m", encode=dict, decode=dict),
+    Field("crafting_tools", "t", encode=list, decode=list),
+    Field("crafting_skills", "s", encode=dict, decode=dict),
+    Field("merchant_reputation", "r", encode=dict, decode=dict)
+])
+
+class StateDeltaTracker:
+    """One consumer's position in a GameState's change stream.
+
+    export() returns a full checkpoint the first time, after every
+    `checkpoint_interval` deltas, and whenever the changes can't be
+    expressed as a delta (e.g. after a load); otherwise only the sections
+    that changed since the previous export.
+    """
+    
+    def __init__(self, state: GameState, checkpoint_interval: int = DELTA_CHECKPOINT_INTERVAL):
+        self.state = state
+        self.checkpoint_interval = checkpoint_interval
+        self._version: Optional[int] = None
+        self._history_totals: Dict[str, int] = {}
+        self._deltas_since_checkpoint = 0
+    
+    def export(self) -> Dict:
+        """Next checkpoint or delta for this consumer"""
+        delta = None
+        if self._version is not None and self._deltas_since_checkpoint < self.checkpoint_interval:
+            delta = self.state.export_delta(self._version, self._history_totals)
+        if delta is None:
+            delta = self.state.export_checkpoint()
+            self._deltas_since_checkpoint = 0
+        else:
+            self._deltas_since_checkpoint += 1
+        self._version = delta["version"]
+        self._history_totals = delta["history_totals"]
+        return delta
+    
+    def reset(self):
+        """Force the next export to be a full checkpoint"""
+        self._version = None
+
+TIMELINE_LENGTH = 50
+
+def _history_cell(entry: str, previous: Optional[tuple], limit: int) -> tuple:
+    """Cons cell (entry, length, previous) of a history shared between snapshots"""
+    length = previous[1] + 1 if previous else 1
+    if length > 2 * limit:
+        # Cut the chain so old entries can be collected
+        return _history_chain(_history_entries(previous, limit - 1) + [entry], limit)
+    return (entry, length, previous)
+
+def _history_chain(entries: Iterable[str], limit: int) -> Optional[tuple]:
+    cell = None
+    for entry in entries:
+        cell = _history_cell(entry, cell, limit)
+    return cell
+
+def _history_entries(cell: Optional[tuple], limit: int) -> List[str]:
+    """Last `limit` entries of a history chain, oldest first"""
+    entries = []
+    while cell is not None and len(entries) < limit:
+        entries.append(cell[0])
+        cell = cell[2]
+    entries.reverse()
+    return entries
+
+class StateTimeline:
+    """Per-turn snapshots of a GameState for undo and rewind.
+
+    A snapshot is a PersistentMap from section (or ("locations", name)) to
+    its serialized form, with histories as linked lists that share their
+    tails. Recording a turn serializes only the sections changed since the
+    previous snapshot and shares everything else, so each turn costs memory
+    proportional to what it changed. Rewinding applies only the sections
+    that differ, found by diffing the two maps.
+    """
+    
+    def __init__(self, state: GameState, length: int = TIMELINE_LENGTH):
+        self.state = state
+        self._snapshots: deque = deque(maxlen=length + 1)  # (map, history totals), oldest first
+        self._version: Optional[int] = None
+        self._history_totals: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        """Number of turns that can be rewound"""
+        return max(0, len(self._snapshots) - 1)
+    
+    def record(self):
+        """Snapshot the state at the end of a turn; nothing is stored if it didn't change"""
+        if self._snapshots and self.state.state_version == self._version:
+            return
+        self._snapshots.append(self._capture())
+        self._version = self.state.state_version
+        self._history_totals = self._snapshots[-1][1]
+    
+    def rewind(self, turns: int = 1) -> bool:
+        """Restore the state recorded `turns` turns ago, discarding the later turns"""
+        if not 0 < turns < len(self._snapshots):
+            return False
+        # Changes made since the last record are undone as well
+        if self.state.state_version == self._version:
+            current = self._snapshots[-1][0]
+        else:
+            current = self._capture()[0]
+        for _ in range(turns):
+            self._snapshots.pop()
+        target, history_totals = self._snapshots[-1]
+        self.state.apply_delta(self._restore_delta(current, target, history_totals))
+        self._version = self.state.state_version
+        self._history_totals = history_totals
+        return True
+    
+    def _capture(self) -> Tuple[PersistentMap, Dict[str, int]]:
+        state = self.state
+        delta = None
+        if self._snapshots:
+            delta = state.export_delta(self._version, self._history_totals)
+        if delta is None:
+            base = PersistentMap()
+            # Locations still deferred from a load are kept undecoded
+            sections = self._sections_from_state(state.save_game_state(include_deferred=False))
+            sections["locations"].update(state.locations.deferred())
+            history_totals = dict(state._history_totals)
+        else:
+            base = self._snapshots[-1][0]
+            sections = delta["sections"]
+            history_totals = delta["history_totals"]
+        return base.update(self._entries(sections, base)), history_totals
+    
+    @staticmethod
+    def _sections_from_state(state_data: Dict) -> Dict:
+        """A full save in the section layout of a delta"""
+        return {
+            "player": {name: state_data[name] for name in _PLAYER_FIELDS},
+            "combat_stats": state_data["combat_stats"],
+            "inventory": state_data["inventory"],
+            "crafting": {name: state_data[name] for name in _CRAFTING_FIELDS},
+            "quests": {"quests": state_data["quests"], "completed_quests": state_data["completed_quests"]},
+            "locations": state_data["locations"],
+            **{name: {"replace": state_data[name]} for name in HISTORY_LIMITS}
+        }
+    
+    @staticmethod
+    def _entries(sections: Dict, base: PersistentMap) -> Iterable[Tuple[object, object]]:
+        for name in ("player", "combat_stats", "inventory", "crafting", "quests"):
+            if name in sections:
+                value = sections[name]
+                if name == "player":
+                    # Play time keeps running across an undo
+                    value = {field_name: field_value for field_name, field_value in value.items()
+                             if field_name != "play_time"}
+                yield name, value
+        for location, loc_data in sections.get("locations", {}).items():
+            yield ("locations", location), loc_data
+        for name, limit in HISTORY_LIMITS.items():
+            if name in sections:
+                change = sections[name]
+                if "replace" in change:
+                    yield name, _history_chain(change["replace"], limit)
+                else:
+                    cell = base.get(name)
+                    for entry in change["append"]:
+                        cell = _history_cell(entry, cell, limit)
+                    yield name, cell
+    
+    @staticmethod
+    def _restore_delta(current: PersistentMap, target: PersistentMap, history_totals: Dict[str, int]) -> Dict:
+        """Delta that turns the state captured in current into target"""
+        sections: Dict[str, object] = {}
+        for key, _, value in current.diff(target):
+            if isinstance(key, tuple):
+                sections.setdefault("locations", {})[key[1]] = None if value is PersistentMap.MISSING else value
+            elif key in HISTORY_LIMITS:
+                sections[key] = {"replace": _history_entries(value, HISTORY_LIMITS[key])}
+            elif value is not PersistentMap.MISSING:
+                sections[key] = value
+        return {"type": "delta", "history_totals": history_totals, "sections": sections}
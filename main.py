@@ -1,7 +1,9 @@
+import os
 from game import Game
 
 def main():
-    game = Game()
+    # Set GAME_EVENT_LOG to a file path to record every change and resume after a crash
+    game = Game(event_log_path=os.getenv("GAME_EVENT_LOG"))
     game.start_game()
 
 if __name__ == "__main__":
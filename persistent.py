@@ -0,0 +1,193 @@
+from typing import Any, Iterator, Optional, Tuple
+
+# Hash bits consumed per trie level (32-way branching)
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = 0xFFFFFFFF
+
+_MISSING = object()
+
+class _Node:
+    """Bitmap-indexed trie node: slots hold (key, value) leaves or child nodes"""
+
+    __slots__ = ("bitmap", "slots")
+
+    def __init__(self, bitmap: int, slots: tuple):
+        self.bitmap = bitmap
+        self.slots = slots
+
+    def slot(self, bit: int):
+        """The slot for a bitmap bit, or None if the bit is unset"""
+        if not self.bitmap & bit:
+            return None
+        return self.slots[(self.bitmap & (bit - 1)).bit_count()]
+
+class _Collision:
+    """Leaves whose keys share the full hash"""
+
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, key_hash: int, leaves: tuple):
+        self.hash = key_hash
+        self.leaves = leaves
+
+_EMPTY_NODE = _Node(0, ())
+
+def _hash(key) -> int:
+    return hash(key) & _HASH_MASK
+
+def _entry_hash(entry) -> int:
+    return entry.hash if isinstance(entry, _Collision) else _hash(entry[0])
+
+def _merge(first, first_hash: int, second, second_hash: int, shift: int):
+    """Node holding two entries that landed in the same slot"""
+    if first_hash == second_hash:
+        leaves = first.leaves if isinstance(first, _Collision) else (first,)
+        return _Collision(first_hash, leaves + (second,))
+    first_index = (first_hash >> shift) & _MASK
+    second_index = (second_hash >> shift) & _MASK
+    if first_index == second_index:
+        return _Node(1 << first_index, (_merge(first, first_hash, second, second_hash, shift + _BITS),))
+    slots = (first, second) if first_index < second_index else (second, first)
+    return _Node((1 << first_index) | (1 << second_index), slots)
+
+def _assoc(node, shift: int, key_hash: int, key, value) -> Tuple[Any, bool]:
+    """Path-copied node with key set; returns (node, whether a key was added)"""
+    if isinstance(node, _Collision):
+        if node.hash != key_hash:
+            return _merge(node, node.hash, (key, value), key_hash, shift), True
+        for index, (leaf_key, leaf_value) in enumerate(node.leaves):
+            if leaf_key == key:
+                if leaf_value is value:
+                    return node, False
+                leaves = node.leaves[:index] + ((key, value),) + node.leaves[index + 1:]
+                return _Collision(key_hash, leaves), False
+        return _Collision(key_hash, node.leaves + ((key, value),)), True
+
+    bit = 1 << ((key_hash >> shift) & _MASK)
+    index = (node.bitmap & (bit - 1)).bit_count()
+    if not node.bitmap & bit:
+        slots = node.slots[:index] + ((key, value),) + node.slots[index:]
+        return _Node(node.bitmap | bit, slots), True
+
+    entry = node.slots[index]
+    if isinstance(entry, tuple):
+        if entry[0] == key:
+            if entry[1] is value:
+                return node, False
+            replacement, added = (key, value), False
+        else:
+            replacement = _merge(entry, _hash(entry[0]), (key, value), key_hash, shift + _BITS)
+            added = True
+    else:
+        replacement, added = _assoc(entry, shift + _BITS, key_hash, key, value)
+        if replacement is entry:
+            return node, False
+    return _Node(node.bitmap, node.slots[:index] + (replacement,) + node.slots[index + 1:]), added
+
+def _leaves(entry) -> Iterator[Tuple[Any, Any]]:
+    if entry is None:
+        return
+    if isinstance(entry, tuple):
+        yield entry
+    elif isinstance(entry, _Collision):
+        yield from entry.leaves
+    else:
+        for slot in entry.slots:
+            yield from _leaves(slot)
+
+def _diff(old, new) -> Iterator[Tuple[Any, Any, Any]]:
+    if old is new:
+        return
+    if isinstance(old, _Node) and isinstance(new, _Node):
+        bits = old.bitmap | new.bitmap
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            yield from _diff(old.slot(bit), new.slot(bit))
+        return
+    # Mismatched shapes only occur near the leaves, so these are small
+    old_items = dict(_leaves(old))
+    new_items = dict(_leaves(new))
+    for key, value in old_items.items():
+        new_value = new_items.get(key, _MISSING)
+        if new_value is not value:
+            yield key, value, new_value
+    for key, value in new_items.items():
+        if key not in old_items:
+            yield key, _MISSING, value
+
+class PersistentMap:
+    """Immutable hash map with structural sharing (a HAMT).
+
+    assoc() returns a new map that shares every untouched subtree with the
+    old one, so keeping many versions costs only the changed paths
+    (O(log32 n) nodes per change). Values are compared by identity.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    MISSING = _MISSING
+
+    def __init__(self, root: _Node = _EMPTY_NODE, size: int = 0):
+        self._root = root
+        self._size = size
+
+    def assoc(self, key, value) -> "PersistentMap":
+        """Map with key set to value"""
+        root, added = _assoc(self._root, 0, _hash(key), key, value)
+        if root is self._root:
+            return self
+        return PersistentMap(root, self._size + added)
+
+    def update(self, items) -> "PersistentMap":
+        """Map with every (key, value) pair set"""
+        result = self
+        for key, value in items:
+            result = result.assoc(key, value)
+        return result
+
+    def get(self, key, default: Optional[Any] = None):
+        key_hash = _hash(key)
+        node = self._root
+        shift = 0
+        while True:
+            if isinstance(node, _Collision):
+                for leaf_key, leaf_value in node.leaves:
+                    if leaf_key == key:
+                        return leaf_value
+                return default
+            entry = node.slot(1 << ((key_hash >> shift) & _MASK))
+            if entry is None:
+                return default
+            if isinstance(entry, tuple):
+                return entry[1] if entry[0] == key else default
+            node = entry
+            shift += _BITS
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        for key, _ in _leaves(self._root):
+            yield key
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        return _leaves(self._root)
+
+    def diff(self, other: "PersistentMap") -> Iterator[Tuple[Any, Any, Any]]:
+        """(key, value here, value in other) for every key that differs.
+
+        Subtrees shared by both maps are skipped without being visited; a
+        key missing on one side is reported as PersistentMap.MISSING.
+        """
+        return _diff(self._root, other._root)
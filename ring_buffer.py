@@ -0,0 +1,33 @@
+from collections import deque
+from itertools import islice
+from typing import List
+
+class RingBuffer(deque):
+    """Bounded history with O(1) append; the oldest entry drops out once full.
+
+    Behaves like the plain lists it replaces where callers rely on it:
+    slicing returns a list (so `history[-3:]` still formats as a list), and
+    tail(n) copies only the last n entries. Serialize with list(buffer).
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return super().__getitem__(index)
+        size = len(self)
+        start, stop, step = index.indices(size)
+        if step != 1:
+            return list(self)[index]
+        if start >= stop:
+            return []
+        if start >= size - stop:
+            # Tail slices (the common case) walk in from the right end
+            return list(islice(reversed(self), size - stop, size - start))[::-1]
+        return list(islice(self, start, stop))
+
+    def tail(self, count: int) -> List:
+        """The last count entries, oldest first"""
+        if count <= 0:
+            return []
+        return list(islice(reversed(self), count))[::-1]
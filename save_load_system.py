@@ -1,12 +1,244 @@
 import json
-import pickle
+import mmap
 import os
 import base64
 import hashlib
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Any, Tuple
+from dataclasses import dataclass
+import functools
 import zlib
+import struct
+import threading
+from save_migrations import SAVE_SCHEMA_VERSION, schema_version, upgrade
+
+SAVE_MAGIC = b"GSAV"
+SAVE_FORMAT_VERSION = 3
+# Version 2: magic, format version, sha256 of the compact JSON payload, payload length
+_ENVELOPE_HEADER = struct.Struct("<4sH32sI")
+# Version 3: magic, format version, section table offset, section table length
+_CONTAINER_HEADER = struct.Struct("<4sHII")
+# Sections holding the compact game state, one per top-level key; every
+# location also gets its own "locations/<name>" section
+SAVE_SECTIONS = ("player", "inventory", "crafting", "combat_stats", "quests", "completed_quests",
+                 "conversation_history", "player_actions", "item_definitions")
+# Schemas 1 and 2: the game_state keys stored in each section
+_GROUPED_SAVE_SECTIONS = {
+    "player": ("player_name", "current_location", "health", "max_health", "level",
+               "experience", "gold", "game_start_time", "game_over", "play_time"),
+    "inventory": ("inventory",),
+    "quests": ("quests", "completed_quests"),
+    "history": ("conversation_history", "player_actions"),
+    "crafting": ("crafting_materials", "crafting_tools", "crafting_skills", "merchant_reputation"),
+    "combat": ("combat_stats",)
+}
+LOCATION_SECTION_PREFIX = "locations/"
+# A differential save references at most this many earlier files before a full checkpoint
+DELTA_CHAIN_LIMIT = 8
+SAVE_PART_SUFFIX = ".savepart"
+_STREAM_CHUNK_SIZE = 64 * 1024
+# Windows cannot replace or delete a mapped file, and a lazily loaded game
+# keeps its save mapped until every location has been visited
+_MAP_SAVE_FILES = os.name != "nt"
+_COMPACT_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+SAVE_INDEX_FILE = "index.json"
+SAVE_INDEX_VERSION = 1
+SAVE_STORE_DIRECTORY = "store"
+
+class SaveCorruptedError(ValueError):
+    """Save payload doesn't match its checksum"""
+
+class SaveReader:
+    """Sectioned (version 3) save container.
+
+    Opening reads only the header and section table. Each section is
+    compressed and checksummed on its own and decoded the first time it is
+    requested; game_state gives a lazy view shaped like the JSON saves.
+
+    A differential save's table lists only the sections written to it, plus
+    its "parent" file and any sections "removed" since; the rest are found
+    by walking the parent tables (at most DELTA_CHAIN_LIMIT files).
+    """
+    
+    def __init__(self, data, unmask: Callable[[bytes], bytes], source: str = "<memory>"):
+        magic, version, table_offset, table_length = _CONTAINER_HEADER.unpack_from(data, 0)
+        if magic != SAVE_MAGIC or version != 3:
+            raise ValueError(f"{source} is not a sectioned save")
+        self._data = data
+        self._unmask = unmask
+        self.source = source
+        table_bytes = memoryview(data)[table_offset:table_offset + table_length]
+        table = _parse_table(table_bytes)
+        self.chain: int = table["chain"]  # differential saves since the last full checkpoint
+        self._referenced: Dict[str, Any] = {}  # part file name -> its bytes
+        self._table: Dict[str, Dict] = self._resolve_chain(table)
+        self._cache: Dict[str, Any] = {}
+        self.checksum = hashlib.sha256(table_bytes).hexdigest()
+        self.game_state = _SavedGameState(self)
+    
+    @staticmethod
+    def is_container(data) -> bool:
+        return len(data) >= _CONTAINER_HEADER.size and _CONTAINER_HEADER.unpack_from(data, 0)[:2] == (SAVE_MAGIC, 3)
+    
+    def __contains__(self, name) -> bool:
+        return name in self._table
+    
+    def section_names(self) -> List[str]:
+        return list(self._table)
+    
+    def _resolve_chain(self, table: Dict) -> Dict[str, Dict]:
+        """Section entries of this save, following parent tables; inherited ones get a "ref".
+
+        The parts are opened here, so sections decoded later (e.g. a deferred
+        location) are still readable after a checkpoint deletes the parts.
+        """
+        chain = [(None, table)]
+        while chain[-1][1].get("parent"):
+            if len(chain) > DELTA_CHAIN_LIMIT:
+                raise SaveCorruptedError(f"Save chain of {self.source} is too long")
+            parent_name = chain[-1][1]["parent"]
+            data, parent_table = _open_part(os.path.join(os.path.dirname(self.source), parent_name))
+            self._referenced[parent_name] = data
+            chain.append((parent_name, parent_table))
+        
+        resolved: Dict[str, Dict] = {}
+        for file_name, chain_table in reversed(chain):
+            for name in chain_table.get("removed", ()):
+                resolved.pop(name, None)
+            for entry in chain_table["sections"]:
+                resolved[entry["name"]] = dict(entry, ref=file_name) if file_name else entry
+        return resolved
+    
+    def entry(self, name: str) -> Dict:
+        """Table entry of a section"""
+        return self._table[name]
+    
+    def stored(self, name: str) -> memoryview:
+        """A section's bytes as written: compressed, masked, covered by its sha256"""
+        entry = self._table[name]
+        data = self._referenced[entry["ref"]] if "ref" in entry else self._data
+        return memoryview(data)[entry["offset"]:entry["offset"] + entry["length"]]
+    
+    def verify(self):
+        """Check every section's stored bytes against its checksum (nothing is decompressed)"""
+        for name, entry in self._table.items():
+            if hashlib.sha256(self.stored(name)).hexdigest() != entry["sha256"]:
+                raise SaveCorruptedError(f"Section '{name}' checksum mismatch")
+    
+    def section(self, name: str, cache: bool = True) -> Any:
+        """Decoded section value; pass cache=False for sections read only once"""
+        if name in self._cache:
+            return self._cache[name]
+        try:
+            value = json.loads(_unmask_and_decompress(self.stored(name), self._unmask))
+        except zlib.error as e:
+            raise SaveCorruptedError(f"Failed to decompress section '{name}': {e}")
+        if cache:
+            self._cache[name] = value
+        return value
+
+def map_save_file(path: str):
+    """A save file's bytes, memory-mapped where possible so only the pages read are loaded"""
+    with open(path, 'rb') as f:
+        if _MAP_SAVE_FILES:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                pass  # empty, or on a file system that cannot be mapped
+        return f.read()
+
+def _unmask_and_decompress(stored, unmask: Callable[[bytes, int], bytes]) -> bytearray:
+    """Undo the XOR mask and zlib chunk by chunk, so only the output is ever held whole"""
+    view = memoryview(stored)
+    decompressor = zlib.decompressobj()
+    payload = bytearray()
+    for start in range(0, len(view), _STREAM_CHUNK_SIZE):
+        payload += decompressor.decompress(unmask(view[start:start + _STREAM_CHUNK_SIZE], start))
+    payload += decompressor.flush()
+    if not decompressor.eof:
+        raise zlib.error("incomplete or truncated stream")
+    return payload
+
+def stored_entry(entry: Dict) -> Dict:
+    """The parts of a table entry that describe the section itself, not where it is stored"""
+    return {key: value for key, value in entry.items() if key not in ("offset", "length", "ref")}
+
+def _parse_table(table_bytes) -> Dict:
+    table = json.loads(bytes(table_bytes))
+    if isinstance(table, list):
+        # Written before differential saves
+        table = {"chain": 0, "sections": table}
+    return table
+
+def _open_part(path: str) -> Tuple[Any, Dict]:
+    """A save part's bytes (mapped, so its sections are not read yet) and its section table"""
+    try:
+        data = map_save_file(path)
+        magic, version, table_offset, table_length = _CONTAINER_HEADER.unpack_from(data, 0)
+    except (OSError, struct.error) as e:
+        raise SaveCorruptedError(f"Missing or unreadable save part {os.path.basename(path)}: {e}")
+    if magic != SAVE_MAGIC or version != 3:
+        raise SaveCorruptedError(f"{os.path.basename(path)} is not a sectioned save")
+    return data, _parse_table(memoryview(data)[table_offset:table_offset + table_length])
+
+class _SavedGameState(Mapping):
+    """game_state keys of a sectioned save, decoded from their section on access"""
+    
+    def __init__(self, reader: SaveReader):
+        self._reader = reader
+        self._grouped: Optional[bool] = None
+        self._sections = {key: section for section, keys in _GROUPED_SAVE_SECTIONS.items() for key in keys}
+        self._locations = _SavedLocations(reader)
+    
+    def _is_grouped(self) -> bool:
+        if self._grouped is None:
+            self._grouped = schema_version(self._reader.section("metadata")) < 3
+        return self._grouped
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == "locations":
+            return self._locations
+        if not self._is_grouped():
+            if key not in SAVE_SECTIONS or key not in self._reader:
+                raise KeyError(key)
+            # Each key is its own section, read once by the load
+            return self._reader.section(key, cache=False)
+        section = self._sections.get(key)
+        if section is None or section not in self._reader:
+            raise KeyError(key)
+        return self._reader.section(section)[key]
+    
+    def __iter__(self) -> Iterator[str]:
+        # Saves of an older schema may lack sections or keys
+        if not self._is_grouped():
+            yield from (section for section in SAVE_SECTIONS if section in self._reader)
+        else:
+            for section in _GROUPED_SAVE_SECTIONS:
+                if section in self._reader:
+                    yield from self._reader.section(section)
+        yield "locations"
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+class _SavedLocations(Mapping):
+    """Saved locations by name; each is its own section"""
+    
+    def __init__(self, reader: SaveReader):
+        self._reader = reader
+        self._names = [name[len(LOCATION_SECTION_PREFIX):] for name in reader.section_names()
+                       if name.startswith(LOCATION_SECTION_PREFIX)]
+    
+    def __getitem__(self, name: str) -> Dict:
+        if f"{LOCATION_SECTION_PREFIX}{name}" not in self._reader:
+            raise KeyError(name)
+        return self._reader.section(f"{LOCATION_SECTION_PREFIX}{name}", cache=False)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+    
+    def __len__(self) -> int:
+        return len(self._names)
 
 @dataclass
 class SaveMetadata:
@@ -24,104 +256,299 @@ class SaveLoadSystem:
         self.save_directory = save_directory
         self.game_version = "1.0.0"
         self.encryption_key = "GameAI_Petualangan_Secret_Key_2024"
+        # Sidecar catalog of save metadata, so listing saves needs no decryption
+        self.index_path = os.path.join(save_directory, SAVE_INDEX_FILE)
+        # Saves may be written from the autosave worker as well as the game
+        self._write_lock = threading.RLock()
+        self._store = None
         
         # Create save directory if it doesn't exist
         if not os.path.exists(save_directory):
             os.makedirs(save_directory)
     
+    @property
+    def store(self):
+        """Deduplicated backup store under <save_directory>/store, opened on first use"""
+        if self._store is None:
+            from save_store import SaveStore
+            self._store = SaveStore(os.path.join(self.save_directory, SAVE_STORE_DIRECTORY), self)
+        return self._store
+    
     def _generate_checksum(self, data: str) -> str:
         """Generate checksum for data integrity"""
         return hashlib.sha256(data.encode()).hexdigest()
     
+    def _xor_with_key(self, data: bytes, offset: int = 0) -> bytes:
+        """XOR data with the repeating key as one big-integer operation.
+
+        offset is data's position in a longer stream, so chunks can be masked separately.
+        """
+        if not data:
+            return b""
+        key_bytes = self.encryption_key.encode('utf-8')
+        shift = offset % len(key_bytes)
+        key_bytes = key_bytes[shift:] + key_bytes[:shift]
+        repeats, remainder = divmod(len(data), len(key_bytes))
+        keystream = key_bytes * repeats + key_bytes[:remainder]
+        mixed = int.from_bytes(data, "little") ^ int.from_bytes(keystream, "little")
+        return mixed.to_bytes(len(data), "little")
+    
     def _encrypt_data(self, data: str) -> str:
         """Simple encryption for save data"""
         # Convert to bytes and compress
-        data_bytes = data.encode('utf-8')
-        compressed = zlib.compress(data_bytes)
-        
-        # Simple XOR encryption with key
-        key_bytes = self.encryption_key.encode('utf-8')
-        encrypted = bytearray()
+        compressed = zlib.compress(data.encode('utf-8'))
         
-        for i, byte in enumerate(compressed):
-            key_byte = key_bytes[i % len(key_bytes)]
-            encrypted.append(byte ^ key_byte)
-        
-        # Encode to base64
-        return base64.b64encode(bytes(encrypted)).decode('utf-8')
+        # Simple XOR encryption with key, then base64
+        return base64.b64encode(self._xor_with_key(compressed)).decode('utf-8')
     
     def _decrypt_data(self, encrypted_data: str) -> str:
         """Decrypt save data"""
         try:
-            # Decode from base64
-            encrypted_bytes = base64.b64decode(encrypted_data.encode('utf-8'))
-            
-            # XOR decryption
-            key_bytes = self.encryption_key.encode('utf-8')
-            decrypted = bytearray()
-            
-            for i, byte in enumerate(encrypted_bytes):
-                key_byte = key_bytes[i % len(key_bytes)]
-                decrypted.append(byte ^ key_byte)
-            
-            # Decompress
-            decompressed = zlib.decompress(bytes(decrypted))
+            # Decode from base64, undo the XOR and decompress
+            encrypted_bytes = base64.b64decode(encrypted_data)
+            decompressed = zlib.decompress(self._xor_with_key(encrypted_bytes))
             return decompressed.decode('utf-8')
         except Exception as e:
             raise ValueError(f"Failed to decrypt save data: {e}")
     
+    def _write_section(self, f, payload: bytes) -> Dict:
+        """Stream a section's JSON bytes through zlib and the XOR mask into f; returns its table entry"""
+        offset = f.tell()
+        compressor = zlib.compressobj()
+        digest = hashlib.sha256()
+        written = 0
+        
+        def emit(chunk: bytes):
+            nonlocal written
+            if chunk:
+                masked = self._xor_with_key(chunk, written)
+                digest.update(masked)
+                f.write(masked)
+                written += len(masked)
+        
+        view = memoryview(payload)
+        for start in range(0, len(view), _STREAM_CHUNK_SIZE):
+            emit(compressor.compress(view[start:start + _STREAM_CHUNK_SIZE]))
+        emit(compressor.flush())
+        return {"offset": offset, "length": written, "sha256": digest.hexdigest()}
+    
+    def _write_container(self, save_file: str, sections: Iterable[Tuple[str, Any]],
+                         parent: Optional[SaveReader] = None) -> str:
+        """Write a sectioned save atomically; returns the checksum of its section table.
+
+        With a parent (the current head of this save) only sections whose JSON
+        changed are written; the parent's file is kept as a numbered .savepart
+        next to the new head and the rest is resolved through it.
+        """
+        part_name = None
+        if parent:
+            base_name = os.path.splitext(os.path.basename(save_file))[0]
+            part_name = f"{base_name}.{parent.chain}{SAVE_PART_SUFFIX}"
+        temp_path = f"{save_file}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(_CONTAINER_HEADER.pack(SAVE_MAGIC, SAVE_FORMAT_VERSION, 0, 0))
+            entries = []
+            names = set()
+            for name, value in sections:
+                names.add(name)
+                payload = _COMPACT_ENCODER.encode(value).encode('utf-8')
+                raw_digest = hashlib.sha256(payload).hexdigest()
+                if parent and name in parent and parent.entry(name).get("raw_sha256") == raw_digest:
+                    continue  # unchanged, already on disk in the chain
+                entries.append({"name": name, **self._write_section(f, payload), "raw_sha256": raw_digest})
+            table = {"chain": 0, "sections": entries}
+            if parent:
+                table.update(chain=parent.chain + 1, parent=part_name,
+                             removed=[name for name in parent.section_names() if name not in names])
+            table_bytes = self._finish_container(f, table)
+        
+        if parent:
+            # Keep the old head as a part; linking first means a crash never leaves no head
+            part_path = os.path.join(os.path.dirname(save_file), part_name)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            try:
+                os.link(save_file, part_path)
+            except OSError:
+                import shutil
+                shutil.copyfile(save_file, part_path)
+        os.replace(temp_path, save_file)
+        return hashlib.sha256(table_bytes).hexdigest()
+    
+    def _finish_container(self, f, table: Dict) -> bytes:
+        """Append the section table, fill in the header and sync f; returns the table bytes"""
+        table_bytes = json.dumps(table, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+        table_offset = f.tell()
+        f.write(table_bytes)
+        f.seek(0)
+        f.write(_CONTAINER_HEADER.pack(SAVE_MAGIC, SAVE_FORMAT_VERSION, table_offset, len(table_bytes)))
+        # On disk before the rename, so a crash leaves the old save or the new one
+        f.flush()
+        os.fsync(f.fileno())
+        return table_bytes
+    
+    def _write_stored_container(self, save_file: str, sections: Iterable[Tuple[Dict, bytes]]) -> str:
+        """Write a full sectioned save from (entry, stored bytes) pairs without re-encoding them"""
+        temp_path = f"{save_file}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(_CONTAINER_HEADER.pack(SAVE_MAGIC, SAVE_FORMAT_VERSION, 0, 0))
+            entries = []
+            for entry, stored in sections:
+                entries.append({**entry, "offset": f.tell(), "length": len(stored)})
+                f.write(stored)
+            table_bytes = self._finish_container(f, {"chain": 0, "sections": entries})
+        os.replace(temp_path, save_file)
+        return hashlib.sha256(table_bytes).hexdigest()
+    
+    def _remove_save_parts(self, save_name: str):
+        """Delete the earlier files a differential save chain referenced"""
+        prefix = f"{save_name}."
+        for filename in os.listdir(self.save_directory):
+            if filename.startswith(prefix) and filename.endswith(SAVE_PART_SUFFIX) \
+                    and filename[len(prefix):-len(SAVE_PART_SUFFIX)].isdigit():
+                os.remove(os.path.join(self.save_directory, filename))
+    
+    def _delta_parent(self, save_file: str) -> Optional[SaveReader]:
+        """The current head to save a delta against, or None when a full checkpoint is due"""
+        try:
+            data = map_save_file(save_file)
+        except OSError:
+            return None
+        if not SaveReader.is_container(data):
+            return None
+        try:
+            parent = SaveReader(data, self._xor_with_key, save_file)
+            # Only hashes the stored bytes; a delta must not reference damaged sections
+            parent.verify()
+        except ValueError:
+            # A missing or damaged part: a full checkpoint replaces the chain
+            return None
+        return parent if parent.chain + 1 < DELTA_CHAIN_LIMIT else None
+    
+    def _write_consolidated(self, source_file: str, dest_file: str) -> str:
+        """Copy a save into a self-contained file (differential saves are resolved)"""
+        data = map_save_file(source_file)
+        if not SaveReader.is_container(data):
+            import shutil
+            shutil.copyfile(source_file, dest_file)
+            return dest_file
+        reader = SaveReader(data, self._xor_with_key, source_file)
+        reader.verify()
+        self._write_stored_container(dest_file, ((stored_entry(reader.entry(name)), reader.stored(name))
+                                                 for name in reader.section_names()))
+        return dest_file
+    
+    def _read_save_file(self, save_file: str, verify: bool = True) -> Dict:
+        """Read a save document of any version; metadata gets the checksum as hex.
+
+        The file is memory-mapped: a sectioned save decodes each section from
+        the mapping when it is requested, so loading never holds a copy of
+        the whole file.
+        """
+        data = map_save_file(save_file)
+        if SaveReader.is_container(data):
+            reader = SaveReader(data, self._xor_with_key, save_file)
+            if verify:
+                reader.verify()
+            metadata = dict(reader.section("metadata"), checksum=reader.checksum)
+            return {"game_state": reader.game_state, "save_metadata": metadata}
+        if data[:len(SAVE_MAGIC)] != SAVE_MAGIC:
+            return self._read_legacy_save(bytes(data), verify)
+        
+        # Version 2: one checksummed JSON payload
+        _, version, digest, length = _ENVELOPE_HEADER.unpack_from(data, 0)
+        if version != 2:
+            raise ValueError(f"Format save versi {version} tidak didukung")
+        try:
+            payload = _unmask_and_decompress(memoryview(data)[_ENVELOPE_HEADER.size:], self._xor_with_key)
+        except zlib.error as e:
+            raise SaveCorruptedError(f"Failed to decompress save data: {e}")
+        if verify and (len(payload) != length or hashlib.sha256(payload).digest() != digest):
+            raise SaveCorruptedError("Save checksum mismatch")
+        save_data = json.loads(payload)
+        save_data["save_metadata"]["checksum"] = digest.hex()
+        return save_data
+    
+    def _read_legacy_save(self, data: bytes, verify: bool) -> Dict:
+        """Read a version 1 save: base64 text with the checksum of the pretty-printed JSON inside"""
+        save_data = json.loads(self._decrypt_data(data.decode('ascii')))
+        if verify:
+            metadata = save_data["save_metadata"]
+            verify_data = dict(save_data)
+            verify_data["save_metadata"] = {key: value for key, value in metadata.items() if key != "checksum"}
+            if self._generate_checksum(json.dumps(verify_data, indent=2)) != metadata["checksum"]:
+                raise SaveCorruptedError("Save checksum mismatch")
+        return save_data
+    
     def save_game(self, game_state, save_name: str = None) -> Dict:
         """Save game state to file"""
         try:
-            # Generate save name if not provided
-            if not save_name:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                save_name = f"save_{timestamp}"
-            
-            # Prepare save data
-            save_data = {
-                "game_state": self._serialize_game_state(game_state),
-                "save_metadata": {
-                    "save_name": save_name,
-                    "player_name": game_state.player_name,
-                    "level": game_state.level,
-                    "location": game_state.current_location,
-                    "play_time": getattr(game_state, 'play_time', 0),
-                    "save_date": datetime.now().isoformat(),
-                    "game_version": self.game_version
-                }
-            }
-            
-            # Convert to JSON
-            json_data = json.dumps(save_data, indent=2)
-            
-            # Generate checksum
-            checksum = self._generate_checksum(json_data)
-            save_data["save_metadata"]["checksum"] = checksum
-            
-            # Encrypt data
-            encrypted_data = self._encrypt_data(json.dumps(save_data, indent=2))
-            
-            # Save to file
-            save_file = os.path.join(self.save_directory, f"{save_name}.save")
-            with open(save_file, 'w') as f:
-                f.write(encrypted_data)
-            
-            return {
-                "success": True,
-                "save_name": save_name,
-                "file_path": save_file,
-                "message": f"Game berhasil disimpan sebagai '{save_name}'"
-            }
-            
+            return self.write_snapshot(self.snapshot_game(game_state, save_name))
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Gagal menyimpan game: {str(e)}"
             }
     
-    def load_game(self, save_name: str) -> Dict:
-        """Load game state from file"""
+    def snapshot_game(self, game_state, save_name: str = None) -> Dict:
+        """Copy game state into plain data for write_snapshot.
+
+        Shares nothing mutable with game_state, so the snapshot can be written
+        from another thread while the game goes on.
+        """
+        # Generate save name if not provided
+        if not save_name:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            save_name = f"save_{timestamp}"
+        
+        # Prepare save data
+        serialized = game_state.save_game_state(compact=True)
+        metadata = {
+            "save_name": save_name,
+            "player_name": game_state.player_name,
+            "level": game_state.level,
+            "location": game_state.current_location,
+            "play_time": getattr(game_state, 'play_time', 0),
+            "save_date": datetime.now().isoformat(),
+            "game_version": self.game_version,
+            "schema_version": SAVE_SCHEMA_VERSION
+        }
+        return {"save_name": save_name, "metadata": metadata, "sections": self._save_sections(metadata, serialized)}
+    
+    def _save_sections(self, metadata: Dict, serialized: Mapping) -> List[Tuple[str, Any]]:
+        """(section name, value) pairs of a sectioned save"""
+        sections = [("metadata", metadata)]
+        sections.extend((section, serialized[section]) for section in SAVE_SECTIONS if section in serialized)
+        sections.extend((f"{LOCATION_SECTION_PREFIX}{name}", loc_data) for name, loc_data in serialized["locations"].items())
+        return sections
+    
+    def write_snapshot(self, snapshot: Dict) -> Dict:
+        """Encode, compress, mask and write a snapshot_game result"""
+        save_name = snapshot["save_name"]
+        metadata = snapshot["metadata"]
+        save_file = os.path.join(self.save_directory, f"{save_name}.save")
+        with self._write_lock:
+            # Each section checksummed on its own; unchanged sections are
+            # referenced from the previous save of this name
+            parent = self._delta_parent(save_file)
+            metadata["checksum"] = self._write_container(save_file, snapshot["sections"], parent)
+            if parent is None:
+                # A full checkpoint needs none of the earlier parts
+                self._remove_save_parts(save_name)
+            self._update_index(save_name, save_file, metadata)
+        
+        return {
+            "success": True,
+            "save_name": save_name,
+            "file_path": save_file,
+            "message": f"Game berhasil disimpan sebagai '{save_name}'"
+        }
+    
+    def load_game(self, save_name: str, game_state=None) -> Dict:
+        """Load game state from file (into game_state if given, else a new GameState).
+
+        Locations of sectioned saves are decoded only when the game first visits them.
+        """
         try:
             save_file = os.path.join(self.save_directory, f"{save_name}.save")
             
@@ -131,40 +558,25 @@ class SaveLoadSystem:
                     "error": f"Save file '{save_name}' tidak ditemukan"
                 }
             
-            # Read encrypted data
-            with open(save_file, 'r') as f:
-                encrypted_data = f.read()
-            
-            # Decrypt data
-            json_data = self._decrypt_data(encrypted_data)
-            save_data = json.loads(json_data)
-            
-            # Verify checksum
-            metadata = save_data["save_metadata"]
-            expected_checksum = metadata["checksum"]
-            
-            # Recreate data without checksum for verification
-            verify_data = save_data.copy()
-            verify_data["save_metadata"] = metadata.copy()
-            del verify_data["save_metadata"]["checksum"]
-            
-            actual_checksum = self._generate_checksum(json.dumps(verify_data, indent=2))
-            
-            if actual_checksum != expected_checksum:
+            try:
+                save_data = self._read_save_file(save_file)
+            except SaveCorruptedError:
                 return {
                     "success": False,
                     "error": "Save file corrupted or tampered with"
                 }
+            metadata = save_data["save_metadata"]
             
-            # Check game version compatibility
-            if metadata["game_version"] != self.game_version:
+            # Older schemas are migrated while loading; only newer ones are refused
+            version = schema_version(metadata)
+            if version > SAVE_SCHEMA_VERSION:
                 return {
                     "success": False,
-                    "error": f"Save file version {metadata['game_version']} tidak kompatibel dengan game version {self.game_version}"
+                    "error": f"Save file dibuat oleh game versi {metadata['game_version']} yang lebih baru; perbarui game untuk memuatnya"
                 }
             
             # Deserialize game state
-            game_state = self._deserialize_game_state(save_data["game_state"])
+            game_state = self._deserialize_game_state(save_data["game_state"], game_state, version)
             
             return {
                 "success": True,
@@ -179,169 +591,169 @@ class SaveLoadSystem:
                 "error": f"Gagal memuat game: {str(e)}"
             }
     
-    def _serialize_game_state(self, game_state) -> Dict:
-        """Serialize game state to dictionary"""
-        # Basic game state data
-        serialized = {
-            "player_name": game_state.player_name,
-            "current_location": game_state.current_location,
-            "health": game_state.health,
-            "max_health": game_state.max_health,
-            "level": game_state.level,
-            "experience": game_state.experience,
-            "gold": game_state.gold,
-            "game_start_time": game_state.game_start_time.isoformat() if hasattr(game_state, 'game_start_time') else None,
-            "game_over": game_state.game_over,
-            "conversation_history": game_state.conversation_history,
-            "player_actions": game_state.player_actions,
-            "completed_quests": list(game_state.completed_quests),
-            
-            # Inventory
-            "inventory": [
-                {
-                    "name": item.name,
-                    "description": item.description,
-                    "weight": item.weight,
-                    "value": item.value,
-                    "usable": item.usable,
-                    "consumable": item.consumable
+    def verify_save(self, save_name: str) -> Dict:
+        """Check a save's checksums, including the parts a differential save refers to"""
+        try:
+            save_file = os.path.join(self.save_directory, f"{save_name}.save")
+            
+            if not os.path.exists(save_file):
+                return {
+                    "success": False,
+                    "error": f"Save file '{save_name}' tidak ditemukan"
                 }
-                for item in game_state.inventory
-            ],
-            
-            # Quests
-            "quests": [
-                {
-                    "title": quest.title,
-                    "description": quest.description,
-                    "requirements": quest.requirements,
-                    "rewards": [
-                        {
-                            "name": reward.name,
-                            "description": reward.description,
-                            "weight": reward.weight,
-                            "value": reward.value
-                        }
-                        for reward in quest.rewards
-                    ],
-                    "completed": quest.completed,
-                    "started": quest.started,
-                    "quest_id": quest.quest_id
+            
+            metadata = self._read_save_file(save_file)["save_metadata"]
+            return {
+                "success": True,
+                "save_name": save_name,
+                "metadata": metadata
+            }
+            
+        except SaveCorruptedError as e:
+            return {
+                "success": False,
+                "error": f"Save file rusak: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Gagal memeriksa save: {str(e)}"
+            }
+    
+    def migrate_save(self, save_name: str, update_index: bool = True, force: bool = False) -> Dict:
+        """Rewrite a save in the current schema and file format; a current save is left as is unless force.
+
+        Pass update_index=False when several processes migrate one directory,
+        then rebuild_index() once they are done.
+        """
+        try:
+            save_file = os.path.join(self.save_directory, f"{save_name}.save")
+            
+            if not os.path.exists(save_file):
+                return {
+                    "success": False,
+                    "error": f"Save file '{save_name}' tidak ditemukan"
                 }
-                for quest in game_state.quests
-            ],
             
-            # Locations
-            "locations": {}
-        }
-        
-        # Serialize locations
-        for loc_name, location in game_state.locations.items():
-            serialized["locations"][loc_name] = {
-                "name": location.name,
-                "description": location.description,
-                "connections": location.connections,
-                "visited": location.visited,
-                "items": [
-                    {
-                        "name": item.name,
-                        "description": item.description,
-                        "weight": item.weight,
-                        "value": item.value,
-                        "usable": item.usable,
-                        "consumable": item.consumable
+            with self._write_lock:
+                with open(save_file, 'rb') as f:
+                    header = f.read(_CONTAINER_HEADER.size)
+                save_data = self._read_save_file(save_file)
+                metadata = {key: value for key, value in save_data["save_metadata"].items() if key != "checksum"}
+                version = schema_version(metadata)
+                if version == SAVE_SCHEMA_VERSION and SaveReader.is_container(header) and not force:
+                    return {
+                        "success": True,
+                        "save_name": save_name,
+                        "migrated": False,
+                        "from_version": version
                     }
-                    for item in location.items
-                ],
-                "npcs": location.npcs
+                
+                # Every location is migrated now, not when first visited
+                saved_state = save_data["game_state"]
+                serialized = dict(upgrade("state", {key: saved_state[key] for key in saved_state if key != "locations"}, version))
+                serialized["locations"] = {name: upgrade("location", loc_data, version, name)
+                                           for name, loc_data in saved_state["locations"].items()}
+                metadata["schema_version"] = SAVE_SCHEMA_VERSION
+                metadata["checksum"] = self._write_container(save_file, self._save_sections(metadata, serialized))
+                self._remove_save_parts(save_name)
+                if update_index:
+                    self._update_index(save_name, save_file, metadata)
+            
+            return {
+                "success": True,
+                "save_name": save_name,
+                "migrated": True,
+                "from_version": version,
+                "message": f"Save '{save_name}' diperbarui ke skema {SAVE_SCHEMA_VERSION}"
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Gagal memperbarui save: {str(e)}"
             }
-        
-        return serialized
     
-    def _deserialize_game_state(self, serialized_data: Dict):
-        """Deserialize dictionary back to game state"""
-        from game_state import GameState, Item, Location, Quest
+    def _deserialize_game_state(self, serialized_data: Mapping, game_state=None, version: int = SAVE_SCHEMA_VERSION):
+        """Deserialize a saved game state into game_state (or a new GameState), migrating it from schema version first"""
+        from game_state import GameState, ItemTable, Location, SavedLocation
         
-        # Create new game state
-        game_state = GameState()
+        # Locations are migrated one by one as they are applied
+        saved_locations = serialized_data["locations"]
+        state_data = upgrade("state", {key: serialized_data[key] for key in serialized_data if key != "locations"}, version)
         
-        # Restore basic properties
-        game_state.player_name = serialized_data["player_name"]
-        game_state.current_location = serialized_data["current_location"]
-        game_state.health = serialized_data["health"]
-        game_state.max_health = serialized_data["max_health"]
-        game_state.level = serialized_data["level"]
-        game_state.experience = serialized_data["experience"]
-        game_state.gold = serialized_data["gold"]
-        game_state.game_over = serialized_data["game_over"]
-        game_state.conversation_history = serialized_data["conversation_history"]
-        game_state.player_actions = serialized_data["player_actions"]
-        game_state.completed_quests = set(serialized_data["completed_quests"])
+        if game_state is None:
+            game_state = GameState()
+        # Everything but the locations; they start from a fresh view of the world template
+        game_state.load_game_state(state_data, compact=True)
         
-        # Restore inventory
-        game_state.inventory = []
-        for item_data in serialized_data["inventory"]:
-            item = Item(
-                name=item_data["name"],
-                description=item_data["description"],
-                weight=item_data["weight"],
-                value=item_data["value"],
-                usable=item_data["usable"],
-                consumable=item_data["consumable"]
-            )
-            game_state.inventory.append(item)
-        
-        # Restore quests
-        game_state.quests = []
-        for quest_data in serialized_data["quests"]:
-            rewards = []
-            for reward_data in quest_data["rewards"]:
-                reward = Item(
-                    name=reward_data["name"],
-                    description=reward_data["description"],
-                    weight=reward_data["weight"],
-                    value=reward_data["value"]
-                )
-                rewards.append(reward)
-            
-            quest = Quest(
-                title=quest_data["title"],
-                description=quest_data["description"],
-                requirements=quest_data["requirements"],
-                rewards=rewards,
-                completed=quest_data["completed"],
-                started=quest_data["started"],
-                quest_id=quest_data["quest_id"]
-            )
-            game_state.quests.append(quest)
-        
-        # Restore locations
-        game_state.locations = {}
-        for loc_name, loc_data in serialized_data["locations"].items():
-            items = []
-            for item_data in loc_data["items"]:
-                item = Item(
-                    name=item_data["name"],
-                    description=item_data["description"],
-                    weight=item_data["weight"],
-                    value=item_data["value"],
-                    usable=item_data["usable"],
-                    consumable=item_data["consumable"]
-                )
-                items.append(item)
-            
-            location = Location(
-                name=loc_data["name"],
-                description=loc_data["description"],
-                connections=loc_data["connections"],
-                items=items,
-                npcs=loc_data["npcs"],
-                visited=loc_data["visited"]
-            )
-            game_state.locations[loc_name] = location
+        # Template locations get their saved state when first accessed, so a
+        # sectioned save decodes only the locations the game actually visits.
+        items = ItemTable(state_data.get("item_definitions", {}))
+        for loc_name in saved_locations:
+            saved = SavedLocation(functools.partial(self._saved_location, saved_locations, loc_name, version), items)
+            if loc_name in game_state.locations:
+                game_state.locations.defer(loc_name, saved)
+            else:
+                location = Location(name="", description="")
+                saved(location)
+                game_state.locations[loc_name] = location
         
         return game_state
     
+    def _saved_location(self, saved_locations: Mapping, loc_name: str, version: int) -> Mapping:
+        """A location's saved state, migrated to the current schema"""
+        return upgrade("location", saved_locations[loc_name], version, loc_name)
+    
+    def _load_index(self) -> Dict[str, Dict]:
+        """Catalog entries by save name; a missing or unreadable index is empty"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get("version") != SAVE_INDEX_VERSION:
+            return {}
+        return index.get("saves", {})
+    
+    def _write_index(self, saves: Dict[str, Dict]):
+        """Replace the catalog atomically"""
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": SAVE_INDEX_VERSION, "saves": saves}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_path, self.index_path)
+    
+    def _scan_save_file(self, file_path: str, stat: os.stat_result) -> Dict:
+        """Catalog entry read from the save file itself"""
+        entry = {"file_size": stat.st_size, "mtime": stat.st_mtime}
+        try:
+            entry["metadata"] = self._read_save_file(file_path, verify=False)["save_metadata"]
+        except Exception as e:
+            entry["error"] = f"Corrupted save file: {str(e)}"
+        return entry
+    
+    def _update_index(self, save_name: str, save_file: Optional[str] = None, metadata: Optional[Dict] = None):
+        """Record a written save (or drop a deleted one, when save_file is None)"""
+        with self._write_lock:
+            saves = self._load_index()
+            if save_file is None:
+                saves.pop(save_name, None)
+            else:
+                stat = os.stat(save_file)
+                saves[save_name] = {"file_size": stat.st_size, "mtime": stat.st_mtime, "metadata": metadata}
+            self._write_index(saves)
+    
+    def rebuild_index(self) -> int:
+        """Re-read every save file into a fresh catalog; returns the number of saves"""
+        saves = {}
+        for filename in os.listdir(self.save_directory):
+            if filename.endswith('.save'):
+                file_path = os.path.join(self.save_directory, filename)
+                saves[filename[:-5]] = self._scan_save_file(file_path, os.stat(file_path))
+        with self._write_lock:
+            self._write_index(saves)
+        return len(saves)
+    
     def get_save_files(self) -> List[Dict]:
         """Get list of all save files"""
         save_files = []
@@ -349,37 +761,38 @@ class SaveLoadSystem:
         if not os.path.exists(self.save_directory):
             return save_files
         
+        # Files whose size and mtime match the catalog are not opened
+        index = self._load_index()
+        current = {}
         for filename in os.listdir(self.save_directory):
             if filename.endswith('.save'):
                 save_name = filename[:-5]  # Remove .save extension
                 file_path = os.path.join(self.save_directory, filename)
+                stat = os.stat(file_path)
                 
-                try:
-                    # Try to read metadata
-                    with open(file_path, 'r') as f:
-                        encrypted_data = f.read()
-                    
-                    json_data = self._decrypt_data(encrypted_data)
-                    save_data = json.loads(json_data)
-                    metadata = save_data["save_metadata"]
-                    
-                    save_files.append({
-                        "save_name": save_name,
-                        "file_path": file_path,
-                        "metadata": metadata,
-                        "file_size": os.path.getsize(file_path),
-                        "last_modified": datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                    })
-                    
-                except Exception as e:
+                entry = index.get(save_name)
+                if entry is None or entry.get("file_size") != stat.st_size or entry.get("mtime") != stat.st_mtime:
+                    entry = self._scan_save_file(file_path, stat)
+                current[save_name] = entry
+                
+                save_file = {
+                    "save_name": save_name,
+                    "file_path": file_path,
+                    "file_size": stat.st_size,
+                    "last_modified": datetime.fromtimestamp(stat.st_mtime).isoformat()
+                }
+                if "error" in entry:
                     # Corrupted save file
-                    save_files.append({
-                        "save_name": save_name,
-                        "file_path": file_path,
-                        "error": f"Corrupted save file: {str(e)}",
-                        "file_size": os.path.getsize(file_path),
-                        "last_modified": datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                    })
+                    save_file["error"] = entry["error"]
+                else:
+                    save_file["metadata"] = entry["metadata"]
+                save_files.append(save_file)
+        
+        if current != index:
+            with self._write_lock:
+                # A save written since the scan owns the newer catalog; the next listing reconciles
+                if self._load_index() == index:
+                    self._write_index(current)
         
         # Sort by last modified date (newest first)
         save_files.sort(key=lambda x: x.get("last_modified", ""), reverse=True)
@@ -398,6 +811,8 @@ class SaveLoadSystem:
                 }
             
             os.remove(save_file)
+            self._remove_save_parts(save_name)
+            self._update_index(save_name)
             
             return {
                 "success": True,
@@ -421,9 +836,8 @@ class SaveLoadSystem:
                     "error": f"Save file '{save_name}' tidak ditemukan"
                 }
             
-            # Copy file to export location
-            import shutil
-            shutil.copy2(save_file, export_path)
+            # Copy file to export location, resolving differential saves
+            self._write_consolidated(save_file, export_path)
             
             return {
                 "success": True,
@@ -436,8 +850,8 @@ class SaveLoadSystem:
                 "error": f"Gagal mengekspor save file: {str(e)}"
             }
     
-    def import_save(self, import_path: str) -> Dict:
-        """Import save file from external location"""
+    def import_save(self, import_path: str, save_name: str = None, update_index: bool = True) -> Dict:
+        """Import save file from external location (named after its player unless save_name is given)"""
         try:
             if not os.path.exists(import_path):
                 return {
@@ -446,22 +860,20 @@ class SaveLoadSystem:
                 }
             
             # Read and validate save file
-            with open(import_path, 'r') as f:
-                encrypted_data = f.read()
-            
-            # Test decryption
-            json_data = self._decrypt_data(encrypted_data)
-            save_data = json.loads(json_data)
-            metadata = save_data["save_metadata"]
+            metadata = self._read_save_file(import_path)["save_metadata"]
             
             # Generate new save name
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            new_save_name = f"imported_{metadata['player_name']}_{timestamp}"
+            new_save_name = save_name
+            if not new_save_name:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                new_save_name = f"imported_{metadata['player_name']}_{timestamp}"
             
             # Save to save directory
             save_file = os.path.join(self.save_directory, f"{new_save_name}.save")
-            with open(save_file, 'w') as f:
-                f.write(encrypted_data)
+            self._write_consolidated(import_path, save_file)
+            self._remove_save_parts(new_save_name)
+            if update_index:
+                self._update_index(new_save_name, save_file, metadata)
             
             return {
                 "success": True,
@@ -476,10 +888,9 @@ class SaveLoadSystem:
             }
     
     def create_backup(self, save_name: str) -> Dict:
-        """Create backup of save file"""
+        """Back up a save into the store, then prune old backups by the retention policy"""
         try:
             save_file = os.path.join(self.save_directory, f"{save_name}.save")
-            backup_file = os.path.join(self.save_directory, f"{save_name}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.save")
             
             if not os.path.exists(save_file):
                 return {
@@ -487,17 +898,67 @@ class SaveLoadSystem:
                     "error": f"Save file '{save_name}' tidak ditemukan"
                 }
             
-            import shutil
-            shutil.copy2(save_file, backup_file)
+            # Only sections not already in the store are written
+            with self._write_lock:
+                metadata = self._load_index().get(save_name, {}).get("metadata")
+                manifest = self.store.put(save_file, save_name, "backup", metadata)
+            removed = self.store.apply_retention(save_name)
+            if removed:
+                self.store.collect_garbage()
             
             return {
                 "success": True,
-                "backup_file": backup_file,
-                "message": f"Backup berhasil dibuat: {os.path.basename(backup_file)}"
+                "backup_id": manifest["id"],
+                "stored_bytes": manifest["stored_bytes"],
+                "removed_backups": removed,
+                "message": f"Backup berhasil dibuat: {manifest['id']}"
             }
             
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Gagal membuat backup: {str(e)}"
-            } 
\ No newline at end of file
+            }
+    
+    def list_backups(self, save_name: str = None) -> List[Dict]:
+        """Backups in the store, newest first"""
+        return [
+            {
+                "backup_id": manifest["id"],
+                "save_name": manifest["save_name"],
+                "created": manifest["created"],
+                "metadata": manifest["metadata"]
+            }
+            for manifest in reversed(self.store.manifests(save_name, "backup"))
+        ]
+    
+    def restore_backup(self, backup_id: str, save_name: str = None) -> Dict:
+        """Write a backup back as a save (by default over the save it was taken from)"""
+        try:
+            manifest = self.store.manifest(backup_id)
+        except KeyError:
+            return {
+                "success": False,
+                "error": f"Backup '{backup_id}' tidak ditemukan"
+            }
+        
+        try:
+            save_name = save_name or manifest["save_name"]
+            save_file = os.path.join(self.save_directory, f"{save_name}.save")
+            with self._write_lock:
+                self.store.restore(backup_id, save_file)
+                self._remove_save_parts(save_name)
+                entry = self._scan_save_file(save_file, os.stat(save_file))
+                self._update_index(save_name, save_file, entry.get("metadata"))
+            
+            return {
+                "success": True,
+                "save_name": save_name,
+                "message": f"Backup '{backup_id}' dipulihkan sebagai '{save_name}'"
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Gagal memulihkan backup: {str(e)}"
+            }
@@ -0,0 +1,125 @@
+import copy
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+# Layout of the game_state SaveLoadSystem writes. Bump it together with a
+# migration from the previous version whenever that layout changes.
+SAVE_SCHEMA_VERSION = 3
+# Saves written before the schema was versioned
+UNVERSIONED_SCHEMA = 1
+
+# A save is migrated in parts: "state" is every game_state key except the
+# locations, and each "location" record is migrated when it is first used.
+# Location migrations also get the location's key in the world.
+MIGRATION_PARTS = ("state", "location")
+_MIGRATIONS: Dict[Tuple[str, int], Callable[[Dict], Dict]] = {}
+
+def migration(part: str, from_version: int):
+    """Register fn(data) -> data (fn(data, name) for a location) upgrading one part of a
+    save from from_version to the next.
+
+    A version bump that leaves a part unchanged needs no migration for it.
+    """
+    if part not in MIGRATION_PARTS:
+        raise ValueError(f"Unknown save part '{part}'")
+
+    def register(fn: Callable[[Dict], Dict]) -> Callable[[Dict], Dict]:
+        _MIGRATIONS[(part, from_version)] = fn
+        return fn
+    return register
+
+def schema_version(metadata: Mapping) -> int:
+    return metadata.get("schema_version", UNVERSIONED_SCHEMA)
+
+def upgrade(part: str, data: Mapping, from_version: int, name: Optional[str] = None) -> Mapping:
+    """data migrated to SAVE_SCHEMA_VERSION; data itself is never modified.
+
+    name is the location's key, for the "location" part.
+    """
+    if from_version > SAVE_SCHEMA_VERSION:
+        raise ValueError(f"Save schema {from_version} is newer than this game ({SAVE_SCHEMA_VERSION})")
+    if from_version == SAVE_SCHEMA_VERSION:
+        return data
+    data = copy.deepcopy(dict(data))
+    for version in range(from_version, SAVE_SCHEMA_VERSION):
+        step = _MIGRATIONS.get((part, version))
+        if step is not None:
+            data = step(data, name) if part == "location" else step(data)
+    return data
+
+# Schema 1 -> 2: items kept only name, description, weight and value (usable and
+# consumable not always); crafting progress, combat stats and play time were not saved.
+
+_ITEM_DEFAULTS_V2 = {
+    "usable": False,
+    "consumable": False,
+    "item_type": "misc",
+    "stats": {},
+    "max_durability": 100,
+    "rarity": "common",
+    "special_effects": [],
+    "quantity": 1
+}
+
+def _item_v2(item: Dict) -> Dict:
+    for key, value in _ITEM_DEFAULTS_V2.items():
+        item.setdefault(key, copy.copy(value))
+    item.setdefault("durability", item["max_durability"])
+    return item
+
+@migration("state", 1)
+def _state_v2(data: Dict) -> Dict:
+    from game_state import GameState
+
+    # Progress that was never saved starts over, as in a new game
+    fresh = GameState()
+    defaults = {
+        **fresh._crafting_section(),
+        "combat_stats": fresh._combat_stats_section(),
+        "play_time": 0
+    }
+    for key, value in defaults.items():
+        data.setdefault(key, value)
+    for item in data.get("inventory", []):
+        _item_v2(item)
+    for quest in data.get("quests", []):
+        for reward in quest.get("rewards", []):
+            _item_v2(reward)
+    return data
+
+@migration("location", 1)
+def _location_v2(data: Dict, name: str) -> Dict:
+    from content_pack import get_default_pack
+    
+    # Monsters, crafting stations and merchants were not saved: a template
+    # location keeps the template's, any other location has none. Only this
+    # location's content record is read.
+    records = get_default_pack().section("locations")
+    record = records.record(name) if name in records else {}
+    for field_name in ("monsters", "crafting_stations", "merchants"):
+        data.setdefault(field_name, list(record.get(field_name, ())))
+    for item in data.get("items", []):
+        _item_v2(item)
+    return data
+
+# Schema 2 -> 3: the compact form of GameState.save_game_state (field tags,
+# defaults left out, player and crafting fields in their own sections). Items
+# were stored in full; they become references to item_definitions, or carry
+# their definition inline in a location. Both parts are converted by loading
+# them in the full form and writing them back through the same codecs.
+
+@migration("state", 2)
+def _state_v3(data: Dict) -> Dict:
+    from game_state import GameState
+    
+    state = GameState()
+    state.load_game_state(data)
+    migrated = state.save_game_state(compact=True)
+    del migrated["locations"]
+    return migrated
+
+@migration("location", 2)
+def _location_v3(data: Dict, name: str) -> Dict:
+    from game_state import ItemTable, LOCATION_CODEC
+    
+    location = LOCATION_CODEC.new_full(data, ItemTable())
+    return LOCATION_CODEC.encode_compact(location, ItemTable(inline=True))
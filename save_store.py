@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from save_load_system import SaveReader, SaveCorruptedError, map_save_file, stored_entry
+
+MANIFEST_VERSION = 1
+_FILE_CHUNK_SIZE = 64 * 1024
+# Section entries per table chunk; groups that did not change are shared too
+_TABLE_CHUNK_ENTRIES = 16
+# Retention: the newest N backups, plus the newest one of each of the last days/weeks
+DEFAULT_KEEP_LAST = 5
+DEFAULT_KEEP_DAILY = 7
+DEFAULT_KEEP_WEEKLY = 4
+
+class SaveStore:
+    """Content-addressed, deduplicated store for save files.
+
+        chunks/<ab>/<sha256>   bytes, stored once whoever references them
+        manifests/<id>.json    the chunks that rebuild one file
+
+    Sectioned saves are chunked at section boundaries: a section's stored
+    bytes depend only on its content, so every backup shares the sections
+    that did not change. Their section table is stored as chunks as well,
+    which keeps a manifest to a few digests. Other files are cut into fixed
+    64 KB chunks.
+    """
+
+    def __init__(self, root: str, save_system):
+        self.root = root
+        self.save_system = save_system
+        self.chunk_directory = os.path.join(root, "chunks")
+        self.manifest_directory = os.path.join(root, "manifests")
+        # put() and collect_garbage() must not interleave
+        self._lock = threading.Lock()
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_directory, digest[:2], digest)
+
+    def _put_chunk(self, data, digest: Optional[str] = None) -> Tuple[str, int]:
+        """Store data unless it is already there; returns (digest, bytes written)"""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return digest, len(data)
+
+    def _read_chunk(self, digest: str) -> bytes:
+        try:
+            with open(self._chunk_path(digest), 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise SaveCorruptedError(f"Missing chunk {digest[:12]}: {e}")
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise SaveCorruptedError(f"Chunk {digest[:12]} is corrupted")
+        return data
+
+    def _manifest_path(self, manifest_id: str) -> str:
+        return os.path.join(self.manifest_directory, f"{manifest_id}.json")
+
+    def _write_manifest(self, manifest: Dict):
+        os.makedirs(self.manifest_directory, exist_ok=True)
+        path = self._manifest_path(manifest["id"])
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _sections(self, manifest: Dict) -> Iterator[Dict]:
+        """Section entries of a sectioned save's manifest"""
+        for digest in manifest["tables"]:
+            yield from json.loads(self._read_chunk(digest))
+
+    def _manifest_chunks(self, manifest: Dict) -> Iterator[str]:
+        if "tables" in manifest:
+            yield from manifest["tables"]
+            yield from (entry["sha256"] for entry in self._sections(manifest))
+        else:
+            yield from manifest["chunks"]
+
+    def put(self, save_file: str, save_name: str, kind: str = "backup", metadata: Optional[Dict] = None) -> Dict:
+        """Store a save file; returns its manifest (stored_bytes counts only new chunks)"""
+        data = map_save_file(save_file)
+        created = datetime.now()
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "id": f"{save_name}_{kind}_{created.strftime('%Y%m%d_%H%M%S_%f')}",
+            "save_name": save_name,
+            "kind": kind,
+            "created": created.isoformat(),
+            "metadata": metadata,
+            "size": len(data)
+        }
+        stored_bytes = 0
+        with self._lock:
+            if SaveReader.is_container(data):
+                # Differential saves are resolved, so the manifest is self-contained
+                reader = SaveReader(data, self.save_system._xor_with_key, save_file)
+                reader.verify()
+                sections = []
+                for name in reader.section_names():
+                    entry = reader.entry(name)
+                    stored_bytes += self._put_chunk(reader.stored(name), entry["sha256"])[1]
+                    sections.append(stored_entry(entry))
+                tables = []
+                for start in range(0, len(sections), _TABLE_CHUNK_ENTRIES):
+                    table = json.dumps(sections[start:start + _TABLE_CHUNK_ENTRIES], ensure_ascii=False,
+                                       separators=(",", ":")).encode('utf-8')
+                    digest, written = self._put_chunk(table)
+                    tables.append(digest)
+                    stored_bytes += written
+                manifest["tables"] = tables
+            else:
+                chunks = []
+                for start in range(0, len(data), _FILE_CHUNK_SIZE):
+                    digest, written = self._put_chunk(data[start:start + _FILE_CHUNK_SIZE])
+                    chunks.append(digest)
+                    stored_bytes += written
+                manifest["chunks"] = chunks
+            manifest["stored_bytes"] = stored_bytes
+            self._write_manifest(manifest)
+        return manifest
+
+    def manifest(self, manifest_id: str) -> Dict:
+        try:
+            with open(self._manifest_path(manifest_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(manifest_id)
+
+    def manifests(self, save_name: Optional[str] = None, kind: Optional[str] = None) -> List[Dict]:
+        """Stored manifests, oldest first"""
+        if not os.path.isdir(self.manifest_directory):
+            return []
+        manifests = []
+        for filename in os.listdir(self.manifest_directory):
+            if not filename.endswith(".json"):
+                continue
+            manifest = self.manifest(filename[:-5])
+            if (save_name is None or manifest["save_name"] == save_name) and (kind is None or manifest["kind"] == kind):
+                manifests.append(manifest)
+        manifests.sort(key=lambda manifest: manifest["created"])
+        return manifests
+
+    def restore(self, manifest_id: str, dest_file: str):
+        """Rebuild a stored file at dest_file (atomically); chunks are verified on the way"""
+        manifest = self.manifest(manifest_id)
+        if "tables" in manifest:
+            self.save_system._write_stored_container(
+                dest_file, ((entry, self._read_chunk(entry["sha256"])) for entry in self._sections(manifest)))
+            return
+        temp_path = f"{dest_file}.tmp"
+        with open(temp_path, 'wb') as f:
+            for digest in manifest["chunks"]:
+                f.write(self._read_chunk(digest))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, dest_file)
+
+    def remove(self, manifest_id: str):
+        """Drop a manifest; its chunks go at the next collect_garbage()"""
+        os.remove(self._manifest_path(manifest_id))
+
+    def apply_retention(self, save_name: str, kind: str = "backup", keep_last: int = DEFAULT_KEEP_LAST,
+                        keep_daily: int = DEFAULT_KEEP_DAILY, keep_weekly: int = DEFAULT_KEEP_WEEKLY) -> List[str]:
+        """Remove the manifests the policy does not keep; returns their ids"""
+        newest_first = self.manifests(save_name, kind)[::-1]
+        keep = {manifest["id"] for manifest in newest_first[:keep_last]}
+        for count, period in ((keep_daily, lambda created: created.date()),
+                              (keep_weekly, lambda created: created.isocalendar()[:2])):
+            periods = set()
+            for manifest in newest_first:
+                key = period(datetime.fromisoformat(manifest["created"]))
+                if key in periods:
+                    continue
+                if len(periods) >= count:
+                    break
+                periods.add(key)
+                keep.add(manifest["id"])
+
+        removed = [manifest["id"] for manifest in newest_first if manifest["id"] not in keep]
+        for manifest_id in removed:
+            self.remove(manifest_id)
+        return removed
+
+    def collect_garbage(self) -> Dict:
+        """Delete chunks no manifest references"""
+        removed = freed = kept = 0
+        with self._lock:
+            referenced = set()
+            for manifest in self.manifests():
+                referenced.update(self._manifest_chunks(manifest))
+            if os.path.isdir(self.chunk_directory):
+                for directory, _, filenames in os.walk(self.chunk_directory):
+                    for filename in filenames:
+                        if filename in referenced:
+                            kept += 1
+                            continue
+                        path = os.path.join(directory, filename)
+                        freed += os.path.getsize(path)
+                        os.remove(path)
+                        removed += 1
+        return {"chunks_removed": removed, "bytes_freed": freed, "chunks_kept": kept}
@@ -0,0 +1,164 @@
+import argparse
+import functools
+import os
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List
+from save_load_system import SaveLoadSystem
+
+# Seconds between progress lines
+_PROGRESS_INTERVAL = 0.2
+
+def _save_names(directory: str) -> List[str]:
+    return sorted(filename[:-5] for filename in os.listdir(directory) if filename.endswith(".save"))
+
+# Worker tasks run in child processes. None of them touches the save index;
+# the parent rebuilds it once the pool is done.
+
+def _with_size(path: str, result: Dict) -> Dict:
+    result["bytes"] = os.path.getsize(path) if os.path.exists(path) else 0
+    return result
+
+def _verify_one(directory: str, save_name: str) -> Dict:
+    result = SaveLoadSystem(directory).verify_save(save_name)
+    return _with_size(os.path.join(directory, f"{save_name}.save"), result)
+
+def _migrate_one(directory: str, force: bool, save_name: str) -> Dict:
+    save_file = os.path.join(directory, f"{save_name}.save")
+    size = os.path.getsize(save_file) if os.path.exists(save_file) else 0
+    result = SaveLoadSystem(directory).migrate_save(save_name, update_index=False, force=force)
+    result["bytes"] = size
+    return result
+
+def _pack_one(directory: str, staging: str, save_name: str) -> Dict:
+    # Consolidated and verified, so every archived save is self-contained
+    staged = os.path.join(staging, f"{save_name}.save")
+    result = SaveLoadSystem(directory).export_save(save_name, staged)
+    return _with_size(staged, result)
+
+def _unpack_one(directory: str, staged: str) -> Dict:
+    save_name = os.path.basename(staged)[:-5]
+    result = SaveLoadSystem(directory).import_save(staged, save_name, update_index=False)
+    return _with_size(staged, result)
+
+def run_pool(task: Callable[[str], Dict], items: List[str], workers: int = None, label: str = "") -> Dict:
+    """Run task(item) for every item across processes, reporting progress on stderr"""
+    results: Dict[str, Dict] = {}
+    total_bytes = 0
+    start = reported = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(task, item): item for item in items}
+        for done, future in enumerate(as_completed(futures), 1):
+            item = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            results[item] = result
+            total_bytes += result.get("bytes", 0)
+            now = time.perf_counter()
+            if now - reported >= _PROGRESS_INTERVAL or done == len(items):
+                reported = now
+                elapsed = max(now - start, 1e-9)
+                print(f"\r{label} [{done}/{len(items)}] {done / elapsed:.0f} save/s, "
+                      f"{total_bytes / elapsed / 1e6:.1f} MB/s", end="", file=sys.stderr, flush=True)
+    if items:
+        print(file=sys.stderr)
+    return {
+        "results": results,
+        "failed": {item: result["error"] for item, result in results.items() if not result["success"]},
+        "count": len(items),
+        "bytes": total_bytes,
+        "seconds": time.perf_counter() - start
+    }
+
+def verify_directory(directory: str, workers: int = None) -> Dict:
+    """Check the checksums of every save in directory"""
+    return run_pool(functools.partial(_verify_one, directory), _save_names(directory), workers, "verify")
+
+def migrate_directory(directory: str, workers: int = None, force: bool = False) -> Dict:
+    """Upgrade every save in directory to the current schema and format (force: rewrite all)"""
+    summary = run_pool(functools.partial(_migrate_one, directory, force), _save_names(directory), workers,
+                       "reencode" if force else "migrate")
+    SaveLoadSystem(directory).rebuild_index()
+    summary["migrated"] = sorted(name for name, result in summary["results"].items()
+                                 if result["success"] and result["migrated"])
+    return summary
+
+def pack_directory(directory: str, archive_path: str, workers: int = None) -> Dict:
+    """Write every save in directory into a tar archive (.tar.gz is compressed)"""
+    mode = "w:gz" if archive_path.endswith((".tar.gz", ".tgz")) else "w"
+    with tempfile.TemporaryDirectory() as staging:
+        summary = run_pool(functools.partial(_pack_one, directory, staging), _save_names(directory), workers, "pack")
+        with tarfile.open(archive_path, mode) as archive:
+            for save_name, result in sorted(summary["results"].items()):
+                if result["success"]:
+                    archive.add(os.path.join(staging, f"{save_name}.save"), arcname=f"{save_name}.save")
+    return summary
+
+def unpack_archive(archive_path: str, directory: str, workers: int = None) -> Dict:
+    """Import every save in a tar archive into directory, replacing saves of the same name"""
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory() as staging:
+        staged = []
+        with tarfile.open(archive_path, "r:*") as archive:
+            for member in archive:
+                # Only plain .save files, and never outside the staging directory
+                name = os.path.basename(member.name)
+                if not member.isfile() or not name.endswith(".save") or name.startswith("."):
+                    continue
+                path = os.path.join(staging, name)
+                with archive.extractfile(member) as source, open(path, "wb") as target:
+                    target.write(source.read())
+                staged.append(path)
+        summary = run_pool(functools.partial(_unpack_one, directory), staged, workers, "unpack")
+    SaveLoadSystem(directory).rebuild_index()
+    summary["failed"] = {os.path.basename(path): error for path, error in summary["failed"].items()}
+    return summary
+
+def _print_summary(title: str, summary: Dict):
+    seconds = max(summary["seconds"], 1e-9)
+    ok = summary["count"] - len(summary["failed"])
+    print(f"✅ {title}: {ok}/{summary['count']} save berhasil dalam {summary['seconds']:.2f} s "
+          f"({summary['count'] / seconds:.1f} save/s, {summary['bytes'] / seconds / 1e6:.2f} MB/s)")
+    for name, error in sorted(summary["failed"].items()):
+        print(f"❌ {name}: {error}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Alat perawatan file save (diproses paralel)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default: jumlah CPU)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    verify = commands.add_parser("verify", help="Periksa checksum semua save")
+    verify.add_argument("directory", nargs="?", default="saves")
+    migrate = commands.add_parser("migrate", help="Perbarui save lama ke skema terbaru")
+    migrate.add_argument("directory", nargs="?", default="saves")
+    reencode = commands.add_parser("reencode", help="Tulis ulang semua save dalam format terbaru")
+    reencode.add_argument("directory", nargs="?", default="saves")
+    pack = commands.add_parser("pack", help="Kemas semua save ke arsip tar (.tar.gz dikompresi)")
+    pack.add_argument("archive")
+    pack.add_argument("directory", nargs="?", default="saves")
+    unpack = commands.add_parser("unpack", help="Impor semua save dari arsip (menimpa save bernama sama)")
+    unpack.add_argument("archive")
+    unpack.add_argument("directory", nargs="?", default="saves")
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        summary = verify_directory(args.directory, args.workers)
+        _print_summary("Verifikasi", summary)
+    elif args.command in ("migrate", "reencode"):
+        summary = migrate_directory(args.directory, args.workers, force=args.command == "reencode")
+        _print_summary("Migrasi" if args.command == "migrate" else "Re-encode", summary)
+        print(f"   {len(summary['migrated'])} save ditulis ulang")
+    elif args.command == "pack":
+        summary = pack_directory(args.directory, args.archive, args.workers)
+        _print_summary(f"Arsip {args.archive}", summary)
+    else:
+        summary = unpack_archive(args.archive, args.directory, args.workers)
+        _print_summary(f"Impor dari {args.archive}", summary)
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import dataclasses
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+class _Required:
+    def __repr__(self) -> str:
+        return "REQUIRED"
+
+# Default of a field that must always be present
+REQUIRED = _Required()
+
+class Field:
+    """One serialized attribute: its name in the full form, its tag in the compact form.
+
+    default/factory give the value used when the key is missing (and that the
+    compact form leaves out); when neither is given, the dataclass field's
+    default is used. encode/decode convert the attribute to and from plain
+    data; codec (de)serializes a nested object, or each element with many=True,
+    and decode then builds the attribute from the decoded elements. get reads
+    the attribute instead of getattr, e.g. for a value computed on save.
+    """
+    __slots__ = ("name", "tag", "default", "factory", "encode", "decode", "codec", "many", "get")
+
+    def __init__(self, name: str, tag: str, default: Any = REQUIRED, factory: Optional[Callable[[], Any]] = None,
+                 encode: Optional[Callable] = None, decode: Optional[Callable] = None, codec=None,
+                 many: bool = False, get: Optional[Callable[[Any], Any]] = None):
+        self.name = name
+        self.tag = tag
+        self.default = default
+        self.factory = factory
+        self.encode = encode
+        self.decode = decode
+        self.codec = codec
+        self.many = many
+        self.get = get
+
+def _is_empty(value) -> bool:
+    return isinstance(value, (str, tuple, list, set, frozenset, Mapping)) and not value
+
+class Codec:
+    """Serializer for one class, generated from its field table.
+
+    Two forms share the table: the full form keys every field by name, the
+    compact form keys fields by tag and leaves out those at their default.
+    The (de)serializers are compiled into straight-line functions when the
+    codec is built:
+
+        encode_full(obj, ctx) / encode_compact(obj, ctx) -> dict
+        decode_full(data, ctx) / decode_compact(data, ctx) -> {attribute: value}
+        new_full(data, ctx) / new_compact(data, ctx) -> cls(...)
+        apply_full(obj, data, ctx) / apply_compact(obj, data, ctx) -> sets every field on obj
+
+    ctx is handed to nested codecs unchanged (e.g. a document's item table).
+    Keys missing from the data get the field's default in both forms.
+    """
+
+    def __init__(self, cls: type, fields: Iterable[Field]):
+        self.cls = cls
+        self.fields: Tuple[Field, ...] = tuple(fields)
+        self.names = tuple(f.name for f in self.fields)
+        self.tags = tuple(f.tag for f in self.fields)
+        if len(set(self.names)) != len(self.names) or len(set(self.tags)) != len(self.tags):
+            raise ValueError(f"{cls.__name__}: field names and tags must be unique")
+        self._fill_defaults()
+
+        namespace: Dict[str, Any] = {"_cls": cls}
+        lines: List[str] = []
+        for compact in (False, True):
+            form = "compact" if compact else "full"
+            lines += self._encoder(f"encode_{form}", compact, namespace)
+            lines += self._decoder(f"decode_{form}", compact, namespace, "return {", "}", "{name!r}: {value},")
+            lines += self._decoder(f"new_{form}", compact, namespace, "return _cls(", ")", "{name}={value},")
+            lines += self._decoder(f"apply_{form}", compact, namespace, None, None, "obj.{name} = {value}")
+        self.source = "\n".join(lines)
+        exec(compile(self.source, f"<codec {cls.__name__}>", "exec"), namespace)
+        for compact in (False, True):
+            form = "compact" if compact else "full"
+            for kind in ("encode", "decode", "new", "apply"):
+                setattr(self, f"{kind}_{form}", namespace[f"{kind}_{form}"])
+
+    def _fill_defaults(self):
+        if not dataclasses.is_dataclass(self.cls):
+            return
+        declared = {f.name: f for f in dataclasses.fields(self.cls)}
+        for f in self.fields:
+            if f.default is not REQUIRED or f.factory is not None or f.name not in declared:
+                continue
+            if declared[f.name].default is not dataclasses.MISSING:
+                f.default = declared[f.name].default
+            elif declared[f.name].default_factory is not dataclasses.MISSING:
+                f.factory = declared[f.name].default_factory
+
+    @staticmethod
+    def _bind(namespace: Dict, name: str, value) -> str:
+        namespace[name] = value
+        return name
+
+    def _encoded(self, i: int, f: Field, compact: bool, namespace: Dict, v: str = "v") -> str:
+        """Expression for the encoded value of field i, read from v"""
+        if f.codec is not None:
+            form = "c" if compact else "f"
+            encode = self._bind(namespace, f"_ce{form}{i}", f.codec.encode_compact if compact else f.codec.encode_full)
+            return f"[{encode}(x, ctx) for x in {v}]" if f.many else f"{encode}({v}, ctx)"
+        if f.encode is not None:
+            return f"{self._bind(namespace, f'_e{i}', f.encode)}({v})"
+        return v
+
+    def _read(self, i: int, f: Field, namespace: Dict) -> str:
+        return f"{self._bind(namespace, f'_g{i}', f.get)}(obj)" if f.get is not None else f"obj.{f.name}"
+
+    def _encoder(self, function: str, compact: bool, namespace: Dict) -> List[str]:
+        lines = [f"def {function}(obj, ctx=None):"]
+        if not compact:
+            # Every field, as one dict display
+            lines.append("    return {")
+            lines += [f"        {f.name!r}: {self._encoded(i, f, compact, namespace, self._read(i, f, namespace))},"
+                      for i, f in enumerate(self.fields)]
+            lines.append("    }")
+            return lines
+        lines.append("    out = {}")
+        for i, f in enumerate(self.fields):
+            if f.default is REQUIRED and f.factory is None:
+                lines.append(f"    out[{f.tag!r}] = {self._encoded(i, f, compact, namespace, self._read(i, f, namespace))}")
+                continue
+            lines.append(f"    v = {self._read(i, f, namespace)}")
+            default = f.factory() if f.factory is not None else f.default
+            if _is_empty(default):
+                lines.append("    if v:")
+            else:
+                lines.append(f"    if v != {self._bind(namespace, f'_dv{i}', default)}:")
+            lines.append(f"        out[{f.tag!r}] = {self._encoded(i, f, compact, namespace)}")
+        lines.append("    return out")
+        return lines
+
+    def _decoded(self, i: int, f: Field, compact: bool, namespace: Dict) -> str:
+        """Expression for the attribute value of field i"""
+        key = f.tag if compact else f.name
+        raw = f"data[{key!r}]"
+        if f.codec is not None:
+            form = "c" if compact else "f"
+            new = self._bind(namespace, f"_cn{form}{i}", f.codec.new_compact if compact else f.codec.new_full)
+            if f.many:
+                value = f"[{new}(x, ctx) for x in {raw}]"
+                if f.decode is not None:
+                    value = f"{self._bind(namespace, f'_d{i}', f.decode)}({value})"
+            else:
+                value = f"{new}({raw}, ctx)"
+        elif f.decode is not None:
+            value = f"{self._bind(namespace, f'_d{i}', f.decode)}({raw})"
+        else:
+            value = None
+
+        if f.factory is not None:
+            return f"({value or raw} if {key!r} in data else {self._bind(namespace, f'_f{i}', f.factory)}())"
+        if f.default is REQUIRED:
+            return value or raw
+        default = self._bind(namespace, f"_dv{i}", f.default)
+        if value is None:
+            return f"data.get({key!r}, {default})"
+        return f"({value} if {key!r} in data else {default})"
+
+    def _decoder(self, function: str, compact: bool, namespace: Dict, opening: Optional[str],
+                 closing: Optional[str], template: str) -> List[str]:
+        if opening is None:
+            lines, indent = [f"def {function}(obj, data, ctx=None):", "    pass"], "    "
+        else:
+            lines, indent = [f"def {function}(data, ctx=None):", f"    {opening}"], "        "
+        for i, f in enumerate(self.fields):
+            lines.append(indent + template.format(name=f.name, value=self._decoded(i, f, compact, namespace)))
+        if closing is not None:
+            lines.append(f"    {closing}")
+        return lines
+
+    def encode(self, obj, ctx=None, compact: bool = False) -> Dict:
+        return (self.encode_compact if compact else self.encode_full)(obj, ctx)
+
+    def decode(self, data, ctx=None, compact: bool = False) -> Dict:
+        return (self.decode_compact if compact else self.decode_full)(data, ctx)
+
+    def new(self, data, ctx=None, compact: bool = False):
+        return (self.new_compact if compact else self.new_full)(data, ctx)
+
+    def apply(self, obj, data, ctx=None, compact: bool = False):
+        (self.apply_compact if compact else self.apply_full)(obj, data, ctx)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test script untuk memverifikasi sistem permainan (perjalanan, inventaris, quest)
+"""
+
+import random
+from collections import deque
+from combat_system import CombatSystem, get_monster_definitions
+from game_state import GameState, CombatStats, Inventory, Item, get_world_template
+from world_graph import WorldGraph, ALL_PAIRS_LIMIT
+
+def test_sessions_share_the_world_template():
+    """Test a session's changes stay in its own overlay, never in the shared template"""
+    print("Testing shared world template...")
+    first, second = GameState(), GameState()
+    assert first.locations._template is second.locations._template
+    assert not first.locations.materialized()
+
+    assert first.take_item_from_location("ranting")
+    first.travel_to("kastil")
+    assert set(first.locations.materialized()) == {"hutan", "kota", "kastil"}
+    assert first.locations["kastil"].visited
+
+    # Neither the other session nor a new one sees the change
+    for state in (second, GameState()):
+        assert "ranting" in [item.name for item in state.locations["hutan"].items]
+        assert not state.locations["kastil"].visited
+    template = get_world_template().locations
+    assert "ranting" in [item.name for item in template["hutan"].items]
+    assert not template["kastil"].visited
+    print("✅ Shared world template passed!")
+
+def test_inventory_stacking():
+    """Test identical items stack, and counts match the items held"""
+    print("Testing inventory stacks...")
+    inventory = Inventory()
+    inventory.add(Item("Ranting", "Ranting kayu", 0.2, 1))
+    inventory.add(Item("Ranting", "Ranting kayu", 0.2, 1, quantity=2))
+    inventory.add(Item("Ranting", "Ranting kayu", 0.2, 1, durability=40))
+    # Same definition but worn: a stack of its own
+    assert [item.quantity for item in inventory] == [3, 1]
+    assert inventory.count("RANTING") == 4 and len(inventory) == 2
+
+    assert inventory.take("ranting", 5) is None
+    held = inventory.get("ranting")
+    taken = inventory.take("ranting", 2)
+    assert taken.quantity == 2 and taken.durability == 100 and inventory.count("ranting") == 2
+    # Stacks handed out earlier keep their quantity
+    assert held.quantity == 3 and inventory.get("ranting").quantity == 1
+
+    # A take no single stack can cover fails; take_stacks spans them, keeping each durability
+    assert inventory.take("ranting", 2) is None
+    taken = inventory.take_stacks("ranting", 2)
+    assert sorted((item.durability, item.quantity) for item in taken) == [(40, 1), (100, 1)]
+    assert "ranting" not in inventory and inventory.count("ranting") == 0
+    assert inventory.take_stacks("ranting", 1) is None
+
+    # Invariant: count() is the sum of the stacks, whatever was added and taken
+    rng = random.Random(7)
+    names = ["Batu", "Obor", "Roti"]
+    for _ in range(500):
+        name = rng.choice(names)
+        if rng.random() < 0.6:
+            inventory.add(Item(name, "", durability=rng.choice([100, 50]), quantity=rng.randint(1, 3)))
+        else:
+            taken = rng.choice([inventory.take, inventory.take_stacks])(name, rng.randint(1, 4))
+            assert taken is None or all(item.quantity > 0 for item in ([taken] if isinstance(taken, Item) else taken))
+        for name in names:
+            assert inventory.count(name) == sum(item.quantity for item in inventory if item.name == name)
+    print("✅ Inventory stacks passed!")
+
+def test_quest_index():
+    """Test quests complete when, and only when, their requirements are held"""
+    print("Testing quest completion...")
+    state = GameState()
+    assert state.start_quest("quest_1")  # 3 ranting
+    state.add_item_to_inventory(Item("ranting", "Ranting kayu", quantity=2))
+    assert state.check_quest_completion() is None
+    state.add_item_to_inventory(Item("ranting", "Ranting kayu"))
+    state.remove_item_from_inventory("ranting")
+    assert state.check_quest_completion() is None
+
+    state.add_item_to_inventory(Item("ranting", "Ranting kayu"))
+    quest = state.check_quest_completion()
+    assert quest.quest_id == "quest_1" and "quest_1" in state.completed_quests
+    assert all(state.get_inventory_item(reward.name) for reward in quest.rewards)
+    assert state.check_quest_completion() is None
+    assert not state.start_quest("quest_1")
+
+    # A replaced inventory (e.g. after loading) is indexed again
+    assert state.start_quest("quest_2")  # 1 flint
+    state.inventory = Inventory([Item("flint", "Batu api")])
+    assert state.check_quest_completion().quest_id == "quest_2"
+    print("✅ Quest completion passed!")
+
+def _bfs_distances(adjacency, source):
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        name = queue.popleft()
+        for neighbor in adjacency[name]:
+            if neighbor not in distances:
+                distances[neighbor] = distances[name] + 1
+                queue.append(neighbor)
+    return distances
+
+def _check_routes(adjacency, queries, rng):
+    graph = WorldGraph.from_adjacency(adjacency.items())
+    names = list(adjacency)
+    for _ in range(queries):
+        source, target = rng.choice(names), rng.choice(names)
+        distances = _bfs_distances(adjacency, source)
+        route = graph.shortest_path(source, target)
+        if target not in distances:
+            assert route is None and not graph.is_reachable(source, target)
+            continue
+        assert route[0] == source and route[-1] == target
+        assert all(step in adjacency[here] for here, step in zip(route, route[1:]))
+        assert len(route) - 1 == distances[target] == graph.distance(source, target)
+        within = graph.within(source, 2)
+        assert within == {name: moves for name, moves in distances.items() if 0 < moves <= 2}
+
+def test_world_graph():
+    """Test routes are valid and shortest, on small (cached) and large worlds"""
+    print("Testing world graph...")
+    rng = random.Random(11)
+    for size in (40, ALL_PAIRS_LIMIT + 100):
+        names = [f"lokasi_{i}" for i in range(size)]
+        adjacency = {name: [rng.choice(names) for _ in range(rng.randint(0, 3))] for name in names}
+        adjacency[names[0]].append("tidak_ada")  # unknown targets are dropped
+        _check_routes({name: [n for n in targets if n in adjacency] for name, targets in adjacency.items()}, 60, rng)
+
+    # Weighted routes take the cheaper way round
+    graph = WorldGraph.from_adjacency([("a", ["b", "c"]), ("b", ["d"]), ("c", ["e"]), ("e", ["d"]), ("d", [])])
+    assert graph.shortest_path("a", "d") == ["a", "b", "d"]
+    assert graph.shortest_path("a", "d", weight=lambda here, step: 10 if step == "b" else 1) == ["a", "c", "e", "d"]
+    assert graph.shortest_path("d", "a") is None
+    print("✅ World graph passed!")
+
+def test_travel_is_all_or_nothing():
+    """Test a route with a closed step leaves the player where they started"""
+    print("Testing travel routes...")
+    state = GameState()
+    assert state.travel_to("kastil") == ["hutan", "kota", "kastil"]
+    assert state.current_location == "kastil"
+
+    state = GameState()
+    # The session closes the road the world graph still knows about
+    state.locations["kota"].connections = ("hutan",)
+    assert state.travel_to("kastil") is None
+    assert state.current_location == "hutan"
+    assert not state.locations["kota"].visited
+    print("✅ Travel routes passed!")
+
+def test_encounters_are_independent():
+    """Test a wounded goblin or an action on cooldown doesn't carry into the next fight"""
+    print("Testing combat encounters...")
+    random.seed(5)
+    goblin_health = get_monster_definitions()["goblin"].stats.health
+    first = CombatSystem()
+    first.start_combat(CombatStats(500, 500, 1, 5, 8), "goblin")
+    for _ in range(20):
+        if first.enemy.health < goblin_health:
+            break
+        first.execute_action("attack")
+    assert first.enemy.health < goblin_health
+    if first.enemy.health > 0:
+        first.execute_action("fireball")
+    assert get_monster_definitions()["goblin"].stats.health == goblin_health
+
+    # Another session's goblin, and this session's next one, start fresh
+    second = CombatSystem()
+    second.start_combat(CombatStats(500, 500, 1, 5, 8), "goblin")
+    assert second.enemy.health == goblin_health and not second.cooldowns
+    first.start_combat(CombatStats(500, 500, 1, 5, 8), "goblin")
+    assert first.enemy.health == goblin_health and not first.cooldowns
+    assert first.enemy is not second.enemy
+    print("✅ Combat encounters passed!")
+
+def main():
+    """Run all tests"""
+    print("🧪 Running Game System Tests...\n")
+
+    try:
+        test_sessions_share_the_world_template()
+        test_inventory_stacking()
+        test_quest_index()
+        test_world_graph()
+        test_travel_is_all_or_nothing()
+        test_encounters_are_independent()
+
+        print("\n🎉 All tests passed! Game systems work correctly.")
+
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Test script untuk memverifikasi sistem save/load
+"""
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from autosave import AutosaveService, session_slot_name
+from event_log import EventLog, restore_state
+from game_state import GameState, StateTimeline, Item, ItemTable, LOCATION_CODEC, get_world_template
+from save_load_system import SaveLoadSystem, DELTA_CHAIN_LIMIT, SAVE_PART_SUFFIX
+from save_migrations import SAVE_SCHEMA_VERSION, upgrade
+import save_tool
+
+def _location_data(location):
+    # Inventories compare by identity
+    return LOCATION_CODEC.encode_full(location, ItemTable())
+
+def _canonical(state):
+    """State as comparable data, every location decoded; play time depends on the clock"""
+    for name in list(state.locations):
+        state.locations[name]
+    data = state.save_game_state()
+    data.pop("play_time")
+    return json.dumps(data, sort_keys=True, default=list)
+
+def _explored_state():
+    """A state whose template locations differ from the template"""
+    state = GameState(player_name="Sari")
+    state.take_item_from_location("ranting")
+    state.travel_to("kastil")
+    state.locations["kastil"].visited = True
+    state.locations["gua"].visited = True
+    return state
+
+def test_load_keeps_locations_deferred():
+    """Test the game's load path (event log snapshot, new timeline) decodes no location"""
+    print("Testing deferred locations after load...")
+    directory = tempfile.mkdtemp()
+    saved = _explored_state()
+    system = SaveLoadSystem(directory)
+    assert system.save_game(saved, "uji")["success"]
+    expected = {name: _location_data(saved.locations[name]) for name in ("hutan", "kastil", "gua")}
+
+    state = GameState()
+    log = EventLog(os.path.join(directory, "events.log"), state)
+    assert system.load_game("uji", state)["success"]
+    log.snapshot()
+    timeline = StateTimeline(state)
+    timeline.record()
+    assert set(expected) <= set(state.locations.deferred())
+
+    # Saving again carries the deferred locations forward
+    for _ in range(DELTA_CHAIN_LIMIT + 1):
+        assert system.save_game(state, "uji")["success"]
+    assert set(expected) <= set(state.locations.deferred())
+
+    # Undo restores a deferred location that was changed after the load
+    state.locations["gua"].items.add(Item("Obor", "Obor yang menyala"))
+    timeline.record()
+    assert timeline.rewind()
+    assert "gua" in state.locations.deferred()
+    for name, data in expected.items():
+        assert _location_data(state.locations[name]) == data
+
+    # The event log snapshot and the re-saved file have the saved locations too
+    log.close()
+    restored, _ = restore_state(os.path.join(directory, "events.log"))
+    reloaded = system.load_game("uji")["game_state"]
+    for name, data in expected.items():
+        assert _location_data(restored.locations[name]) == data
+        assert _location_data(reloaded.locations[name]) == data
+    print("✅ Deferred locations after load passed!")
+
+def test_play_time_survives_loads():
+    """Test loading into a running state doesn't count its session twice"""
+    print("Testing play time across loads...")
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    state = GameState()
+    state.game_start_time -= timedelta(seconds=600)
+    assert system.save_game(state, "waktu")["success"]
+
+    running = GameState()
+    running.game_start_time -= timedelta(seconds=900)
+    for _ in range(2):
+        assert system.load_game("waktu", running)["success"]
+        assert 600 <= running.get_play_time() < 610
+        assert system.save_game(running, "waktu")["success"]
+    print("✅ Play time across loads passed!")
+
+def test_listing_while_saving():
+    """Test listing saves while another thread saves keeps the index consistent"""
+    print("Testing save listing during saves...")
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    state = GameState()
+    errors = []
+
+    def save_repeatedly():
+        try:
+            for _ in range(30):
+                assert system.save_game(state, "otomatis")["success"]
+                state.add_gold(1)
+        except Exception as e:
+            errors.append(e)
+
+    saver = threading.Thread(target=save_repeatedly)
+    saver.start()
+    while saver.is_alive():
+        system.get_save_files()
+    saver.join()
+    assert not errors, errors
+
+    stat = os.stat(os.path.join(system.save_directory, "otomatis.save"))
+    entry = system._load_index()["otomatis"]
+    assert (entry["file_size"], entry["mtime"]) == (stat.st_size, stat.st_mtime)
+    assert not any(name.endswith(".tmp") for name in os.listdir(system.save_directory))
+    print("✅ Save listing during saves passed!")
+
+def test_differential_chain_restore():
+    """Test every save of a differential chain loads back as the state it saved"""
+    print("Testing differential save chains...")
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    state = _explored_state()
+    # Ends partway through the second chain
+    for turn in range(2 * DELTA_CHAIN_LIMIT - 2):
+        state.add_gold(turn)
+        state.add_action(f"perintah {turn}")
+        if turn % 3 == 0:
+            state.travel_to("gua" if turn % 2 else "kastil")
+            state.take_item_from_location(next(iter(state.get_current_location_info().items)).name)
+        assert system.save_game(state, "rantai")["success"]
+        assert _canonical(system.load_game("rantai")["game_state"]) == _canonical(state)
+        parts = [name for name in os.listdir(system.save_directory) if name.endswith(SAVE_PART_SUFFIX)]
+        assert len(parts) < DELTA_CHAIN_LIMIT
+    assert parts and system.verify_save("rantai")["success"]
+
+    # An exported save needs none of the chain's parts
+    exported = os.path.join(tempfile.mkdtemp(), "rantai.save")
+    assert system.export_save("rantai", exported)["success"]
+    other = SaveLoadSystem(tempfile.mkdtemp())
+    assert other.import_save(exported, "salinan")["success"]
+    assert _canonical(other.load_game("salinan")["game_state"]) == _canonical(state)
+
+    # A damaged part is reported, not loaded
+    part = os.path.join(system.save_directory, parts[0])
+    with open(part, "r+b") as f:
+        f.seek(os.path.getsize(part) // 2)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    assert not system.verify_save("rantai")["success"]
+    assert not system.load_game("rantai")["success"]
+    print("✅ Differential save chains passed!")
+
+def test_save_after_broken_chain():
+    """Test a chain with a missing or damaged part is replaced by the next save"""
+    print("Testing saves over a broken chain...")
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    state = _explored_state()
+    for damage in ("hapus", "rusak"):
+        for _ in range(3):
+            state.add_gold(1)
+            assert system.save_game(state, "putus")["success"]
+        parts = sorted(name for name in os.listdir(system.save_directory) if name.endswith(SAVE_PART_SUFFIX))
+        part = os.path.join(system.save_directory, parts[0])
+        if damage == "hapus":
+            os.remove(part)
+        else:
+            with open(part, "r+b") as f:
+                f.seek(os.path.getsize(part) // 3)
+                f.write(b"\0" * 16)
+        assert not system.load_game("putus")["success"]
+
+        # The next save writes a full checkpoint and drops the stale parts
+        state.add_gold(1)
+        assert system.save_game(state, "putus")["success"]
+        assert not [name for name in os.listdir(system.save_directory) if name.endswith(SAVE_PART_SUFFIX)]
+        assert _canonical(system.load_game("putus")["game_state"]) == _canonical(state)
+    print("✅ Saves over a broken chain passed!")
+
+class _SlowDiskSaveSystem(SaveLoadSystem):
+    """Holds the first write until released"""
+    def __init__(self, save_directory):
+        super().__init__(save_directory)
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write_snapshot(self, snapshot):
+        self.writing.set()
+        assert self.release.wait(10)
+        return super().write_snapshot(snapshot)
+
+def test_autosave_coalescing():
+    """Test snapshots queued behind a slow write are merged, and the newest one is written"""
+    print("Testing autosave coalescing...")
+    system = _SlowDiskSaveSystem(tempfile.mkdtemp())
+    autosave = AutosaveService(system, every_commands=2, every_seconds=3600)
+    state = GameState()
+    assert not autosave.note_turn(state)
+    assert autosave.note_turn(state)
+    assert system.writing.wait(10)
+
+    # The first write is in progress; these wait, and replace one another
+    for _ in range(3):
+        state.add_gold(10)
+        autosave.request(state)
+    assert autosave.snapshots_coalesced == 2
+    system.release.set()
+    assert autosave.flush(10)
+    autosave.close(10)
+    assert autosave.saves_written == 2
+    assert autosave.last_results["autosave"]["success"]
+    assert system.load_game("autosave")["game_state"].gold == state.gold
+    print("✅ Autosave coalescing passed!")
+
+def test_session_slots_are_capped():
+    """Test autosave keeps only the newest session slots, and a discarded slot is deleted"""
+    print("Testing session autosave slots...")
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    autosave = AutosaveService(system, max_slots=2)
+    state = GameState()
+    assert system.save_game(state, "autosave")["success"]
+    assert system.save_game(state, "manual")["success"]
+    for i, session_id in enumerate(["sesi/1", "sesi 2", "sesi-3"]):
+        autosave.request(state, session_slot_name(session_id))
+        assert autosave.flush(10)
+        # Distinct write times, oldest first
+        path = os.path.join(system.save_directory, session_slot_name(session_id) + ".save")
+        os.utime(path, (1_000_000 + i, 1_000_000 + i))
+    names = {f["save_name"] for f in system.get_save_files()}
+    assert session_slot_name("sesi/1") == "autosave_sesi1"
+    assert names == {"autosave", "manual", "autosave_sesi2", "autosave_sesi-3"}
+
+    assert autosave.discard(session_slot_name("sesi 2"))
+    assert not autosave.discard(session_slot_name("sesi 2"))
+    autosave.close(10)
+    names = {f["save_name"] for f in system.get_save_files()}
+    assert names == {"autosave", "manual", "autosave_sesi-3"}
+    print("✅ Session autosave slots passed!")
+
+def test_backup_retention_and_gc():
+    """Test retention keeps the policy's backups and GC keeps every chunk they need"""
+    print("Testing backup retention...")
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    state = _explored_state()
+    expected = []
+    for day in range(4):
+        state.add_gold(5)
+        state.add_action(f"hari {day}")
+        assert system.save_game(state, "cadangan")["success"]
+        result = system.create_backup("cadangan")
+        assert result["success"] and not result["removed_backups"]
+        expected.append((result["backup_id"], _canonical(state)))
+
+    # Backups taken on four different days, oldest first
+    store = system.store
+    now = datetime.now()
+    for days_ago, manifest in zip((3, 2, 1, 0), store.manifests("cadangan")):
+        manifest["created"] = (now - timedelta(days=days_ago)).isoformat()
+        store._write_manifest(manifest)
+    removed = store.apply_retention("cadangan", keep_last=1, keep_daily=2, keep_weekly=0)
+    assert sorted(removed) == sorted(backup_id for backup_id, _ in expected[:2])
+    assert store.collect_garbage()["chunks_removed"] > 0
+    assert store.collect_garbage()["chunks_removed"] == 0
+
+    for backup_id, data in expected[2:]:
+        assert system.restore_backup(backup_id, "pulih")["success"]
+        assert _canonical(system.load_game("pulih")["game_state"]) == data
+    assert not system.restore_backup(expected[0][0], "pulih")["success"]
+    print("✅ Backup retention passed!")
+
+def _v1_item(item):
+    return {"name": item.name, "description": item.description, "weight": item.weight, "value": item.value,
+            "usable": item.usable, "consumable": item.consumable}
+
+def _write_v1_save(system, state, save_name):
+    """A save as the game wrote it before saves had a schema version"""
+    game_state = {
+        "player_name": state.player_name,
+        "current_location": state.current_location,
+        "health": state.health,
+        "max_health": state.max_health,
+        "level": state.level,
+        "experience": state.experience,
+        "gold": state.gold,
+        "game_start_time": state.game_start_time.isoformat(),
+        "game_over": state.game_over,
+        "conversation_history": list(state.conversation_history),
+        "player_actions": list(state.player_actions),
+        "completed_quests": list(state.completed_quests),
+        "inventory": [_v1_item(item) for item in state.inventory],
+        "quests": [{"title": quest.title, "description": quest.description,
+                    "requirements": dict(quest.requirements),
+                    "rewards": [{"name": reward.name, "description": reward.description,
+                                 "weight": reward.weight, "value": reward.value} for reward in quest.rewards],
+                    "completed": quest.completed, "started": quest.started, "quest_id": quest.quest_id}
+                   for quest in state.quests],
+        "locations": {name: {"name": location.name, "description": location.description,
+                             "connections": list(location.connections), "visited": location.visited,
+                             "items": [_v1_item(item) for item in location.items], "npcs": list(location.npcs)}
+                      for name, location in state.locations.items()}
+    }
+    save_data = {"game_state": game_state, "save_metadata": {
+        "save_name": save_name, "player_name": state.player_name, "level": state.level,
+        "location": state.current_location, "play_time": 0, "save_date": datetime.now().isoformat(),
+        "game_version": "1.0.0"
+    }}
+    save_data["save_metadata"]["checksum"] = system._generate_checksum(json.dumps(save_data, indent=2))
+    with open(os.path.join(system.save_directory, f"{save_name}.save"), "w") as f:
+        f.write(system._encrypt_data(json.dumps(save_data, indent=2)))
+
+def _check_v1_state(state):
+    assert state.player_name == "Lama" and state.gold == GameState().gold + 42 and state.current_location == "kastil"
+    assert state.count_inventory_item("ranting") == 1
+    assert [quest.quest_id for quest in state.quests if quest.started] == ["quest_1"]
+    assert state.locations["kastil"].visited
+    assert "ranting" not in [item.name for item in state.locations["hutan"].items]
+    # Monsters were not saved in v1; template locations keep the template's
+    assert state.locations["hutan"].monsters == GameState().locations["hutan"].monsters
+
+def _v1_source_state():
+    state = GameState(player_name="Lama")
+    state.add_gold(42)
+    state.take_item_from_location("ranting")
+    state.start_quest("quest_1")
+    state.travel_to("kastil")
+    return state
+
+def test_v1_save_migrates():
+    """Test a save from before schema versions loads, and migrates to the same state"""
+    print("Testing v1 save migration...")
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    _write_v1_save(system, _v1_source_state(), "lama")
+    result = system.load_game("lama")
+    assert result["success"], result.get("error")
+    loaded = result["game_state"]
+    _check_v1_state(loaded)
+
+    migrated = system.migrate_save("lama")
+    assert migrated["success"] and migrated["migrated"] and migrated["from_version"] == 1
+    result = system.load_game("lama")
+    assert result["metadata"]["schema_version"] == SAVE_SCHEMA_VERSION
+    _check_v1_state(result["game_state"])
+    assert _canonical(result["game_state"]) == _canonical(loaded)
+    assert not system.migrate_save("lama")["migrated"]
+    print("✅ v1 save migration passed!")
+
+def test_location_migration_by_key():
+    """Test a v1 location gets its template fields by key, without decoding the world"""
+    print("Testing location migration...")
+    template = get_world_template().locations
+    decoded = template.decoded_count()
+    saved = {"name": "Hutan Misterius", "description": "", "connections": [], "items": [], "npcs": []}
+    hutan = LOCATION_CODEC.new_compact(upgrade("location", saved, 1, "hutan"), ItemTable())
+    assert hutan.monsters and tuple(hutan.monsters) == tuple(GameState().locations.peek("hutan").monsters)
+    # A location the player built, named like a template one, has none
+    custom = LOCATION_CODEC.new_compact(upgrade("location", saved, 1, "hutan_baru"), ItemTable())
+    assert not custom.monsters and not custom.merchants
+    assert template.decoded_count() <= decoded + 1  # the peek above
+    print("✅ Location migration passed!")
+
+def test_save_tool():
+    """Test verify, migrate, pack and unpack over a directory of saves"""
+    print("Testing save tool...")
+    directory = tempfile.mkdtemp()
+    system = SaveLoadSystem(directory)
+    _write_v1_save(system, _v1_source_state(), "lama")
+    state = _explored_state()
+    for turn in range(3):
+        state.add_gold(turn)
+        assert system.save_game(state, "baru")["success"]
+    with open(os.path.join(directory, "rusak.save"), "wb") as f:
+        f.write(b"bukan file save")
+
+    summary = save_tool.verify_directory(directory, workers=2)
+    assert summary["count"] == 3 and set(summary["failed"]) == {"rusak"}
+    summary = save_tool.migrate_directory(directory, workers=2)
+    assert summary["migrated"] == ["lama"]
+
+    os.remove(os.path.join(directory, "rusak.save"))
+    archive = os.path.join(tempfile.mkdtemp(), "saves.tar.gz")
+    assert not save_tool.pack_directory(directory, archive, workers=2)["failed"]
+    restored = SaveLoadSystem(tempfile.mkdtemp())
+    assert not save_tool.unpack_archive(archive, restored.save_directory, workers=2)["failed"]
+    assert {entry["save_name"] for entry in restored.get_save_files()} == {"lama", "baru"}
+    _check_v1_state(restored.load_game("lama")["game_state"])
+    assert _canonical(restored.load_game("baru")["game_state"]) == _canonical(state)
+    print("✅ Save tool passed!")
+
+def main():
+    """Run all tests"""
+    print("🧪 Running Save/Load Tests...\n")
+
+    try:
+        test_load_keeps_locations_deferred()
+        test_play_time_survives_loads()
+        test_listing_while_saving()
+        test_differential_chain_restore()
+        test_save_after_broken_chain()
+        test_autosave_coalescing()
+        test_session_slots_are_capped()
+        test_backup_retention_and_gc()
+        test_v1_save_migrates()
+        test_location_migration_by_key()
+        test_save_tool()
+
+        print("\n🎉 All tests passed! Save/load works correctly.")
+
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script untuk memverifikasi serialisasi state (bentuk penuh dan ringkas)
+"""
+
+import json
+import tempfile
+from game_state import GameState, Item, Location, ItemTable, LOCATION_CODEC, QUEST_CODEC, COMBAT_STATS_CODEC
+from save_load_system import SaveLoadSystem
+
+def _played_state():
+    """A state that differs from a new game almost everywhere"""
+    state = GameState(player_name="Budi")
+    state.add_item_to_inventory(Item("Pedang Api", "Pedang yang menyala", 2.5, 120, item_type="weapon",
+                                     stats={"attack": 7}, durability=40, max_durability=80,
+                                     rarity="rare", special_effects=["burn"], quantity=2))
+    state.take_item_from_location("ranting")
+    state.travel_to("kastil")
+    state.locations["kastil"].visited = True
+    state.locations["menara_sihir"] = Location("Menara Sihir", "Menara tua", connections=("kastil",),
+                                               items=[Item("Tongkat", "Tongkat sihir", 1.0, 30)], npcs=("penyihir",))
+    state.start_quest("quest_1")
+    state.add_gold(75)
+    state.add_experience(40)
+    state.add_crafting_material("besi", 3)
+    state.improve_crafting_skill("alchemy", 25)
+    state.update_merchant_reputation("pedagang", 5)
+    state.combat_stats.attack = 17
+    state.combat_stats.mana = 12
+    state.add_action("serang")
+    state.add_conversation("halo")
+    return state
+
+def _comparable(state):
+    data = json.loads(json.dumps(state.save_game_state()))
+    # Play time keeps running while the test does
+    data.pop("play_time")
+    return data
+
+def _location_data(location):
+    # Inventories compare by identity
+    return LOCATION_CODEC.encode_full(location, ItemTable())
+
+def test_round_trip():
+    """Test both forms load back into the same state"""
+    print("Testing round trip...")
+    state = _played_state()
+    for compact in (False, True):
+        data = json.loads(json.dumps(state.save_game_state(compact=compact)))
+        loaded = GameState()
+        loaded.load_game_state(data, compact=compact)
+        assert _comparable(loaded) == _comparable(state)
+        assert loaded.locations["menara_sihir"].npcs == ("penyihir",)
+        assert loaded.get_inventory_item("Pedang Api").durability == 40
+        assert loaded.get_inventory_item("Pedang Api").special_effects == ("burn",)
+        assert loaded.combat_stats.attack == 17
+    print("✅ Round trip passed!")
+
+def test_missing_combat_stats():
+    """Test a save without combat stats loads a new player's"""
+    print("Testing missing combat stats...")
+    state = _played_state()
+    for compact in (False, True):
+        data = json.loads(json.dumps(state.save_game_state(compact=compact)))
+        del data["combat_stats"]
+        loaded = GameState()
+        loaded.load_game_state(data, compact=compact)
+        assert loaded.combat_stats == GameState().combat_stats
+        assert loaded.gold == state.gold
+    print("✅ Missing combat stats passed!")
+
+def test_compact_form():
+    """Test the compact form uses tags and leaves defaults out"""
+    print("Testing compact form...")
+    state = GameState()
+    compact = state.save_game_state(compact=True)
+    # A new game is all defaults (play time may have started)
+    assert set(compact["player"]) <= {"t"}
+    assert compact["crafting"] == {}
+    assert compact["combat_stats"] == {"h": 100, "mh": 100, "a": 10, "d": 5, "s": 8}
+
+    items = ItemTable()
+    location = Location("Gua", "Gelap", items=[Item("Batu", "Batu biasa")])
+    encoded = LOCATION_CODEC.encode_compact(location, items)
+    assert encoded == {"n": "Gua", "d": "Gelap", "i": [{"i": location.items[0].item_id}]}
+    assert _location_data(LOCATION_CODEC.new_compact(encoded, items)) == _location_data(location)
+
+    full = _played_state().save_game_state()
+    played = _played_state().save_game_state(compact=True)
+    assert len(json.dumps(played)) < len(json.dumps(full))
+    print("✅ Compact form passed!")
+
+def test_codecs():
+    """Test each codec restores every field"""
+    print("Testing codecs...")
+    state = _played_state()
+    items = ItemTable()
+    for compact in (False, True):
+        for quest in state.quests:
+            assert QUEST_CODEC.new(QUEST_CODEC.encode(quest, items, compact), items, compact) == quest
+        stats = COMBAT_STATS_CODEC.new(COMBAT_STATS_CODEC.encode(state.combat_stats, items, compact), items, compact)
+        assert stats == state.combat_stats
+
+    # Items carrying their definition inline need no table
+    inline = ItemTable(inline=True)
+    location = state.locations["menara_sihir"]
+    encoded = LOCATION_CODEC.encode_compact(location, inline)
+    assert inline.definitions == {}
+    assert _location_data(LOCATION_CODEC.new_compact(encoded, ItemTable())) == _location_data(location)
+    print("✅ Codecs passed!")
+
+def test_save_file():
+    """Test a save file keeps everything"""
+    print("Testing save file...")
+    state = _played_state()
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    assert system.save_game(state, "uji")["success"]
+    result = system.load_game("uji")
+    assert result["success"], result.get("error")
+    assert _comparable(result["game_state"]) == _comparable(state)
+    print("✅ Save file passed!")
+
+def test_self_contained_locations():
+    """Test saved locations carry their own item definitions"""
+    print("Testing self-contained locations...")
+    state = _played_state()
+    compact = state.save_game_state(compact=True)
+    tongkat = state.locations["menara_sihir"].items[0].item_id
+    assert tongkat not in compact["item_definitions"]
+    assert _location_data(LOCATION_CODEC.new_compact(compact["locations"]["menara_sihir"], ItemTable())) \
+        == _location_data(state.locations["menara_sihir"])
+
+    # Many sections, each decoded on its own from the mapped file
+    for i in range(200):
+        state.locations[f"ruang_{i}"] = Location(f"Ruang {i}", "Ruang uji", items=[Item(f"Benda {i}", "Unik")])
+    system = SaveLoadSystem(tempfile.mkdtemp())
+    assert system.save_game(state, "besar")["success"]
+    loaded = system.load_game("besar")["game_state"]
+    assert _location_data(loaded.locations["ruang_199"]) == _location_data(state.locations["ruang_199"])
+    assert _comparable(loaded) == _comparable(state)
+    print("✅ Self-contained locations passed!")
+
+def main():
+    """Run all tests"""
+    print("🧪 Running Serialization Tests...\n")
+
+    try:
+        test_round_trip()
+        test_missing_combat_stats()
+        test_compact_form()
+        test_codecs()
+        test_save_file()
+        test_self_contained_locations()
+
+        print("\n🎉 All tests passed! Serialization works correctly.")
+
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from typing import Dict, List, Optional, Tuple
 from enum import Enum
 import random
 from datetime import datetime, timedelta
+from content_pack import get_default_pack
+from ring_buffer import RingBuffer
 
 class MerchantType(Enum):
     GENERAL = "general"
@@ -49,119 +51,21 @@ class TradingSystem:
     def __init__(self):
         self.merchants = self._initialize_merchants()
         self.player_reputation = {}  # merchant_name: reputation
-        self.trade_history = []
+        self.trade_history = RingBuffer(maxlen=100)  # last 100 transactions
         self.market_prices = {}  # item_name: current_market_price
         self.supply_demand = {}  # item_name: supply_demand_factor
         
     def _initialize_merchants(self) -> Dict[str, Merchant]:
-        """Initialize all merchants in the game"""
-        return {
-            "pedagang_umum": Merchant(
-                name="Pedagang Umum",
-                description="Pedagang yang menjual berbagai barang sehari-hari",
-                merchant_type=MerchantType.GENERAL,
-                location="kota",
-                inventory={
-                    "health_potion": TradeItem("Health Potion", "Ramuan penyembuh", 15, ItemRarity.COMMON, 10),
-                    "bread": TradeItem("Bread", "Roti segar", 5, ItemRarity.COMMON, 20),
-                    "water": TradeItem("Water", "Air bersih", 2, ItemRarity.COMMON, 50),
-                    "torch": TradeItem("Torch", "Obor untuk penerangan", 8, ItemRarity.COMMON, 15),
-                    "rope": TradeItem("Rope", "Tali yang kuat", 12, ItemRarity.COMMON, 8)
-                },
-                gold=500,
-                reputation=60,
-                negotiation_skill=3
-            ),
-            
-            "tukang_senjata": Merchant(
-                name="Tukang Senjata",
-                description="Ahli pembuat dan penjual senjata",
-                merchant_type=MerchantType.WEAPONSMITH,
-                location="kota",
-                inventory={
-                    "iron_sword": TradeItem("Iron Sword", "Pedang besi yang tajam", 80, ItemRarity.UNCOMMON, 3),
-                    "steel_sword": TradeItem("Steel Sword", "Pedang baja yang kuat", 150, ItemRarity.RARE, 2),
-                    "dagger": TradeItem("Dagger", "Pisau kecil yang tajam", 25, ItemRarity.COMMON, 8),
-                    "bow": TradeItem("Bow", "Busur untuk memanah", 60, ItemRarity.UNCOMMON, 5),
-                    "arrows": TradeItem("Arrows", "Anak panah", 2, ItemRarity.COMMON, 100)
-                },
-                gold=800,
-                reputation=70,
-                negotiation_skill=6,
-                special_discounts={"iron_sword": 0.9, "steel_sword": 0.85}
-            ),
-            
-            "tukang_armor": Merchant(
-                name="Tukang Armor",
-                description="Spesialis armor dan pelindung",
-                merchant_type=MerchantType.ARMORER,
-                location="kota",
-                inventory={
-                    "leather_armor": TradeItem("Leather Armor", "Armor kulit ringan", 45, ItemRarity.COMMON, 5),
-                    "iron_armor": TradeItem("Iron Armor", "Armor besi yang kuat", 120, ItemRarity.UNCOMMON, 3),
-                    "shield": TradeItem("Shield", "Perisai untuk bertahan", 35, ItemRarity.COMMON, 7),
-                    "helmet": TradeItem("Helmet", "Pelindung kepala", 25, ItemRarity.COMMON, 10),
-                    "boots": TradeItem("Boots", "Sepatu yang nyaman", 20, ItemRarity.COMMON, 12)
-                },
-                gold=600,
-                reputation=65,
-                negotiation_skill=5
-            ),
-            
-            "alkemis": Merchant(
-                name="Alkemis",
-                description="Ahli ramuan dan obat-obatan",
-                merchant_type=MerchantType.ALCHEMIST,
-                location="kota",
-                inventory={
-                    "health_potion": TradeItem("Health Potion", "Ramuan penyembuh", 20, ItemRarity.COMMON, 15),
-                    "mana_potion": TradeItem("Mana Potion", "Ramuan pemulih mana", 25, ItemRarity.UNCOMMON, 12),
-                    "strength_potion": TradeItem("Strength Potion", "Ramuan penambah kekuatan", 35, ItemRarity.RARE, 8),
-                    "invisibility_potion": TradeItem("Invisibility Potion", "Ramuan menghilang", 80, ItemRarity.EPIC, 3),
-                    "antidote": TradeItem("Antidote", "Penawar racun", 30, ItemRarity.UNCOMMON, 10)
-                },
-                gold=400,
-                reputation=75,
-                negotiation_skill=7,
-                special_markups={"invisibility_potion": 1.3, "strength_potion": 1.2}
-            ),
-            
-            "toko_sihir": Merchant(
-                name="Toko Sihir",
-                description="Toko khusus barang-barang ajaib",
-                merchant_type=MerchantType.MAGIC_SHOP,
-                location="kastil",
-                inventory={
-                    "magic_scroll": TradeItem("Magic Scroll", "Gulungan sihir", 100, ItemRarity.RARE, 5),
-                    "magic_wand": TradeItem("Magic Wand", "Tongkat sihir", 200, ItemRarity.EPIC, 2),
-                    "mana_crystal": TradeItem("Mana Crystal", "Kristal pemulih mana", 50, ItemRarity.UNCOMMON, 8),
-                    "teleport_scroll": TradeItem("Teleport Scroll", "Gulungan teleportasi", 150, ItemRarity.EPIC, 3),
-                    "enchantment_orb": TradeItem("Enchantment Orb", "Orb untuk enchant", 300, ItemRarity.LEGENDARY, 1)
-                },
-                gold=1000,
-                reputation=80,
-                negotiation_skill=8,
-                special_markups={"enchantment_orb": 1.5, "teleport_scroll": 1.4}
-            ),
-            
-            "pedagang_gelap": Merchant(
-                name="Pedagang Gelap",
-                description="Pedagang barang-barang ilegal dan langka",
-                merchant_type=MerchantType.BLACK_MARKET,
-                location="gua",
-                inventory={
-                    "poison_dagger": TradeItem("Poison Dagger", "Pisau beracun", 120, ItemRarity.RARE, 2),
-                    "lockpick": TradeItem("Lockpick", "Alat membuka kunci", 80, ItemRarity.UNCOMMON, 5),
-                    "smoke_bomb": TradeItem("Smoke Bomb", "Bom asap untuk kabur", 60, ItemRarity.UNCOMMON, 8),
-                    "invisibility_cloak": TradeItem("Invisibility Cloak", "Jubah menghilang", 500, ItemRarity.LEGENDARY, 1),
-                    "thief_tools": TradeItem("Thief Tools", "Peralatan pencuri", 150, ItemRarity.RARE, 3)
-                },
-                gold=2000,
-                reputation=30,
-                negotiation_skill=9,
-                special_markups={"invisibility_cloak": 2.0, "poison_dagger": 1.8}
-            )
-        }
+        """Initialize all merchants in the game from the content pack"""
+        merchants = {}
+        for merchant_id, record in get_default_pack().section("merchants").records():
+            record["merchant_type"] = MerchantType(record["merchant_type"])
+            record["inventory"] = {
+                item_id: TradeItem(**{**item, "rarity": ItemRarity(item["rarity"])})
+                for item_id, item in record["inventory"].items()
+            }
+            merchants[merchant_id] = Merchant(**record)
+        return merchants
     
     def get_merchant_inventory(self, merchant_name: str) -> Dict:
         """Get merchant's current inventory"""
@@ -377,14 +281,10 @@ class TradingSystem:
             "timestamp": datetime.now().isoformat()
         }
         self.trade_history.append(transaction)
-        
-        # Keep only last 100 transactions
-        if len(self.trade_history) > 100:
-            self.trade_history = self.trade_history[-100:]
     
     def get_trade_history(self, limit: int = 10) -> List[Dict]:
         """Get recent trade history"""
-        return self.trade_history[-limit:] if self.trade_history else []
+        return self.trade_history.tail(limit)
     
     def get_player_reputation(self) -> Dict[str, int]:
         """Get player's reputation with all merchants"""
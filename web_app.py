@@ -3,9 +3,11 @@ from flask_socketio import SocketIO, emit
 import json
 import os
 from datetime import datetime
-from game_state import GameState
+from game_state import GameState, StateDeltaTracker
 from ai_integration import generate_description, generate_puzzle, generate_npc_dialogue, generate_contextual_response, generate_quest_description, generate_location_description
 from ai_learning_system import AILearningSystem
+from save_load_system import SaveLoadSystem
+from autosave import AutosaveService, session_slot_name
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
@@ -13,6 +15,10 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Global game instances (in production, use database)
 game_instances = {}
+# One background writer for every session's autosave slot; slots of
+# sessions that stopped playing are deleted once there are more than this
+MAX_SESSION_AUTOSAVES = 100
+autosave = AutosaveService(SaveLoadSystem(), max_slots=MAX_SESSION_AUTOSAVES)
 
 def get_or_create_game(session_id):
     """Get or create game instance for session"""
@@ -32,10 +38,12 @@ def index():
 def start_game():
     """Start new game session"""
     session_id = request.json.get('session_id', str(datetime.now().timestamp()))
+    is_new_session = session_id not in game_instances
     game_data = get_or_create_game(session_id)
     
-    # Reset game state
-    game_data['state'] = GameState()
+    # Reset game state (a freshly created session already has one)
+    if not is_new_session:
+        game_data['state'] = GameState()
     
     return jsonify({
         'success': True,
@@ -52,9 +60,12 @@ def get_game_status():
     
     game_data = game_instances[session_id]
     state = game_data['state']
+    return jsonify(state.cached_view('web_status', build_game_status))
+
+def build_game_status(state):
+    """Status payload sent to the web client"""
     current_loc = state.get_current_location_info()
-    
-    return jsonify({
+    return {
         'player_name': state.player_name,
         'health': state.health,
         'max_health': state.max_health,
@@ -67,7 +78,7 @@ def get_game_status():
             'items': [{'name': item.name, 'description': item.description} for item in current_loc.items],
             'npcs': current_loc.npcs
         },
-        'inventory': [{'name': item.name, 'description': item.description, 'weight': item.weight, 'value': item.value} for item in state.inventory],
+        'inventory': [{'name': item.name, 'description': item.description, 'weight': item.weight, 'value': item.value, 'quantity': item.quantity} for item in state.inventory],
         'available_locations': state.get_available_locations(),
         'quests': [{
             'id': quest.quest_id,
@@ -76,7 +87,21 @@ def get_game_status():
             'started': quest.started,
             'completed': quest.completed
         } for quest in state.quests]
-    })
+    }
+
+@app.route('/api/game/delta', methods=['GET'])
+def get_game_delta():
+    """Get state changes since this session's previous delta request"""
+    session_id = request.args.get('session_id')
+    if not session_id or session_id not in game_instances:
+        return jsonify({'error': 'Game session not found'}), 404
+    
+    game_data = game_instances[session_id]
+    tracker = game_data.get('state_tracker')
+    # A restarted game gets a fresh tracker, which starts with a full checkpoint
+    if tracker is None or tracker.state is not game_data['state']:
+        tracker = game_data['state_tracker'] = StateDeltaTracker(game_data['state'])
+    return jsonify(tracker.export())
 
 @app.route('/api/game/command', methods=['POST'])
 def execute_command():
@@ -97,32 +122,10 @@ def execute_command():
     try:
         # Process command
         result = process_command(command, state, ai_learning)
+        autosave.note_turn(state, session_slot_name(session_id))
         
-        # Get updated game status directly from state
-        current_loc = state.get_current_location_info()
-        game_status = {
-            'player_name': state.player_name,
-            'health': state.health,
-            'max_health': state.max_health,
-            'level': state.level,
-            'experience': state.experience,
-            'gold': state.gold,
-            'current_location': {
-                'name': current_loc.name,
-                'description': current_loc.description,
-                'items': [{'name': item.name, 'description': item.description} for item in current_loc.items],
-                'npcs': current_loc.npcs
-            },
-            'inventory': [{'name': item.name, 'description': item.description, 'weight': item.weight, 'value': item.value} for item in state.inventory],
-            'available_locations': state.get_available_locations(),
-            'quests': [{
-                'id': quest.quest_id,
-                'title': quest.title,
-                'description': quest.description,
-                'started': quest.started,
-                'completed': quest.completed
-            } for quest in state.quests]
-        }
+        # Status is only rebuilt when the command changed the state
+        game_status = state.cached_view('web_status', build_game_status)
         
         return jsonify({
             'success': True,
@@ -179,7 +182,8 @@ def process_command(command, state, ai_learning):
         if state.inventory:
             response_text = "**Inventaris Anda:**\n"
             for item in state.inventory:
-                response_text += f"- {item.name}: {item.description} (Berat: {item.weight}, Nilai: {item.value})\n"
+                quantity_text = f" x{item.quantity}" if item.quantity > 1 else ""
+                response_text += f"- {item.name}{quantity_text}: {item.description} (Berat: {item.weight}, Nilai: {item.value})\n"
         else:
             response_text = "Inventaris Anda kosong."
     
@@ -187,8 +191,15 @@ def process_command(command, state, ai_learning):
         parts = command.split(" ", 2)
         if len(parts) >= 3:
             location = parts[2].strip()
-            if state.move_to(location):
-                response_text = f"Anda pindah ke **{state.get_current_location_info().name}**"
+            moved = state.move_to(location)
+            # Not adjacent: walk the shortest route there
+            route = None if moved else state.travel_to(location)
+            if moved or route:
+                if route:
+                    response_text = f"Anda menempuh rute: {' → '.join(route)}\n"
+                    response_text += f"Anda tiba di **{state.get_current_location_info().name}**"
+                else:
+                    response_text = f"Anda pindah ke **{state.get_current_location_info().name}**"
                 # Auto-show location description
                 current_loc = state.get_current_location_info()
                 description = generate_location_description(
@@ -207,18 +218,32 @@ def process_command(command, state, ai_learning):
             success = False
             response_type = "error"
     
+    elif cmd.startswith("rute"):
+        parts = command.split(" ", 1)
+        if len(parts) >= 2:
+            location = parts[1].strip()
+            route = state.find_route(location)
+            if route is None:
+                response_text = f"Tidak ada rute ke '{location}'."
+                success = False
+                response_type = "error"
+            else:
+                response_text = f"Rute ke **{location}** ({len(route) - 1} langkah): {' → '.join(route)}"
+        else:
+            nearby = state.locations_within(3)
+            response_text = "**Lokasi dalam 3 langkah:**\n"
+            for name, moves in sorted(nearby.items(), key=lambda entry: entry[1]):
+                response_text += f"- {name}: {moves} langkah\n"
+    
     elif cmd.startswith("ambil"):
         parts = command.split(" ", 1)
         if len(parts) >= 2:
             item_name = parts[1].strip()
-            current_loc = state.get_current_location_info()
             
-            for item in current_loc.items:
-                if item.name.lower() == item_name.lower():
-                    state.add_item_to_inventory(item)
-                    current_loc.items.remove(item)
-                    response_text = f"Anda mengambil **{item.name}**: {item.description}"
-                    return response_text
+            item = state.take_item_from_location(item_name)
+            if item:
+                response_text = f"Anda mengambil **{item.name}**: {item.description}"
+                return response_text
             
             response_text = f"Item '{item_name}' tidak ditemukan di lokasi ini."
             success = False
@@ -344,7 +369,8 @@ def process_command(command, state, ai_learning):
 - `help` - Menampilkan bantuan ini
 
 **Eksplorasi:**
-- `pergi ke [lokasi]` - Pindah ke lokasi lain
+- `pergi ke [lokasi]` - Pindah ke lokasi lain (lokasi jauh ditempuh lewat rute terpendek)
+- `rute [lokasi]` - Melihat rute ke lokasi, atau lokasi terdekat jika tanpa nama
 - `ambil [item]` - Mengambil item dari lokasi
 - `gunakan [item]` - Menggunakan item dari inventaris
 
@@ -0,0 +1,178 @@
+from array import array
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import heapq
+
+# Worlds up to this many locations cache a BFS tree for every source (all pairs)
+ALL_PAIRS_LIMIT = 1024
+# Larger worlds keep only the most recently used source trees
+SOURCE_CACHE_SIZE = 16
+
+class WorldGraph:
+    """Compact directed adjacency index over location connections.
+
+    Locations get dense integer ids and edges are stored CSR-style: the
+    neighbours of node i are targets[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, names: List[str], offsets: array, targets: array):
+        self.names = names
+        self.ids: Dict[str, int] = {name: node for node, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self._trees: "OrderedDict[int, Tuple[array, array]]" = OrderedDict()
+        self._cache_limit = len(names) if len(names) <= ALL_PAIRS_LIMIT else SOURCE_CACHE_SIZE
+
+    @classmethod
+    def from_adjacency(cls, adjacency: Iterable[Tuple[str, Sequence[str]]]) -> "WorldGraph":
+        """Build from (location, connections) pairs; unknown targets are dropped"""
+        adjacency = list(adjacency)
+        names = [name for name, _ in adjacency]
+        ids = {name: node for node, name in enumerate(names)}
+        offsets = array("I", [0])
+        targets = array("I")
+        for _, connections in adjacency:
+            targets.extend(ids[target] for target in connections if target in ids)
+            offsets.append(len(targets))
+        return cls(names, offsets, targets)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name) -> bool:
+        return name in self.ids
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def neighbors(self, name: str) -> List[str]:
+        """Locations directly connected from a location"""
+        node = self.ids[name]
+        return [self.names[target] for target in self.targets[self.offsets[node]:self.offsets[node + 1]]]
+
+    def shortest_path(self, source: str, target: str,
+                      weight: Optional[Callable[[str, str], float]] = None) -> Optional[List[str]]:
+        """Route from source to target (inclusive), or None if unreachable.
+
+        Without a weight every move costs 1 (BFS); with weight(from, to) the
+        cheapest route is found with Dijkstra.
+        """
+        if source not in self.ids or target not in self.ids:
+            return None
+        start, goal = self.ids[source], self.ids[target]
+        if weight is not None:
+            parent = self._dijkstra(start, goal, weight)
+        elif len(self.names) <= ALL_PAIRS_LIMIT or start in self._trees:
+            parent = self._tree(start)[1]
+        else:
+            parent = self._bfs_until(start, goal)
+        if start != goal and parent[goal] < 0:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        return [self.names[node] for node in reversed(path)]
+
+    def distance(self, source: str, target: str) -> Optional[int]:
+        """Number of moves on the shortest route, or None if unreachable"""
+        path = self.shortest_path(source, target)
+        return len(path) - 1 if path is not None else None
+
+    def is_reachable(self, source: str, target: str) -> bool:
+        return self.shortest_path(source, target) is not None
+
+    def within(self, source: str, max_moves: int) -> Dict[str, int]:
+        """Locations reachable in at most max_moves, with their distance"""
+        if source not in self.ids:
+            return {}
+        start = self.ids[source]
+        offsets, targets = self.offsets, self.targets
+        distance = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            next_distance = distance[node] + 1
+            if next_distance > max_moves:
+                continue
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                if neighbor not in distance:
+                    distance[neighbor] = next_distance
+                    queue.append(neighbor)
+        del distance[start]
+        return {self.names[node]: moves for node, moves in distance.items()}
+
+    def precompute_all_pairs(self):
+        """Fill the BFS tree cache for every source (small worlds only)"""
+        if len(self.names) > ALL_PAIRS_LIMIT:
+            raise ValueError(f"All-pairs cache is limited to {ALL_PAIRS_LIMIT} locations")
+        for node in range(len(self.names)):
+            self._tree(node)
+
+    def _tree(self, start: int) -> Tuple[array, array]:
+        """Cached BFS (distance, parent) arrays from a source node"""
+        tree = self._trees.get(start)
+        if tree is not None:
+            self._trees.move_to_end(start)
+            return tree
+        size = len(self.names)
+        distance = array("i", [-1]) * size
+        parent = array("i", [-1]) * size
+        distance[start] = 0
+        offsets, targets = self.offsets, self.targets
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            next_distance = distance[node] + 1
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                if distance[neighbor] < 0:
+                    distance[neighbor] = next_distance
+                    parent[neighbor] = node
+                    queue.append(neighbor)
+        tree = self._trees[start] = (distance, parent)
+        if len(self._trees) > self._cache_limit:
+            self._trees.popitem(last=False)
+        return tree
+
+    def _bfs_until(self, start: int, goal: int) -> Dict[int, int]:
+        """Uncached BFS that stops as soon as the goal is reached"""
+        offsets, targets = self.offsets, self.targets
+        parent = {start: start}
+        queue = deque([start])
+        while queue and goal not in parent:
+            node = queue.popleft()
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                if neighbor not in parent:
+                    parent[neighbor] = node
+                    queue.append(neighbor)
+        return _ParentMap(parent)
+
+    def _dijkstra(self, start: int, goal: int, weight: Callable[[str, str], float]) -> Dict[int, int]:
+        """Cheapest-route parents from start, stopping once the goal is settled"""
+        names, offsets, targets = self.names, self.offsets, self.targets
+        cost = {start: 0.0}
+        parent = {start: start}
+        heap = [(0.0, start)]
+        while heap:
+            node_cost, node = heapq.heappop(heap)
+            if node == goal:
+                break
+            if node_cost > cost[node]:
+                continue
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                new_cost = node_cost + weight(names[node], names[neighbor])
+                if new_cost < cost.get(neighbor, float("inf")):
+                    cost[neighbor] = new_cost
+                    parent[neighbor] = node
+                    heapq.heappush(heap, (new_cost, neighbor))
+        return _ParentMap(parent)
+
+class _ParentMap(dict):
+    """Parent lookup that reports unreached nodes as -1, like the BFS arrays"""
+
+    def __missing__(self, node: int) -> int:
+        return -1